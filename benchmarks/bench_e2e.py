@@ -0,0 +1,373 @@
+# 📁 benchmarks/bench_e2e.py
+# 챗봇/프로필 경로 종단 간(end-to-end) 지연 시간 벤치마크
+# 기록된 한국어 카드 질문(questions.txt)과 시드된 사용자 ID(seed_mysql.py)로 실제 파이프라인을 재생합니다.
+#   - OpenAI : 로컬 대역 서버(fake_openai.py)를 OPENAI_BASE_URL 로 연결 (토큰 지연 설정 가능)
+#   - MySQL  : BENCH_MYSQL_* 로 지정한 시드 DB (운영 DB 는 사용하지 않음)
+# 단계별 p50/p95/p99, 첫 토큰까지 시간(TTFT), 동시 세션 수별 처리량, 최대 RSS 를 출력하고 JSON 으로 저장합니다.
+#
+# 사용법:
+#   python benchmarks/seed_mysql.py --users 2000                          # 최초 1회
+#   python benchmarks/bench_e2e.py --concurrency 1,4,16 --turns 3
+#   python benchmarks/bench_e2e.py --pipeline async --token-delay-ms 30 --compare benchmarks/results/before.json
+
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import random
+import resource
+import sys
+import threading
+import time
+import traceback
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# src 패키지(db, llm ...) 를 import 할 수 있도록 경로 추가
+sys.path.append(os.path.join(os.path.dirname(BENCH_DIR), "src"))
+
+from fake_openai import start_server
+from seed_mysql import USERS_PATH, get_bench_params
+
+QUESTIONS_PATH = os.path.join(BENCH_DIR, "questions.txt")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+
+def summarize(seconds) -> dict:
+    values = np.asarray(seconds, dtype=np.float64) * 1000.0
+    if not len(values):
+        return {"count": 0}
+    return {
+        "count": int(len(values)),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max())
+    }
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 는 KB, macOS 는 byte 단위
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+class StageRecorder:
+    """모듈 함수를 감싸 호출마다 소요 시간을 단계 이름별로 기록합니다."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = []
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    def error(self, stage, exc):
+        with self._lock:
+            self.errors.append({"stage": stage, "error": "{0}: {1}".format(type(exc).__name__, exc)})
+
+    def reset(self):
+        with self._lock:
+            self.samples = defaultdict(list)
+            self.errors = []
+
+    def wrap(self, module, name, stage):
+        original = getattr(module, name)
+        recorder = self
+
+        if inspect.iscoroutinefunction(original):
+            async def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await original(*args, **kwargs)
+                finally:
+                    recorder.add(stage, time.perf_counter() - started)
+        else:
+            def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    recorder.add(stage, time.perf_counter() - started)
+
+        timed.__wrapped__ = original
+        setattr(module, name, timed)
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {stage: summarize(values) for stage, values in sorted(self.samples.items())}
+
+
+def configure_environment(args):
+    """파이프라인 모듈을 import 하기 전에 OpenAI / MySQL / 캐시 설정을 벤치마크용으로 바꿉니다."""
+    server = None
+    base_url = args.openai_base_url
+    if not base_url:
+        server, base_url = start_server(first_token_ms=args.first_token_ms, token_delay_ms=args.token_delay_ms)
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+    bench = get_bench_params()
+    os.environ.update({
+        "MYSQL_HOST": bench["host"], "MYSQL_PORT": str(bench["port"]), "MYSQL_USER": bench["user"] or "",
+        "MYSQL_PASSWORD": bench["password"] or "", "MYSQL_DATABASE": bench["database"]
+    })
+
+    if not args.with_caches:
+        # 반복 질문이 캐시에서 바로 나오지 않도록 답변/질문 임베딩/추천 조회 캐시를 끔
+        os.environ.update({
+            "RESPONSE_CACHE_SIZE": "0", "QUERY_EMBEDDING_CACHE_SIZE": "0",
+            "QUERY_EMBEDDING_CACHE_PATH": "", "HYBRID_CACHE_SIZE": "0"
+        })
+    return server, base_url, bench
+
+
+def instrument(recorder):
+    """실제 파이프라인 함수들을 단계 이름으로 감쌉니다 (호출하는 모듈의 이름 공간 기준)."""
+    import db.db_utils as db_utils
+    import llm.marketing_generator as marketing_generator
+    import llm.rag_answer as rag_answer
+    import llm.rag_async as rag_async
+
+    for module in (rag_answer, rag_async):
+        recorder.wrap(module, "encode_question", "embed")
+        recorder.wrap(module, "retrieve_benefits", "retrieve")
+        recorder.wrap(module, "build_prompt", "build_prompt")
+    recorder.wrap(rag_answer, "get_user_profile_summary", "profile_summary")
+    recorder.wrap(rag_async, "get_user_profile_summary_async", "profile_summary")
+    recorder.wrap(rag_answer, "get_catalog", "catalog")
+    recorder.wrap(db_utils, "get_user_profile", "user_profile")
+    recorder.wrap(db_utils, "get_hybrid_recommendations", "hybrid_recommendations")
+    recorder.wrap(marketing_generator, "generate_marketing_copies", "marketing_copies")
+    return db_utils, marketing_generator, rag_answer, rag_async
+
+
+def build_sessions(users, questions, n_sessions, turns, seed):
+    rng = random.Random(seed)
+    return [(users[i % len(users)], rng.sample(questions, min(turns, len(questions)))) for i in range(n_sessions)]
+
+
+# ✅ 동기 파이프라인 (app.py 와 같은 호출 순서: 프로필 → 추천 카드 → 광고 문구 → 질문)
+def run_session_sync(modules, recorder, user_id, questions, args):
+    db_utils, marketing_generator, rag_answer, _ = modules
+    try:
+        db_utils.get_user_profile(user_id)
+        cards = db_utils.get_recommended_cards(user_id)
+        if cards:
+            marketing_generator.generate_marketing_copies(cards, refresh=not args.with_caches)
+    except Exception as e:
+        recorder.error("profile", e)
+
+    history = []
+    for question in questions:
+        started = time.perf_counter()
+        first_token = None
+        parts = []
+        try:
+            stream, _, _ = rag_answer.ask_card_rag(
+                question, user_id=user_id, chat_history=history if args.with_history else None, stream=True
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if first_token is None:
+                        first_token = time.perf_counter()
+                    parts.append(chunk.choices[0].delta.content)
+        except Exception as e:
+            recorder.error("chat", e)
+            continue
+        finished = time.perf_counter()
+        recorder.add("ttft", (first_token or finished) - started)
+        recorder.add("llm_stream", finished - (first_token or finished))
+        recorder.add("turn_total", finished - started)
+        history.append((question, "".join(parts)))
+
+
+# ✅ asyncio 파이프라인 (ask_card_rag_async)
+async def run_session_async(modules, recorder, user_id, questions, args):
+    db_utils, marketing_generator, _, rag_async = modules
+    try:
+        await asyncio.to_thread(db_utils.get_user_profile, user_id)
+        cards = await asyncio.to_thread(db_utils.get_recommended_cards, user_id)
+        if cards:
+            await asyncio.to_thread(marketing_generator.generate_marketing_copies, cards, None, not args.with_caches)
+    except Exception as e:
+        recorder.error("profile", e)
+
+    history = []
+    for question in questions:
+        started = time.perf_counter()
+        first_token = None
+        parts = []
+        try:
+            tokens, _, _ = await rag_async.ask_card_rag_async(
+                question, user_id=user_id, chat_history=history if args.with_history else None
+            )
+            async for token in tokens:
+                if first_token is None:
+                    first_token = time.perf_counter()
+                parts.append(token)
+        except Exception as e:
+            recorder.error("chat", e)
+            continue
+        finished = time.perf_counter()
+        recorder.add("ttft", (first_token or finished) - started)
+        recorder.add("llm_stream", finished - (first_token or finished))
+        recorder.add("turn_total", finished - started)
+        history.append((question, "".join(parts)))
+
+
+def run_level(modules, recorder, sessions, concurrency, args):
+    recorder.reset()
+    started = time.perf_counter()
+    if args.pipeline == "async":
+        async def run_all():
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def one(user_id, questions):
+                async with semaphore:
+                    await run_session_async(modules, recorder, user_id, questions, args)
+
+            await asyncio.gather(*(one(user_id, questions) for user_id, questions in sessions))
+
+        asyncio.run(run_all())
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [executor.submit(run_session_sync, modules, recorder, user_id, questions, args)
+                       for user_id, questions in sessions]
+            for future in futures:
+                future.result()
+    elapsed = time.perf_counter() - started
+
+    stages = recorder.summary()
+    turns = stages.get("turn_total", {}).get("count", 0)
+    return {
+        "concurrency": concurrency,
+        "sessions": len(sessions),
+        "turns": turns,
+        "seconds": elapsed,
+        "turns_per_sec": turns / elapsed if elapsed else 0.0,
+        "sessions_per_sec": len(sessions) / elapsed if elapsed else 0.0,
+        "errors": len(recorder.errors),
+        "error_samples": recorder.errors[:5],
+        "stages": stages,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+def print_level(result):
+    print("\n[동시 세션 {0}] 세션 {1}, 대화 {2}턴, {3:.1f}초 → {4:.2f}턴/초, 오류 {5}건, 최대 RSS {6:.0f}MB".format(
+        result["concurrency"], result["sessions"], result["turns"], result["seconds"],
+        result["turns_per_sec"], result["errors"], result["peak_rss_mb"]))
+    print("{0:<24} {1:>6} {2:>9} {3:>9} {4:>9} {5:>9}".format("stage", "count", "p50(ms)", "p95(ms)", "p99(ms)", "max(ms)"))
+    for stage, row in result["stages"].items():
+        if row["count"]:
+            print("{0:<24} {1:>6} {2:>9.1f} {3:>9.1f} {4:>9.1f} {5:>9.1f}".format(
+                stage, row["count"], row["p50_ms"], row["p95_ms"], row["p99_ms"], row["max_ms"]))
+    for sample in result["error_samples"]:
+        print("  ⚠️ {0}: {1}".format(sample["stage"], sample["error"]))
+
+
+def print_comparison(report, baseline_path):
+    """이전 결과 JSON 과 같은 동시 세션 수끼리 단계별 p50/p95 변화율을 출력합니다."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {run["concurrency"]: run for run in json.load(f)["runs"]}
+    print("\n비교 기준: {}".format(baseline_path))
+    for run in report["runs"]:
+        before = baseline.get(run["concurrency"])
+        if before is None:
+            continue
+        print("[동시 세션 {0}] 처리량 {1:.2f} → {2:.2f}턴/초".format(
+            run["concurrency"], before["turns_per_sec"], run["turns_per_sec"]))
+        for stage, row in run["stages"].items():
+            old = before["stages"].get(stage, {})
+            if not row.get("count") or not old.get("count"):
+                continue
+            print("  {0:<22} p50 {1:>8.1f} → {2:>8.1f}ms ({3:+.0%})   p95 {4:>8.1f} → {5:>8.1f}ms ({6:+.0%})".format(
+                stage, old["p50_ms"], row["p50_ms"], row["p50_ms"] / old["p50_ms"] - 1 if old["p50_ms"] else 0.0,
+                old["p95_ms"], row["p95_ms"], row["p95_ms"] / old["p95_ms"] - 1 if old["p95_ms"] else 0.0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="챗봇/프로필 경로 종단 간 지연 시간 벤치마크")
+    parser.add_argument("--pipeline", choices=["sync", "async"], default="sync", help="ask_card_rag 또는 ask_card_rag_async")
+    parser.add_argument("--concurrency", default="1,4,16", help="동시 세션 수 목록 (쉼표 구분)")
+    parser.add_argument("--sessions", type=int, default=None, help="동시 세션 수마다 실행할 세션 수 (기본: 동시 세션 수 × 4)")
+    parser.add_argument("--turns", type=int, default=3, help="세션당 질문 수")
+    parser.add_argument("--questions", default=QUESTIONS_PATH, help="한 줄에 한 질문씩 담긴 파일")
+    parser.add_argument("--users", default=USERS_PATH, help="한 줄에 한 사용자 ID (seed_mysql.py 가 생성)")
+    parser.add_argument("--with-history", action="store_true", help="세션 안에서 이전 대화를 프롬프트에 포함")
+    parser.add_argument("--with-caches", action="store_true", help="답변/질문 임베딩/추천 조회 캐시를 켠 채로 측정")
+    parser.add_argument("--openai-base-url", default=None, help="이미 실행 중인 OpenAI 대역 서버 주소 (기본: 내장 서버 실행)")
+    parser.add_argument("--first-token-ms", type=float, default=300, help="내장 OpenAI 대역 서버의 첫 토큰 지연")
+    parser.add_argument("--token-delay-ms", type=float, default=20, help="내장 OpenAI 대역 서버의 토큰 간 지연")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="결과 JSON 경로 (기본: benchmarks/results/e2e_<시각>.json)")
+    parser.add_argument("--compare", default=None, help="비교할 이전 결과 JSON")
+    args = parser.parse_args()
+
+    with open(args.questions, encoding="utf-8") as f:
+        questions = [line.strip() for line in f if line.strip()]
+    if not os.path.exists(args.users):
+        raise SystemExit("사용자 ID 목록이 없습니다. benchmarks/seed_mysql.py 를 먼저 실행해주세요.")
+    with open(args.users, encoding="utf-8") as f:
+        users = [line.strip() for line in f if line.strip()]
+
+    server, base_url, bench = configure_environment(args)
+    print("OpenAI: {0}, MySQL: {1}:{2}/{3}, 질문 {4}개, 사용자 {5}명".format(
+        base_url, bench["host"], bench["port"], bench["database"], len(questions), len(users)))
+
+    started = time.perf_counter()
+    recorder = StageRecorder()
+    modules = instrument(recorder)
+    # 모델/검색 인덱스/카탈로그 로드는 측정에서 제외 (콜드 스타트 시간으로 따로 기록)
+    try:
+        run_session_sync(modules, recorder, users[0], questions[:1], args)
+    except Exception:
+        traceback.print_exc()
+    cold_start = time.perf_counter() - started
+    print("콜드 스타트(첫 세션): {0:.1f}초, RSS {1:.0f}MB".format(cold_start, peak_rss_mb()))
+
+    runs = []
+    for level, concurrency in enumerate(int(value) for value in args.concurrency.split(",")):
+        sessions = build_sessions(users, questions, args.sessions or concurrency * 4, args.turns, args.seed + level)
+        result = run_level(modules, recorder, sessions, concurrency, args)
+        print_level(result)
+        runs.append(result)
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "pipeline": args.pipeline, "turns": args.turns, "with_history": args.with_history,
+            "with_caches": args.with_caches, "first_token_ms": args.first_token_ms,
+            "token_delay_ms": args.token_delay_ms, "openai_base_url": base_url,
+            "mysql_database": bench["database"], "questions": len(questions), "users": len(users),
+            "embedding_backend": os.getenv("EMBEDDING_BACKEND", "torch"),
+            "retriever_backend": os.getenv("RETRIEVER_BACKEND", "chroma")
+        },
+        "cold_start_seconds": cold_start,
+        "peak_rss_mb": peak_rss_mb(),
+        "runs": runs
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, "e2e_{}.json".format(time.strftime("%Y%m%d_%H%M%S")))
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print("\n✅ 결과 저장: {}".format(output))
+
+    if args.compare:
+        print_comparison(report, args.compare)
+    if server is not None:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
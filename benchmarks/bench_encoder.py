@@ -0,0 +1,110 @@
+# 📁 benchmarks/bench_encoder.py
+# KR-SBERT 인코더 백엔드 비교: torch vs ONNX Runtime (fp32 / int8)
+# - 배치 처리량 (문장/초) : insert_embeddings.py 임베딩 갱신 시간
+# - 단일 문장 지연 시간 (p50/p99) : 챗봇 질문 임베딩 시간
+# - torch 대비 코사인 유사도 / top-k 이웃 일치도
+#
+# 사용법:
+#   python src/models/encoder.py export                     # ONNX 모델이 먼저 있어야 함
+#   python benchmarks/bench_encoder.py --limit 2000 --threads 4
+#   python benchmarks/bench_encoder.py --questions benchmarks/questions.txt --output encoder.json
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+# src 패키지(db, llm, models ...) 를 import 할 수 있도록 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from models.encoder import OnnxEncoder, compare_embeddings, find_onnx_path, load_corpus, load_torch_encoder, read_meta
+
+
+def percentile(values, q):
+    return float(np.percentile(np.asarray(values) * 1000.0, q))
+
+
+def measure(encoder, texts, questions, batch_size):
+    # 첫 호출(워밍업)은 측정에서 제외
+    encoder.encode(texts[:batch_size], batch_size=batch_size)
+
+    started = time.perf_counter()
+    embeddings = encoder.encode(texts, batch_size=batch_size)
+    batch_seconds = time.perf_counter() - started
+
+    latencies = []
+    for question in questions:
+        started = time.perf_counter()
+        encoder.encode(question)
+        latencies.append(time.perf_counter() - started)
+
+    return np.asarray(embeddings, dtype=np.float32), {
+        "batch_seconds": batch_seconds,
+        "sentences_per_sec": len(texts) / batch_seconds if batch_seconds else 0.0,
+        "query_p50_ms": percentile(latencies, 50),
+        "query_p99_ms": percentile(latencies, 99)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="인코더 백엔드 처리량/지연 시간/정확도 비교")
+    parser.add_argument("--onnx-path", default=None)
+    parser.add_argument("--limit", type=int, default=None, help="사용할 혜택 문장 수 (기본: 전체)")
+    parser.add_argument("--questions", default=None, help="한 줄에 한 질문씩 담긴 파일 (없으면 혜택 문장 일부 사용)")
+    parser.add_argument("--queries", type=int, default=200, help="단일 문장 지연 시간 측정 횟수")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=None, help="torch / ONNX Runtime 스레드 수")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    texts = load_corpus(args.limit)
+    if args.questions:
+        with open(args.questions, encoding="utf-8") as f:
+            questions = [line.strip() for line in f if line.strip()]
+    else:
+        questions = texts[:args.queries]
+    print("혜택 문장 {0}개, 질문 {1}개".format(len(texts), len(questions)))
+
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+
+    encoders = {"torch": load_torch_encoder}
+    onnx_path = find_onnx_path(args.onnx_path)
+    if onnx_path is None:
+        print("⚠️ 경고: ONNX 모델이 없어 torch 만 측정합니다. encoder.py export 를 먼저 실행해주세요.")
+    else:
+        for variant in read_meta(onnx_path)["files"]:
+            encoders["onnx-" + variant] = lambda variant=variant: OnnxEncoder(onnx_path, variant=variant, threads=args.threads)
+
+    report, reference = {}, None
+    for name, load in encoders.items():
+        started = time.perf_counter()
+        encoder = load()
+        load_seconds = time.perf_counter() - started
+        embeddings, row = measure(encoder, texts, questions, args.batch_size)
+        row["load_seconds"] = load_seconds
+        if reference is None:
+            reference = embeddings
+        row.update(compare_embeddings(reference, embeddings))
+        report[name] = row
+        del encoder
+
+    print("\n{0:<11} {1:>10} {2:>9} {3:>9} {4:>9} {5:>9} {6:>8}".format(
+        "backend", "문장/초", "p50(ms)", "p99(ms)", "cos 평균", "cos 최소", "top-k"))
+    for name, row in report.items():
+        print("{0:<11} {1:>10.1f} {2:>9.2f} {3:>9.2f} {4:>9.4f} {5:>9.4f} {6:>8.3f}".format(
+            name, row["sentences_per_sec"], row["query_p50_ms"], row["query_p99_ms"],
+            row["mean_cosine"], row["min_cosine"], row["top_k_overlap"]))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"texts": len(texts), "questions": len(questions), "batch_size": args.batch_size,
+                       "threads": args.threads, "results": report}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
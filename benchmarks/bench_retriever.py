@@ -0,0 +1,119 @@
+# 📁 benchmarks/bench_retriever.py
+# Chroma vs FAISS(flat / hnsw) 검색 지연 시간(p50/p99)과 recall@k 비교
+#
+# 사용법:
+#   python benchmarks/bench_retriever.py --queries 500 --top-k 5
+#   python benchmarks/bench_retriever.py --questions benchmarks/questions.txt   # 실제 질문으로 측정 (모델 로드)
+#
+# 정답(ground truth)은 전체 벡터에 대한 정확한 코사인 유사도 top-k 이며,
+# Chroma 결과와의 겹침 비율(vs chroma)도 함께 출력합니다.
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# src 패키지(db, llm, models ...) 를 import 할 수 있도록 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from models.retriever import ChromaRetriever, FaissRetriever, normalize_rows
+
+
+def percentile(values, q):
+    return float(np.percentile(np.asarray(values) * 1000.0, q))
+
+
+def make_queries(embeddings, n_queries, noise, seed=0):
+    """저장된 혜택 벡터에 잡음을 더해 질문 벡터를 흉내냅니다."""
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(embeddings), size=n_queries)
+    base = normalize_rows(embeddings[picks])
+    return base + rng.normal(scale=noise, size=base.shape).astype(np.float32)
+
+
+def run_backend(retriever, queries, top_k):
+    latencies, results = [], []
+    # 첫 호출(워밍업)은 측정에서 제외
+    retriever.query(queries[0], top_k)
+    for query in queries:
+        started = time.perf_counter()
+        _, metadatas, _ = retriever.query(query, top_k)
+        latencies.append(time.perf_counter() - started)
+        results.append([meta.get("card_id") for meta in metadatas])
+    return latencies, results
+
+
+def recall(results, truth):
+    hits = sum(len(set(r) & set(t)) for r, t in zip(results, truth))
+    total = sum(len(t) for t in truth)
+    return hits / total if total else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="검색 백엔드 지연 시간/recall 비교")
+    parser.add_argument("--chroma-path", default=None)
+    parser.add_argument("--queries", type=int, default=500, help="합성 질문 벡터 수")
+    parser.add_argument("--noise", type=float, default=0.05, help="합성 질문 벡터 잡음 크기")
+    parser.add_argument("--questions", default=None, help="한 줄에 한 질문씩 담긴 파일 (지정 시 실제 질문 사용)")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    chroma = ChromaRetriever.open(args.chroma_path)
+    if chroma is None:
+        raise SystemExit(1)
+    ids, embeddings, documents, metadatas = chroma.get_all()
+    print("벡터 {0}개, 차원 {1}".format(len(ids), embeddings.shape[1]))
+
+    if args.questions:
+        from sentence_transformers import SentenceTransformer
+
+        with open(args.questions, encoding="utf-8") as f:
+            questions = [line.strip() for line in f if line.strip()]
+        model = SentenceTransformer("snunlp/KR-SBERT-V40K-klueNLI-augSTS")
+        queries = model.encode(questions, batch_size=64, convert_to_numpy=True).astype(np.float32)
+    else:
+        queries = make_queries(embeddings, args.queries, args.noise)
+
+    # 정확한 코사인 top-k (정답)
+    card_ids = [meta.get("card_id") for meta in metadatas]
+    similarities = normalize_rows(queries) @ normalize_rows(embeddings).T
+    truth_rows = np.argsort(-similarities, axis=1)[:, :args.top_k]
+    truth = [[card_ids[row] for row in rows] for rows in truth_rows]
+
+    backends = {"chroma": chroma}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for kind in ("flat", "hnsw"):
+            path = os.path.join(tmp_dir, kind)
+            FaissRetriever.build(ids, embeddings, documents, metadatas, kind=kind).save(path)
+            backends["faiss-" + kind] = FaissRetriever.load(path)  # 실제 서비스처럼 디스크에서 mmap 로드
+
+        report = {}
+        chroma_results = None
+        for name, retriever in backends.items():
+            latencies, results = run_backend(retriever, queries, args.top_k)
+            if name == "chroma":
+                chroma_results = results
+            report[name] = {
+                "p50_ms": percentile(latencies, 50),
+                "p99_ms": percentile(latencies, 99),
+                "recall_at_k": recall(results, truth),
+                "overlap_with_chroma": recall(results, chroma_results)
+            }
+
+    print("\n{0:<12} {1:>9} {2:>9} {3:>10} {4:>12}".format("backend", "p50(ms)", "p99(ms)", "recall@k", "vs chroma"))
+    for name, row in report.items():
+        print("{0:<12} {1:>9.3f} {2:>9.3f} {3:>10.3f} {4:>12.3f}".format(
+            name, row["p50_ms"], row["p99_ms"], row["recall_at_k"], row["overlap_with_chroma"]))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"top_k": args.top_k, "queries": len(queries), "results": report}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
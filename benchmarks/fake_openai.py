@@ -0,0 +1,159 @@
+# 📁 benchmarks/fake_openai.py
+# 벤치마크용 OpenAI Chat Completions 대역 서버
+# POST .../chat/completions 에 대해 정해진 답변을 돌려주며, stream=True 이면 SSE 로 토큰을 나누어 보냅니다.
+# 첫 토큰 지연(--first-token-ms)과 토큰 간 지연(--token-delay-ms)으로 gpt-4o 의 응답 속도를 흉내냅니다.
+# 답변에는 프롬프트의 "카드명: ..." 을 그대로 넣어 이전 대화 압축 등 뒷단계도 실제와 같은 형태로 동작합니다.
+# response_format 이 있으면 (STRUCTURED_OUTPUT=1) 프롬프트의 "카드 ID: ..." 로 CardAnswer JSON 을 돌려줍니다.
+#
+# 사용법:
+#   python benchmarks/fake_openai.py --port 8900 --token-delay-ms 20
+#   OPENAI_BASE_URL=http://127.0.0.1:8900/v1 OPENAI_API_KEY=bench streamlit run src/app.py
+
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_CARD_NAME = re.compile(r"카드명:\s*([^\n]+)")
+_CARD_ID = re.compile(r"카드 ID:\s*([^\n]+)")
+_TOKEN = re.compile(r"\S+\s*|\s+")
+
+
+def canned_answer(messages, n_cards=3):
+    prompt = "\n".join(str(message.get("content", "")) for message in messages)
+    names = list(dict.fromkeys(name.strip() for name in _CARD_NAME.findall(prompt)))[:n_cards]
+    if not names:
+        return "고객님의 소비 패턴에 맞는 카드 혜택을 정리해 드렸습니다. 주요 가맹점 할인과 적립 혜택을 비교해 보세요."
+    lines = []
+    for rank, name in enumerate(names, start=1):
+        lines.append(
+            "{0}. 카드명: {1}\n   - 추천 이유: 질문하신 업종에서 할인/적립 혜택이 크고 전월 실적 조건이 무난합니다.\n"
+            "   - 주요 혜택: 생활 업종 할인, 간편결제 적립, 무이자 할부".format(rank, name)
+        )
+    return "\n\n".join(lines)
+
+
+def canned_json_answer(messages, n_cards=3):
+    prompt = "\n".join(str(message.get("content", "")) for message in messages)
+    card_ids = list(dict.fromkeys(card_id.strip() for card_id in _CARD_ID.findall(prompt)))[:n_cards]
+    return json.dumps({
+        "intro": "질문하신 업종 기준으로 혜택이 큰 카드를 정리했습니다." if card_ids else "",
+        "cards": [{
+            "card_id": card_id,
+            "benefits": ["생활 업종 할인", "간편결제 적립", "무이자 할부"],
+            "reason": "질문하신 업종에서 할인/적립 혜택이 크고 전월 실적 조건이 무난합니다."
+        } for card_id in card_ids]
+    }, ensure_ascii=False)
+
+
+def split_tokens(text):
+    """공백을 포함한 어절 단위로 나눔 (gpt-4o 한국어 토큰 1~2개 정도 크기)"""
+    return _TOKEN.findall(text)
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    first_token_delay = 0.3
+    token_delay = 0.02
+    requests_served = 0
+    _lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found: " + self.path}})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        with FakeOpenAIHandler._lock:
+            FakeOpenAIHandler.requests_served += 1
+
+        model = request.get("model", "gpt-4o")
+        if request.get("response_format"):
+            answer = canned_json_answer(request.get("messages", []))
+        else:
+            answer = canned_answer(request.get("messages", []))
+        completion_id = "chatcmpl-" + uuid.uuid4().hex[:24]
+        created = int(time.time())
+        time.sleep(self.first_token_delay)
+
+        if not request.get("stream"):
+            time.sleep(self.token_delay * max(len(split_tokens(answer)) - 1, 0))
+            self._send_json(200, {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(split_tokens(answer)), "total_tokens": 0}
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        def send(delta, finish_reason=None):
+            chunk = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            }
+            self.wfile.write("data: {}\n\n".format(json.dumps(chunk, ensure_ascii=False)).encode("utf-8"))
+            self.wfile.flush()
+
+        try:
+            for i, token in enumerate(split_tokens(answer)):
+                if i:
+                    time.sleep(self.token_delay)
+                send({"role": "assistant", "content": token} if i == 0 else {"content": token})
+            send({}, "stop")
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # 클라이언트가 스트림을 중간에 닫음
+        self.close_connection = True
+
+
+def start_server(host="127.0.0.1", port=0, first_token_ms=300, token_delay_ms=20):
+    """백그라운드 스레드에서 서버를 띄우고 (server, base_url) 을 반환합니다. port=0 이면 빈 포트 사용."""
+    handler = type("Handler", (FakeOpenAIHandler,), {
+        "first_token_delay": first_token_ms / 1000.0,
+        "token_delay": token_delay_ms / 1000.0
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-openai", daemon=True).start()
+    return server, "http://{0}:{1}/v1".format(host, server.server_address[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벤치마크용 OpenAI 대역 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--first-token-ms", type=float, default=300, help="요청부터 첫 토큰까지 지연")
+    parser.add_argument("--token-delay-ms", type=float, default=20, help="토큰 사이 지연")
+    args = parser.parse_args()
+
+    server, base_url = start_server(args.host, args.port, args.first_token_ms, args.token_delay_ms)
+    print("✅ OpenAI 대역 서버 실행 중: OPENAI_BASE_URL={}".format(base_url))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# 📁 benchmarks/seed_mysql.py
+# 벤치마크용 MySQL 데이터베이스 시드
+# 운영 DB(MYSQL_*)에서 카드 테이블 전체와 사용자 N 명분의 행을 벤치마크 DB(BENCH_MYSQL_*)로 복사합니다.
+# 테이블 정의는 SHOW CREATE TABLE 을 그대로 사용하므로 인덱스/PK 가 운영과 같고,
+# 복사한 사용자 ID 목록은 bench_e2e.py 가 재생할 수 있도록 파일로 저장합니다.
+#
+# 사용법:
+#   BENCH_MYSQL_HOST=127.0.0.1 BENCH_MYSQL_DATABASE=card_rag_bench python benchmarks/seed_mysql.py --users 2000
+
+import argparse
+import os
+import sys
+
+import pymysql
+
+# src 패키지(db, llm ...) 를 import 할 수 있도록 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from db.pool import get_connection_params
+
+USERS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "bench_users.txt")
+
+# 전체를 복사하는 테이블 (카드 정보, 광고 문구 캐시)
+SHARED_TABLES = ["cards", "card_info", "marketing_copy_cache"]
+
+# 사용자 컬럼 기준으로 시드 사용자 행만 복사하는 테이블
+USER_TABLES = {
+    "user_transactions": "SEQ",
+    "user_profile_summaries": "SEQ",
+    "recommended_cards": "seq",
+    "user_recommendations_hybrid": "user_id",
+}
+
+
+def get_bench_params() -> dict:
+    """BENCH_MYSQL_* 가 없으면 로컬 서버 + 운영 계정 + card_rag_bench 데이터베이스"""
+    source = get_connection_params()
+    return dict(
+        host=os.getenv("BENCH_MYSQL_HOST", "127.0.0.1"),
+        port=int(os.getenv("BENCH_MYSQL_PORT", "3306")),
+        user=os.getenv("BENCH_MYSQL_USER", source["user"]),
+        password=os.getenv("BENCH_MYSQL_PASSWORD", source["password"]),
+        database=os.getenv("BENCH_MYSQL_DATABASE", "card_rag_bench"),
+        charset="utf8mb4"
+    )
+
+
+def _table_exists(cursor, table):
+    cursor.execute("SHOW TABLES LIKE %s", (table,))
+    return cursor.fetchone() is not None
+
+
+def sample_users(source, n_users):
+    """SEQ 해시 순으로 n 명 (매번 같은 사용자, 특정 SEQ 구간에 치우치지 않음)"""
+    cursor = source.cursor()
+    cursor.execute("SELECT SEQ FROM user_transactions ORDER BY CRC32(SEQ), SEQ LIMIT %s", (n_users,))
+    seqs = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    return seqs
+
+
+def copy_table(source, target, table, where_column=None, values=None, chunk_size=5000):
+    src_cursor, dst_cursor = source.cursor(), target.cursor()
+    if not _table_exists(src_cursor, table):
+        print("⚠️ 원본에 {} 테이블이 없어 건너뜁니다.".format(table))
+        return 0
+
+    src_cursor.execute("SHOW CREATE TABLE `{}`".format(table))
+    create_sql = src_cursor.fetchone()[1]
+    dst_cursor.execute("DROP TABLE IF EXISTS `{}`".format(table))
+    dst_cursor.execute(create_sql)
+
+    if where_column is None:
+        batches = [None]
+    else:
+        values = list(values)
+        batches = [values[start:start + chunk_size] for start in range(0, len(values), chunk_size)]
+
+    total = 0
+    for batch in batches:
+        if batch is None:
+            src_cursor.execute("SELECT * FROM `{}`".format(table))
+        else:
+            placeholders = ", ".join(["%s"] * len(batch))
+            src_cursor.execute("SELECT * FROM `{0}` WHERE `{1}` IN ({2})".format(table, where_column, placeholders), tuple(batch))
+        columns = [col[0] for col in src_cursor.description]
+        insert_sql = "INSERT INTO `{0}` ({1}) VALUES ({2})".format(
+            table, ", ".join("`{}`".format(col) for col in columns), ", ".join(["%s"] * len(columns)))
+        while True:
+            rows = src_cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            dst_cursor.executemany(insert_sql, rows)
+            total += len(rows)
+        target.commit()
+
+    src_cursor.close()
+    dst_cursor.close()
+    print("✅ {0}: {1:,}행 복사".format(table, total))
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벤치마크용 MySQL 데이터베이스 시드")
+    parser.add_argument("--users", type=int, default=2000, help="복사할 사용자 수")
+    parser.add_argument("--users-path", default=USERS_PATH, help="시드한 사용자 ID 목록 저장 경로")
+    args = parser.parse_args()
+
+    bench = get_bench_params()
+    source_params = get_connection_params()
+    if (bench["host"], bench["port"], bench["database"]) == (source_params["host"], source_params["port"], source_params["database"]):
+        raise SystemExit("벤치마크 DB 가 운영 DB 와 같습니다. BENCH_MYSQL_DATABASE 를 확인해주세요.")
+
+    source = pymysql.connect(**source_params)
+    server = pymysql.connect(**{key: value for key, value in bench.items() if key != "database"})
+    with server.cursor() as cursor:
+        cursor.execute("CREATE DATABASE IF NOT EXISTS `{}` CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci".format(bench["database"]))
+    server.close()
+    target = pymysql.connect(**bench)
+
+    seqs = sample_users(source, args.users)
+    print("사용자 {0:,}명 → {1}:{2}/{3}".format(len(seqs), bench["host"], bench["port"], bench["database"]))
+
+    for table in SHARED_TABLES:
+        copy_table(source, target, table)
+    for table, column in USER_TABLES.items():
+        copy_table(source, target, table, column, seqs)
+
+    os.makedirs(os.path.dirname(args.users_path), exist_ok=True)
+    with open(args.users_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(str(seq) for seq in seqs) + "\n")
+    print("✅ 사용자 ID 목록 저장: {}".format(args.users_path))
+
+    source.close()
+    target.close()
+
+
+if __name__ == "__main__":
+    main()
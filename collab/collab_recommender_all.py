@@ -1,83 +1,67 @@
-import pymysql
+import argparse
 import os
+import sys
 from dotenv import load_dotenv
-from collections import Counter
 
-load_dotenv()
+# src 패키지(db, llm ...) 를 import 할 수 있도록 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
 
-conn = pymysql.connect(
-    host=os.getenv("MYSQL_HOST"),
-    port=int(os.getenv("MYSQL_PORT")),
-    user=os.getenv("MYSQL_USER"),
-    password=os.getenv("MYSQL_PASSWORD"),
-    database=os.getenv("MYSQL_DATABASE"),
-    charset="utf8mb4"
-)
-cursor = conn.cursor()
+from db.pool import get_pool
+from db.card_catalog import get_catalog
+from recommender.collaborative import init_worker, score_shard, save_recommendations
+from recommender.sharding import run_sharded, finish_job, iter_shard_rows, add_shard_arguments
 
-# 테이블 생성
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS collab_recommendations (
-    id INT AUTO_INCREMENT PRIMARY KEY,
-    seq VARCHAR(50),
-    recommended_card_code VARCHAR(10),
-    score INT,
-    source VARCHAR(20),
-    card_name VARCHAR(255)
-)
-""")
+load_dotenv()
 
-# 모든 고객 seq 불러오기
-cursor.execute("SELECT DISTINCT seq FROM recommended_cards")
-all_seqs = [row[0] for row in cursor.fetchall()]
+JOB_NAME = "collab_recommendations"
 
-def parse_card_code(card_code):
-    if card_code.startswith("C"):
-        return int(card_code[1:])
-    elif card_code.startswith("R"):
-        return int(card_code[1:]) + 1000
-    return None
 
-for target_seq in all_seqs:
-    cursor.execute("SELECT card_code FROM recommended_cards WHERE seq = %s", (target_seq,))
-    my_cards = [row[0] for row in cursor.fetchall()]
+def main():
+    args = add_shard_arguments(argparse.ArgumentParser(description="전체 고객 협업 필터링 추천")).parse_args()
 
-    if not my_cards:
-        continue
+    # 공용 커넥션 풀에서 배치 작업용 커넥션 하나를 빌려 사용
+    pool = get_pool()
+    conn = pool.acquire()
+    try:
+        cursor = conn.cursor()
 
-    placeholders = ', '.join(['%s'] * len(my_cards))
-    cursor.execute(f"""
-        SELECT DISTINCT seq FROM recommended_cards
-        WHERE card_code IN ({placeholders}) AND seq != %s
-    """, (*my_cards, target_seq))
-    similar_users = [row[0] for row in cursor.fetchall()]
+        # 테이블 생성
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS collab_recommendations (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            seq VARCHAR(50),
+            recommended_card_code VARCHAR(10),
+            score INT,
+            source VARCHAR(20),
+            card_name VARCHAR(255),
+            INDEX idx_collab_seq (seq)
+        )
+        """)
 
-    if similar_users:
-        placeholders = ', '.join(['%s'] * len(similar_users))
-        cursor.execute(f"""
-            SELECT card_code FROM recommended_cards
-            WHERE seq IN ({placeholders})
-        """, tuple(similar_users))
-        other_cards = [row[0] for row in cursor.fetchall()]
-    else:
-        other_cards = []
+        # 모든 고객 seq 불러오기
+        cursor.execute("SELECT DISTINCT seq FROM recommended_cards")
+        all_seqs = [row[0] for row in cursor.fetchall()]
+        cursor.close()
 
-    final_candidates = [card for card in other_cards if card not in my_cards]
-    top_cards = Counter(final_candidates).most_common(3)
+        # SEQ 구간별로 워커 프로세스에서 희소 행렬 연산으로 상위 3개 카드 계산
+        shards, failed = run_sharded(
+            JOB_NAME, score_shard, all_seqs,
+            n_workers=args.workers, n_shards=args.shards, only=args.retry_shard, fresh=args.fresh,
+            resume=args.resume, params={"top_n": 3},
+            initializer=init_worker, initargs=(3,)
+        )
+        if failed:
+            print("⚠️ 실패한 샤드가 있어 저장하지 않았습니다: {}".format(failed))
+            sys.exit(1)
 
-    cursor.execute("DELETE FROM collab_recommendations WHERE seq = %s", (target_seq,))
-    for card, score in top_cards:
-        card_id = parse_card_code(card)
-        cursor.execute("SELECT card_name FROM cards WHERE card_id = %s", (card_id,))
-        result = cursor.fetchone()
-        card_name = result[0] if result else None
+        # 모든 샤드 결과를 한 번에 저장
+        total = save_recommendations(conn, iter_shard_rows(JOB_NAME, shards), get_catalog())
+    finally:
+        pool.release(conn)
+    # 저장이 끝난 체크포인트는 삭제 (다음 정기 실행이 이전 결과를 다시 저장하지 않도록)
+    finish_job(JOB_NAME)
+    print("✅ 모든 고객 대상 협업 필터링 추천 완료 ({:,}건)".format(total))
 
-        cursor.execute(
-            "INSERT INTO collab_recommendations (seq, recommended_card_code, score, source, card_name) VALUES (%s, %s, %s, %s, %s)",
-            (target_seq, card, score, "collaborative", card_name)
-        )
 
-conn.commit()
-cursor.close()
-conn.close()
-print("✅ 모든 고객 대상 협업 필터링 추천 완료")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
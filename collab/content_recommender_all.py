@@ -1,119 +1,78 @@
-import pandas as pd
-from sentence_transformers import SentenceTransformer
-import chromadb
-
-# Step-by-step instructions:
-# 1. Delete or rename the existing `./chroma_db` directory
-# 2. Re-run this script to re-insert all embeddings
-# 3. Re-run `content_recommender.py` to apply updated content-based recommendations
-
-chroma_client = chromadb.PersistentClient(path="./chroma_db")
-
-model = SentenceTransformer('all-MiniLM-L6-v2')
-
-df = pd.read_csv('../data/benefits.csv')
-
-collection = chroma_client.get_or_create_collection(name="card_benefits")
-
-total_rows = len(df)
-progress_step = max(1, total_rows // 20)
-
-for i, row in df.iterrows():
-    if pd.isna(row['card_id']) or pd.isna(row['benefit_text']):
-        continue  # skip invalid rows
-    if i % progress_step == 0:
-        print(f"진행 중: {i}/{total_rows}개 문서 임베딩 중... ({i/total_rows*100:.1f}%)")
-    embedding = model.encode(row['benefit_text']).tolist()
-    collection.add(
-        documents=[row['benefit_text']],
-        embeddings=[embedding],
-        metadatas=[{
-            "card_id": int(row['card_id']),
-            "card_name": str(row['card_name']) if not pd.isna(row.get('card_name', None)) else ""
-        }],
-        ids=[f"benefit_{i}"]
-    )
-
-# chroma_client.persist()
-
+import argparse
 import os
-import pymysql
-import numpy as np
-import pandas as pd
+import sys
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
-import chromadb
+
+# src 패키지(db, llm ...) 를 import 할 수 있도록 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from db.pool import get_pool
+from models.retriever import get_retriever
+from recommender.content import init_worker, score_shard, save_recommendations, run
+from recommender.sharding import run_sharded, finish_job, iter_shard_rows, completed_seqs, add_shard_arguments
 
 load_dotenv()
 
-chroma_client = chromadb.PersistentClient(path="./chroma_db")
-collection = chroma_client.get_or_create_collection("card_benefits")
-
-model = SentenceTransformer('all-MiniLM-L6-v2')
-
-conn = pymysql.connect(
-    host=os.getenv("MYSQL_HOST"),
-    port=int(os.getenv("MYSQL_PORT")),
-    user=os.getenv("MYSQL_USER"),
-    password=os.getenv("MYSQL_PASSWORD"),
-    database=os.getenv("MYSQL_DATABASE"),
-    charset="utf8mb4"
-)
-cursor = conn.cursor()
-
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS content_recommendations (
-    id INT AUTO_INCREMENT PRIMARY KEY,
-    seq VARCHAR(50),
-    recommended_card_id INT,
-    card_name VARCHAR(255),
-    score FLOAT
-)
-""")
-
-cursor.execute("SELECT DISTINCT seq FROM recommended_cards")
-all_seqs = [row[0] for row in cursor.fetchall()][:50]
-
-card_df = pd.read_sql("SELECT card_id, card_name FROM cards", conn)
-card_dict = dict(zip(card_df.card_id, card_df.card_name))
-
-insert_batch = []
-
-for seq in all_seqs:
-    cursor.execute("SELECT DISTINCT id FROM recommended_cards WHERE seq = %s", (seq,))
-    user_card_ids = [int(row[0]) for row in cursor.fetchall()]
-    if not user_card_ids:
-        continue
-
-    result = collection.get(where={"card_id": {"$in": user_card_ids}})
-    vectors = result.get("embeddings") or []
-    if not vectors:
-        continue
-
-    query_vector = np.mean(np.array(vectors), axis=0).tolist()
-    similar = collection.query(query_embeddings=[query_vector], n_results=10)
-
-    metadatas = similar["metadatas"][0]
-    scores = similar["distances"][0]
-
-    added = 0
-    for meta, score in zip(metadatas, scores):
-        card_id = int(meta["card_id"])
-        if card_id in user_card_ids:
-            continue
-        card_name = card_dict.get(card_id, "")
-        insert_batch.append((seq, card_id, card_name, score))
-        added += 1
-        if added == 3:
-            break
-
-if insert_batch:
-    cursor.executemany(
-        "INSERT INTO content_recommendations (seq, recommended_card_id, card_name, score) VALUES (%s, %s, %s, %s)",
-        insert_batch
-    )
-    conn.commit()
-
-cursor.close()
-conn.close()
-print("✅ 콘텐츠 기반 추천 완료")
+JOB_NAME = "content_recommendations"
+
+# 카드 혜택 임베딩은 챗봇과 같은 혜택 청크 컬렉션(card_benefit_chunks)을 사용합니다.
+# 임베딩 갱신: python3 src/models/insert_embeddings.py (변경된 혜택만 다시 임베딩)
+
+
+def main():
+    parser = add_shard_arguments(argparse.ArgumentParser(description="전체 고객 콘텐츠 기반 추천"))
+    parser.add_argument("--sharded", action="store_true", help="한 번에 계산하지 않고 SEQ 샤드별로 워커 프로세스에서 계산")
+    parser.add_argument("--batch-size", type=int, default=20000, help="한 번에 점수를 계산할 사용자 수")
+    args = parser.parse_args()
+
+    # 공용 커넥션 풀에서 배치 작업용 커넥션 하나를 빌려 사용
+    pool = get_pool()
+    conn = pool.acquire()
+    try:
+        cursor = conn.cursor()
+
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS content_recommendations (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            seq VARCHAR(50),
+            recommended_card_id INT,
+            card_name VARCHAR(255),
+            score FLOAT,
+            INDEX idx_content_seq (seq)
+        )
+        """)
+
+        cursor.close()
+
+        if not args.sharded:
+            # 전체 사용자를 한 프로세스에서 행렬 곱으로 한 번에 계산
+            total = run(conn, get_retriever(), top_n=3, batch_size=args.batch_size)
+            print("✅ 콘텐츠 기반 추천 완료 ({:,}건)".format(total))
+            return
+
+        cursor = conn.cursor()
+        cursor.execute("SELECT DISTINCT seq FROM recommended_cards")
+        all_seqs = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+
+        # SEQ 구간별로 워커 프로세스(각자 임베딩 행렬과 DB 커넥션 보유)에서 처리
+        shards, failed = run_sharded(
+            JOB_NAME, score_shard, all_seqs,
+            n_workers=args.workers, n_shards=args.shards, only=args.retry_shard, fresh=args.fresh,
+            resume=args.resume, params={"top_n": 3},
+            initializer=init_worker
+        )
+        if failed:
+            print("⚠️ 실패한 샤드가 있어 저장하지 않았습니다: {}".format(failed))
+            sys.exit(1)
+
+        total = save_recommendations(conn, iter_shard_rows(JOB_NAME, shards), completed_seqs(JOB_NAME, shards))
+    finally:
+        pool.release(conn)
+    # 저장이 끝난 체크포인트는 삭제 (다음 정기 실행이 이전 결과를 다시 저장하지 않도록)
+    finish_job(JOB_NAME)
+    print("✅ 콘텐츠 기반 추천 완료 ({:,}건)".format(total))
+
+
+if __name__ == "__main__":
+    main()
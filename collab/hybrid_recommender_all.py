@@ -0,0 +1,33 @@
+import argparse
+import os
+import sys
+from dotenv import load_dotenv
+
+# src 패키지(db, llm ...) 를 import 할 수 있도록 경로 추가
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from db.pool import get_pool
+from recommender.hybrid import parse_weights, run
+
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="클러스터/협업/콘텐츠 추천을 합쳐 user_recommendations_hybrid 생성")
+    parser.add_argument("--weights", default=None,
+                        help="예: cluster=0.5,collaborative=0.3,content=0.2 (기본: HYBRID_WEIGHTS 또는 위 값)")
+    parser.add_argument("--top-n", type=int, default=3, help="사용자별 추천 카드 수")
+    args = parser.parse_args()
+
+    # collab_recommender_all.py / content_recommender_all.py 를 먼저 실행해 두어야 합니다.
+    pool = get_pool()
+    conn = pool.acquire()
+    try:
+        total = run(conn, weights=parse_weights(args.weights), top_n=args.top_n)
+    finally:
+        pool.release(conn)
+    print("✅ 하이브리드 추천 완료 ({:,}건)".format(total))
+
+
+if __name__ == "__main__":
+    main()
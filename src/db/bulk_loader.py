@@ -0,0 +1,206 @@
+# 📁 db/bulk_loader.py
+# 마이그레이션 스크립트 공용 대용량 적재 엔진
+# - CSV 를 청크 단위로 스트리밍하여 LOAD DATA LOCAL INFILE 또는 다중 행 executemany 로 적재
+# - 설정한 행 수마다 커밋하고 체크포인트를 기록하여 실패 후 이어서 적재
+# - 보조 인덱스는 적재가 끝난 뒤 생성
+# - 진행 상황과 처리 속도(rows/sec) 출력
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import pandas as pd
+import pymysql
+
+from db.pool import get_connection_params
+
+DEFAULT_CHECKPOINT_DIR = "./.load_checkpoints"
+
+
+class BulkLoader:
+    def __init__(self, table, columns=None, mode="executemany", chunk_size=50000, batch_size=5000,
+                 commit_every=100000, checkpoint_dir=DEFAULT_CHECKPOINT_DIR, indexes=None, transform=None):
+        if mode not in ("executemany", "load_data"):
+            raise ValueError("mode 는 'executemany' 또는 'load_data' 여야 합니다: {}".format(mode))
+        self.table = table
+        self.columns = columns
+        self.mode = mode
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.commit_every = commit_every
+        self.checkpoint_path = os.path.join(checkpoint_dir, "{}.json".format(table)) if checkpoint_dir else None
+        # {인덱스명: [컬럼, ...]} - 적재 후 생성
+        self.indexes = indexes or {}
+        # 청크 DataFrame 을 받아 형 변환 등을 적용한 DataFrame 을 반환하는 함수
+        self.transform = transform
+
+    # ✅ 체크포인트
+    def _read_checkpoint(self, csv_path):
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return 0
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("csv_path") != os.path.abspath(csv_path) or checkpoint.get("table") != self.table:
+            return 0
+        return int(checkpoint.get("rows_done", 0))
+
+    def _write_checkpoint(self, csv_path, rows_done):
+        if not self.checkpoint_path:
+            return
+        os.makedirs(os.path.dirname(self.checkpoint_path), exist_ok=True)
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"csv_path": os.path.abspath(csv_path), "table": self.table, "rows_done": rows_done}, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def clear_checkpoint(self):
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    # ✅ 보조 인덱스 관리
+    def _existing_indexes(self, cursor):
+        cursor.execute(
+            "SELECT DISTINCT INDEX_NAME FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = %s",
+            (self.table,)
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+    def _drop_indexes(self, cursor):
+        existing = self._existing_indexes(cursor)
+        for name in self.indexes:
+            if name in existing:
+                cursor.execute("ALTER TABLE `{0}` DROP INDEX `{1}`".format(self.table, name))
+
+    def _create_indexes(self, cursor):
+        existing = self._existing_indexes(cursor)
+        for name, cols in self.indexes.items():
+            if name in existing:
+                continue
+            started = time.perf_counter()
+            col_sql = ", ".join("`{}`".format(col) for col in cols)
+            cursor.execute("ALTER TABLE `{0}` ADD INDEX `{1}` ({2})".format(self.table, name, col_sql))
+            print("[인덱스] {0}.{1} 생성 완료 ({2:.1f}초)".format(self.table, name, time.perf_counter() - started))
+
+    # ✅ 청크 적재
+    def _insert_chunk(self, cursor, chunk):
+        col_sql = ", ".join("`{}`".format(col) for col in chunk.columns)
+
+        if self.mode == "load_data":
+            with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, encoding="utf-8", newline="") as tmp:
+                chunk.to_csv(tmp, index=False, header=False, na_rep="NULL", lineterminator="\n")
+                tmp_path = tmp.name
+            try:
+                cursor.execute(
+                    "LOAD DATA LOCAL INFILE %s REPLACE INTO TABLE `{0}` CHARACTER SET utf8mb4 "
+                    "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+                    "LINES TERMINATED BY '\\n' ({1})".format(self.table, col_sql),
+                    (tmp_path,)
+                )
+            finally:
+                os.remove(tmp_path)
+            return
+
+        # pymysql 은 INSERT/REPLACE ... VALUES 형태의 executemany 를 다중 행 문장 하나로 묶어 전송
+        placeholders = ", ".join(["%s"] * len(chunk.columns))
+        sql = "REPLACE INTO `{0}` ({1}) VALUES ({2})".format(self.table, col_sql, placeholders)
+        values = chunk.astype(object).where(pd.notna(chunk), None)
+        rows = list(values.itertuples(index=False, name=None))
+        for start in range(0, len(rows), self.batch_size):
+            cursor.executemany(sql, rows[start:start + self.batch_size])
+
+    def load_csv(self, csv_path, fresh=False) -> dict:
+        if fresh:
+            self.clear_checkpoint()
+        rows_done = self._read_checkpoint(csv_path)
+        if rows_done:
+            print("[체크포인트] {0}행까지 적재된 기록이 있어 이어서 진행합니다.".format(rows_done))
+
+        conn = pymysql.connect(**get_connection_params(local_infile=self.mode == "load_data", autocommit=False))
+        cursor = conn.cursor()
+        cursor.execute("SET SESSION unique_checks = 0")
+        cursor.execute("SET SESSION foreign_key_checks = 0")
+
+        started = time.perf_counter()
+        loaded = 0
+        uncommitted = 0
+        try:
+            self._drop_indexes(cursor)
+
+            reader = pd.read_csv(
+                csv_path,
+                chunksize=self.chunk_size,
+                usecols=self.columns,
+                skiprows=range(1, rows_done + 1) if rows_done else None
+            )
+            for chunk in reader:
+                if self.transform is not None:
+                    chunk = self.transform(chunk)
+                if self.columns:
+                    chunk = chunk[self.columns]
+
+                self._insert_chunk(cursor, chunk)
+                loaded += len(chunk)
+                uncommitted += len(chunk)
+
+                if uncommitted >= self.commit_every:
+                    conn.commit()
+                    self._write_checkpoint(csv_path, rows_done + loaded)
+                    uncommitted = 0
+                    elapsed = time.perf_counter() - started
+                    print("[진행 상황] {0}: {1:,}행 적재 ({2:,.0f} rows/sec)".format(
+                        self.table, rows_done + loaded, loaded / elapsed if elapsed else 0.0))
+
+            conn.commit()
+            self._write_checkpoint(csv_path, rows_done + loaded)
+            self._create_indexes(cursor)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            print("❌ {0} 적재 실패: 마지막 커밋 지점부터 다시 실행하면 이어서 적재합니다.".format(self.table))
+            raise
+        finally:
+            try:
+                cursor.execute("SET SESSION unique_checks = 1")
+                cursor.execute("SET SESSION foreign_key_checks = 1")
+                cursor.close()
+            except pymysql.err.Error:
+                pass
+            conn.close()
+
+        # 전체 적재가 끝났으면 체크포인트 정리
+        self.clear_checkpoint()
+        elapsed = time.perf_counter() - started
+        stats = {
+            "table": self.table,
+            "rows": loaded,
+            "resumed_from": rows_done,
+            "seconds": elapsed,
+            "rows_per_sec": loaded / elapsed if elapsed else 0.0
+        }
+        print("✅ {0}: {1:,}행 적재 완료 ({2:.1f}초, {3:,.0f} rows/sec)".format(
+            self.table, loaded, elapsed, stats["rows_per_sec"]))
+        return stats
+
+
+# ✅ 마이그레이션 스크립트 공용 CLI 옵션
+def add_loader_arguments(parser: argparse.ArgumentParser, default_csv: str):
+    parser.add_argument("csv_path", nargs="?", default=default_csv, help="적재할 CSV 경로")
+    parser.add_argument("--mode", choices=["executemany", "load_data"], default="executemany",
+                        help="적재 방식 (load_data 는 서버의 local_infile 설정 필요)")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="CSV 를 읽어들이는 청크 크기")
+    parser.add_argument("--batch-size", type=int, default=5000, help="executemany 한 번에 보내는 행 수")
+    parser.add_argument("--commit-every", type=int, default=100000, help="커밋(및 체크포인트) 간격 행 수")
+    parser.add_argument("--fresh", action="store_true", help="체크포인트를 무시하고 처음부터 적재")
+    return parser
+
+
+def loader_kwargs_from_args(args) -> dict:
+    return dict(
+        mode=args.mode,
+        chunk_size=args.chunk_size,
+        batch_size=args.batch_size,
+        commit_every=args.commit_every
+    )
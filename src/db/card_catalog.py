@@ -0,0 +1,162 @@
+# 📁 db/card_catalog.py
+# 메모리 상주 카드 카탈로그
+# cards / card_info 테이블을 한 번 읽어 card_id, card_name, card_code 로 O(1) 조회합니다.
+# 일정 주기(CARD_CATALOG_TTL)마다 테이블 체크섬을 확인하여 바뀌었을 때만 다시 읽고,
+# bump_version() 을 호출하면 다음 조회 때 즉시 다시 읽습니다.
+
+import os
+import threading
+import time
+
+import pymysql
+
+from db.pool import get_connection
+
+CARD_TYPES = {"C": "체크카드", "R": "신용카드"}
+
+
+def parse_card_code(card_code):
+    """'C12' → ('체크카드', 12), 'R5' → ('신용카드', 1005)"""
+    card_code = str(card_code or "")
+    if card_code.startswith("C"):
+        return CARD_TYPES["C"], int(card_code[1:])
+    elif card_code.startswith("R"):
+        return CARD_TYPES["R"], int(card_code[1:]) + 1000
+    return None, None
+
+
+def card_id_from_code(card_code):
+    return parse_card_code(card_code)[1]
+
+
+def normalize_card_type(card_type, card_id=None):
+    """cards.card_type 표기('체크', 'CHECK', 'C' ...) → '체크카드' / '신용카드'. 비어 있으면 card_id 범위(1000 이상 신용)로 추정"""
+    text = str(card_type or "").strip()
+    upper = text.upper()
+    if "체크" in text or upper in ("C", "CHECK"):
+        return CARD_TYPES["C"]
+    if "신용" in text or upper in ("R", "CREDIT"):
+        return CARD_TYPES["R"]
+    if not text and card_id is not None:
+        return CARD_TYPES["R"] if int(card_id) >= 1000 else CARD_TYPES["C"]
+    return text or None
+
+
+class CardCatalog:
+    def __init__(self, cards, card_info_columns=None, card_info_rows=None, version=None):
+        self.version = version
+        self.loaded_at = time.monotonic()
+
+        # cards: [{"card_id", "card_name", "company", "image_url", "card_type"}, ...]
+        self._by_id = {card["card_id"]: card for card in cards}
+        self._by_name = {}
+        for card in cards:
+            self._by_name.setdefault(card["card_name"], card)
+
+        # card_info: 8번째 컬럼 이후가 혜택 열
+        self.card_info_columns = list(card_info_columns or [])
+        self.benefit_columns = self.card_info_columns[8:]
+        self._card_info_by_name = {}
+        for row in card_info_rows or []:
+            info = dict(zip(self.card_info_columns, row))
+            self._card_info_by_name.setdefault(info.get("Card Name"), info)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def get(self, card_id):
+        return self._by_id.get(card_id)
+
+    def by_name(self, card_name):
+        return self._by_name.get(card_name)
+
+    def by_code(self, card_code):
+        return self._by_id.get(card_id_from_code(card_code))
+
+    def card_name(self, card_id, default=None):
+        card = self._by_id.get(card_id)
+        return card["card_name"] if card else default
+
+    def card_names(self) -> dict:
+        return {card_id: card["card_name"] for card_id, card in self._by_id.items()}
+
+    def card_info(self, card_name):
+        """card_info 테이블의 한 행을 {컬럼: 값} 으로 반환합니다."""
+        return self._card_info_by_name.get(card_name)
+
+    def card_info_names(self):
+        return list(self._card_info_by_name)
+
+    def companies(self):
+        return sorted({card["company"] for card in self._by_id.values() if card.get("company")})
+
+
+# ✅ 카탈로그 로드 및 버전 확인
+def _table_version(cursor):
+    try:
+        cursor.execute("CHECKSUM TABLE cards, card_info")
+        return tuple((row[0], row[1]) for row in cursor.fetchall())
+    except pymysql.err.Error:
+        return None
+
+
+def load_catalog(conn) -> CardCatalog:
+    cursor = conn.cursor()
+    version = _table_version(cursor)
+
+    cursor.execute("SELECT card_id, card_name, company, image_url, card_type FROM cards")
+    cards = [
+        {"card_id": row[0], "card_name": row[1], "company": row[2], "image_url": row[3], "card_type": row[4]}
+        for row in cursor.fetchall()
+    ]
+
+    columns, rows = [], []
+    try:
+        cursor.execute("SELECT * FROM card_info")
+        columns = [col[0] for col in cursor.description]
+        rows = cursor.fetchall()
+    except pymysql.err.ProgrammingError:
+        # card_info 테이블이 없는 환경(배치 서버 등)에서는 cards 만 사용
+        pass
+    cursor.close()
+
+    return CardCatalog(cards, columns, rows, version=version)
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+_checked_at = 0.0
+_force_reload = False
+
+
+def bump_version():
+    """카드 정보가 갱신되었음을 알려 다음 조회 때 카탈로그를 다시 읽게 합니다."""
+    global _force_reload
+    _force_reload = True
+
+
+def get_catalog() -> CardCatalog:
+    global _catalog, _checked_at, _force_reload
+    ttl = float(os.getenv("CARD_CATALOG_TTL", "300"))
+    now = time.monotonic()
+    if _catalog is not None and not _force_reload and now - _checked_at < ttl:
+        return _catalog
+
+    with _catalog_lock:
+        if _catalog is not None and not _force_reload and time.monotonic() - _checked_at < ttl:
+            return _catalog
+
+        with get_connection() as conn:
+            if _catalog is not None and not _force_reload:
+                # 주기적 확인: 체크섬이 같으면 다시 읽지 않음
+                cursor = conn.cursor()
+                version = _table_version(cursor)
+                cursor.close()
+                if version is not None and version == _catalog.version:
+                    _checked_at = time.monotonic()
+                    return _catalog
+            _catalog = load_catalog(conn)
+
+        _force_reload = False
+        _checked_at = time.monotonic()
+        return _catalog
@@ -1,43 +1,75 @@
 # 📁 db/utils.py
 
-import pymysql
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+import pymysql
+
+from db.pool import get_connection
+from utils.ttl_cache import MISSING, TTLCache
+from utils.telemetry import traced, watch_cache
 
-# ✅ 사용자 정보 가져오기 (DictCursor 적용)
+# ✅ 하이브리드 추천 조회 캐시 (배치로 하루 몇 번만 바뀌므로 TTL 동안 DB 조회 생략, 추천이 없는 사용자의 [] 도 캐시)
+recommendation_cache = TTLCache(
+    max_size=int(os.getenv("HYBRID_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("HYBRID_CACHE_TTL", "600"))
+)
+watch_cache("hybrid_recommendations", recommendation_cache)
+
+# ✅ 사용자 정보 가져오기 (DictCursor 적용, 풀 커넥션 재사용)
+@traced("db.get_user_profile")
 def get_user_profile(user_id: str):
-    conn = pymysql.connect(
-        host=os.getenv("MYSQL_HOST"),
-        port=int(os.getenv("MYSQL_PORT")),
-        user=os.getenv("MYSQL_USER"),
-        password=os.getenv("MYSQL_PASSWORD"),
-        database=os.getenv("MYSQL_DATABASE"),
-        charset='utf8mb4'
-    )
-    cursor = conn.cursor(pymysql.cursors.DictCursor)  # ✨ DictCursor로 변경
-    cursor.execute("SELECT * FROM user_transactions WHERE SEQ = %s", (user_id,))
-    result = cursor.fetchone()
-    cursor.close()
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor(pymysql.cursors.DictCursor)  # ✨ DictCursor로 변경
+        cursor.execute("SELECT * FROM user_transactions WHERE SEQ = %s", (user_id,))
+        result = cursor.fetchone()
+        cursor.close()
 
     return result  # ✨ Dict로 바로 나오니까 zip() 불필요
 
+# ✅ 하이브리드 추천 결과 (recommender/hybrid.py 가 만든 user_recommendations_hybrid, PK 범위 조회 한 번)
+@traced("db.get_hybrid_recommendations")
+def get_hybrid_recommendations(user_id: str):
+    cached = recommendation_cache.get(user_id, MISSING)
+    if cached is not MISSING:
+        return cached
+
+    with get_connection() as conn:
+        cursor = conn.cursor(pymysql.cursors.DictCursor)
+        cursor.execute(
+            "SELECT rank_no, card_id, card_name, company, card_type, image_url, score "
+            "FROM user_recommendations_hybrid WHERE user_id = %s ORDER BY rank_no",
+            (user_id,)
+        )
+        results = list(cursor.fetchall())
+        cursor.close()
+
+    recommendation_cache.put(user_id, results)
+    return results
+
+# ✅ 사용자 군집 (recommended_cards.cluster, 챗봇 검색에서 군집 친화도 가중치에 사용)
+# recommended_cards 의 idx_recommended_seq (seq, cluster) 인덱스만 읽는 조회
+cluster_cache = TTLCache(
+    max_size=int(os.getenv("USER_CLUSTER_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("USER_CLUSTER_CACHE_TTL", "3600"))
+)
+watch_cache("user_cluster", cluster_cache)
+
+@traced("db.get_user_cluster")
+def get_user_cluster(user_id: str):
+    cached = cluster_cache.get(user_id, MISSING)
+    if cached is not MISSING:
+        return cached  # 군집이 없는 사용자(None)도 캐시
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT cluster FROM recommended_cards WHERE seq = %s LIMIT 1", (user_id,))
+        row = cursor.fetchone()
+        cursor.close()
+
+    cluster = int(row[0]) if row and row[0] is not None else None
+    cluster_cache.put(user_id, cluster)
+    return cluster
+
 # ✅ 추천 카드 가져오기 (새로 추가)
 def get_recommended_cards(user_id: str):
-    conn = pymysql.connect(
-        host=os.getenv("MYSQL_HOST"),
-        port=int(os.getenv("MYSQL_PORT")),
-        user=os.getenv("MYSQL_USER"),
-        password=os.getenv("MYSQL_PASSWORD"),
-        database=os.getenv("MYSQL_DATABASE"),
-        charset='utf8mb4'
-    )
-    cursor = conn.cursor()
-    cursor.execute("SELECT card_name FROM user_recommendations_hybrid WHERE user_id = %s", (user_id,))
-    results = cursor.fetchall()
-    cursor.close()
-    conn.close()
-
-    return [row[0] for row in results] if results else []
\ No newline at end of file
+    return [row["card_name"] for row in get_hybrid_recommendations(user_id) if row["card_name"]]
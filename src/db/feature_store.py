@@ -0,0 +1,227 @@
+# 📁 db/feature_store.py
+# user_transactions 컬럼형 피처 저장소 (NumPy memmap)
+# MySQL 의 숫자 컬럼을 (컬럼 × 사용자) float64 배열로 내보내 디스크에서 mmap 으로 읽습니다.
+# (float32 로 줄이면 1.37 → 1.3700000047683716 처럼 값이 바뀌어 MySQL 에서 계산한 요약/해시와 달라지므로 원래 정밀도 유지)
+#   - column("TOT_USE_AM_mean") : 한 컬럼 전체를 복사 없이 연속 메모리로 스캔
+#   - row("SEQ") / rows([...])  : SEQ → 행 번호 색인(정렬 + searchsorted)으로 조회
+# 내보내기는 버전 디렉터리에 쓰고 CURRENT 파일을 바꾸는 방식이라, 읽는 중인 프로세스는 이전 버전을 계속 사용합니다.
+
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+import pymysql
+from pymysql.constants import FIELD_TYPE
+
+FEATURE_STORE_PATHS = [
+    "./db_backup/feature_store/user_transactions",
+    "../db_backup/feature_store/user_transactions"
+]
+
+TABLE_NAME = "user_transactions"
+KEY_COLUMN = "SEQ"
+KEEP_VERSIONS = 2
+FEATURE_DTYPE = np.float64
+
+NUMERIC_TYPES = {
+    FIELD_TYPE.TINY, FIELD_TYPE.SHORT, FIELD_TYPE.LONG, FIELD_TYPE.INT24, FIELD_TYPE.LONGLONG,
+    FIELD_TYPE.FLOAT, FIELD_TYPE.DOUBLE, FIELD_TYPE.DECIMAL, FIELD_TYPE.NEWDECIMAL
+}
+
+
+class FeatureStore:
+    def __init__(self, path, features, seqs, sorted_seqs, seq_order, columns, meta=None):
+        self.path = path
+        self.features = features        # (컬럼 수, 사용자 수) float64 memmap (이전 버전은 float32)
+        self.seqs = seqs                # (사용자 수,) SEQ 문자열 (행 순서)
+        self.sorted_seqs = sorted_seqs  # 정렬된 SEQ (searchsorted 용)
+        self.seq_order = seq_order      # sorted_seqs[i] 의 행 번호
+        self.columns = list(columns)
+        self.meta = meta or {}
+        self._column_index = {name: i for i, name in enumerate(self.columns)}
+
+    def __len__(self):
+        return len(self.seqs)
+
+    @classmethod
+    def load(cls, version_dir, mmap=True):
+        mode = "r" if mmap else None
+        with open(os.path.join(version_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(
+            version_dir,
+            np.load(os.path.join(version_dir, "features.npy"), mmap_mode=mode),
+            np.load(os.path.join(version_dir, "seqs.npy"), mmap_mode=mode),
+            np.load(os.path.join(version_dir, "sorted_seqs.npy"), mmap_mode=mode),
+            np.load(os.path.join(version_dir, "seq_order.npy"), mmap_mode=mode),
+            meta["columns"],
+            meta
+        )
+
+    @classmethod
+    def open(cls, path=None):
+        """FEATURE_STORE_PATH (또는 후보 경로) 의 현재 버전을 엽니다. 없으면 None"""
+        path = path or os.getenv("FEATURE_STORE_PATH")
+        paths = [path] if path else FEATURE_STORE_PATHS
+        for candidate in paths:
+            version_dir = current_version_dir(candidate)
+            if version_dir:
+                print("✅ 피처 저장소 로드: {}".format(version_dir))
+                return cls.load(version_dir)
+        print("⚠️ 경고: 피처 저장소를 찾을 수 없습니다. init_feature_store.py 로 먼저 생성해주세요.")
+        return None
+
+    # ✅ 조회 API
+    def row_index(self, seq):
+        pos = int(np.searchsorted(self.sorted_seqs, str(seq)))
+        if pos < len(self.sorted_seqs) and self.sorted_seqs[pos] == str(seq):
+            return int(self.seq_order[pos])
+        return None
+
+    def row(self, seq):
+        """한 사용자의 {컬럼: 값} (없으면 None)"""
+        index = self.row_index(seq)
+        if index is None:
+            return None
+        values = self.features[:, index]
+        record = {KEY_COLUMN: str(self.seqs[index])}
+        record.update(zip(self.columns, values.tolist()))
+        return record
+
+    def rows(self, seqs, columns=None) -> pd.DataFrame:
+        """여러 사용자의 피처 (없는 SEQ 는 제외)"""
+        indexes = [index for index in (self.row_index(seq) for seq in seqs) if index is not None]
+        return self.frame(columns, rows=np.asarray(indexes, dtype=np.int64))
+
+    def column(self, name) -> np.ndarray:
+        """한 컬럼 전체 (memmap 뷰, 복사 없음)"""
+        return self.features[self._column_index[name]]
+
+    def frame(self, columns=None, rows=None) -> pd.DataFrame:
+        """선택한 컬럼/행으로 DataFrame 구성 (SEQ 컬럼 포함)"""
+        columns = list(columns or self.columns)
+        col_idx = [self._column_index[name] for name in columns]
+        block = self.features[col_idx] if rows is None else self.features[np.ix_(col_idx, rows)]
+        seqs = self.seqs if rows is None else self.seqs[rows]
+        df = pd.DataFrame(block.T, columns=columns)
+        df.insert(0, KEY_COLUMN, seqs.astype(str))
+        return df
+
+    def iter_frames(self, chunk_size=100000, columns=None):
+        for start in range(0, len(self), chunk_size):
+            yield self.frame(columns, rows=np.arange(start, min(start + chunk_size, len(self))))
+
+
+# ✅ 버전 디렉터리 관리
+def current_version_dir(path):
+    pointer = os.path.join(path, "CURRENT")
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer, encoding="utf-8") as f:
+        version_dir = os.path.join(path, f.read().strip())
+    return version_dir if os.path.exists(os.path.join(version_dir, "meta.json")) else None
+
+
+def _publish(path, version):
+    tmp_pointer = os.path.join(path, "CURRENT.tmp")
+    with open(tmp_pointer, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp_pointer, os.path.join(path, "CURRENT"))
+
+    # 오래된 버전 정리 (현재 포함 KEEP_VERSIONS 개 유지)
+    versions = sorted(name for name in os.listdir(path) if name.startswith("v"))
+    for name in versions[:-KEEP_VERSIONS]:
+        shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+
+
+def _table_checksum(cursor):
+    try:
+        cursor.execute("CHECKSUM TABLE {}".format(TABLE_NAME))
+        return cursor.fetchone()[1]
+    except pymysql.err.Error:
+        return None
+
+
+# ✅ MySQL → 피처 저장소 동기화
+def export_feature_store(conn, path=None, chunk_size=50000, force=False):
+    """
+    user_transactions 의 숫자 컬럼을 새 버전으로 내보냅니다.
+    테이블 체크섬이 현재 버전과 같으면 건너뜁니다 (force=True 이면 항상 내보냄).
+    """
+    path = path or os.getenv("FEATURE_STORE_PATH") or FEATURE_STORE_PATHS[0]
+    os.makedirs(path, exist_ok=True)
+
+    cursor = conn.cursor()
+    # 같은 시점의 스냅샷으로 행 수 확인과 스트리밍 읽기를 수행
+    cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+    checksum = _table_checksum(cursor)
+    current = current_version_dir(path)
+    if current and not force and checksum is not None:
+        with open(os.path.join(current, "meta.json"), encoding="utf-8") as f:
+            current_meta = json.load(f)
+            # 이전 float32 버전은 체크섬이 같아도 다시 내보냄
+            if current_meta.get("checksum") == checksum and current_meta.get("dtype") == np.dtype(FEATURE_DTYPE).name:
+                conn.rollback()
+                cursor.close()
+                print("변경 없음: {} 사용".format(current))
+                return current
+
+    cursor.execute("SELECT COUNT(*) FROM {}".format(TABLE_NAME))
+    n_rows = cursor.fetchone()[0]
+    cursor.execute("SELECT * FROM {} LIMIT 0".format(TABLE_NAME))
+    columns = [col[0] for col in cursor.description if col[0] != KEY_COLUMN and col[1] in NUMERIC_TYPES]
+    cursor.close()
+
+    version = "v{}".format(time.strftime("%Y%m%d%H%M%S"))
+    version_dir = os.path.join(path, version)
+    os.makedirs(version_dir)
+    print("피처 저장소 내보내기: {0}명 × {1}개 컬럼 → {2}".format(n_rows, len(columns), version_dir))
+
+    started = time.time()
+    features = np.lib.format.open_memmap(
+        os.path.join(version_dir, "features.npy"), mode="w+", dtype=FEATURE_DTYPE, shape=(len(columns), n_rows)
+    )
+    seqs = []
+    stream = conn.cursor(pymysql.cursors.SSCursor)
+    stream.execute("SELECT {0}, {1} FROM {2}".format(
+        KEY_COLUMN, ", ".join("`{}`".format(col) for col in columns), TABLE_NAME))
+    offset = 0
+    while True:
+        rows = stream.fetchmany(chunk_size)
+        if not rows:
+            break
+        df = pd.DataFrame(rows, columns=[KEY_COLUMN] + columns)
+        seqs.extend(df[KEY_COLUMN].astype(str))
+        # NULL → NaN, 컬럼 방향으로 저장
+        features[:, offset:offset + len(df)] = df[columns].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=FEATURE_DTYPE).T
+        offset += len(df)
+        print("진행 중: {0}/{1}명 ({2:.1f}초)".format(offset, n_rows, time.time() - started))
+    stream.close()
+    conn.commit()
+    features.flush()
+    del features
+    if offset != n_rows:
+        shutil.rmtree(version_dir, ignore_errors=True)
+        raise RuntimeError("행 수 불일치: 예상 {0}명, 읽은 {1}명".format(n_rows, offset))
+
+    seqs = np.asarray(seqs, dtype=str)
+    np.save(os.path.join(version_dir, "seqs.npy"), seqs)
+    order = np.argsort(seqs, kind="stable")
+    np.save(os.path.join(version_dir, "sorted_seqs.npy"), seqs[order])
+    np.save(os.path.join(version_dir, "seq_order.npy"), order)
+    with open(os.path.join(version_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "table": TABLE_NAME,
+            "columns": columns,
+            "dtype": np.dtype(FEATURE_DTYPE).name,
+            "n_rows": offset,
+            "checksum": checksum,
+            "exported_at": time.strftime("%Y-%m-%d %H:%M:%S")
+        }, f, ensure_ascii=False, indent=2)
+
+    _publish(path, version)
+    print("✅ 피처 저장소 저장 완료: {0} ({1:.1f}초)".format(version_dir, time.time() - started))
+    return version_dir
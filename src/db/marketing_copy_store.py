@@ -0,0 +1,70 @@
+# 📁 db/marketing_copy_store.py
+# 카드 광고 문구 영구 캐시 (marketing_copy_cache 테이블)
+# (card_name, 혜택 내용 해시, 프롬프트 버전) 이 같으면 이전에 생성한 문구를 그대로 재사용합니다.
+
+from db.pool import get_connection
+
+CREATE_SQL = """
+CREATE TABLE IF NOT EXISTS marketing_copy_cache (
+    card_name VARCHAR(255) NOT NULL,
+    benefit_hash CHAR(64) NOT NULL,
+    prompt_version VARCHAR(16) NOT NULL,
+    copy_text TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (card_name, benefit_hash, prompt_version)
+) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+"""
+
+UPSERT_SQL = (
+    "INSERT INTO marketing_copy_cache (card_name, benefit_hash, prompt_version, copy_text) "
+    "VALUES (%s, %s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE copy_text = VALUES(copy_text), created_at = CURRENT_TIMESTAMP"
+)
+
+_table_ready = False
+
+
+def ensure_table(conn):
+    global _table_ready
+    if _table_ready:
+        return
+    cursor = conn.cursor()
+    cursor.execute(CREATE_SQL)
+    conn.commit()
+    cursor.close()
+    _table_ready = True
+
+
+def fetch_copies(keys) -> dict:
+    """keys: [(card_name, benefit_hash, prompt_version), ...] → {key: copy_text} (저장된 것만)"""
+    keys = list(keys)
+    if not keys:
+        return {}
+    found = {}
+    with get_connection() as conn:
+        ensure_table(conn)
+        cursor = conn.cursor()
+        placeholders = ", ".join(["(%s, %s, %s)"] * len(keys))
+        cursor.execute(
+            "SELECT card_name, benefit_hash, prompt_version, copy_text FROM marketing_copy_cache "
+            "WHERE (card_name, benefit_hash, prompt_version) IN ({})".format(placeholders),
+            tuple(value for key in keys for value in key)
+        )
+        for card_name, digest, version, copy_text in cursor.fetchall():
+            found[(card_name, digest, version)] = copy_text
+        cursor.close()
+    return found
+
+
+def save_copies(rows):
+    """rows: [(card_name, benefit_hash, prompt_version, copy_text), ...]"""
+    rows = list(rows)
+    if not rows:
+        return 0
+    with get_connection() as conn:
+        ensure_table(conn)
+        cursor = conn.cursor()
+        cursor.executemany(UPSERT_SQL, rows)
+        conn.commit()
+        cursor.close()
+    return len(rows)
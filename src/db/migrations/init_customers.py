@@ -1,44 +1,37 @@
-import pandas as pd
-import pymysql
+import argparse
 import os
-from dotenv import load_dotenv
+import sys
 
-load_dotenv()
+# src 패키지(db, llm ...) 를 import 할 수 있도록 경로 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-df = pd.read_csv('./data/customers.csv')
+from db.pool import get_connection
+from db.bulk_loader import BulkLoader, add_loader_arguments, loader_kwargs_from_args
 
-conn = pymysql.connect(
-    host=os.getenv('MYSQL_HOST'),
-    port=int(os.getenv('MYSQL_PORT')),
-    user=os.getenv('MYSQL_USER'),
-    password=os.getenv('MYSQL_PASSWORD'),
-    database=os.getenv('MYSQL_DATABASE'),
-    charset='utf8mb4'
-)
-cursor = conn.cursor()
-
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS customers (
-    seq INT PRIMARY KEY,
-    name VARCHAR(255),
-    age INT,
-    gender VARCHAR(10),
-    recommended_card_id INT
-)
-""")
+parser = add_loader_arguments(argparse.ArgumentParser(description="고객 정보(customers) 적재"), './data/customers.csv')
+args = parser.parse_args()
 
-for _, row in df.iterrows():
-    sql = "REPLACE INTO customers (seq, name, age, gender, recommended_card_id) VALUES (%s, %s, %s, %s, %s)"
-    cursor.execute(sql, (
-        int(row['seq']),
-        row['name'],
-        int(row['age']),
-        row['gender'],
-        int(row['recommended_card_id'])
-    ))
+with get_connection() as conn:
+    cursor = conn.cursor()
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS customers (
+        seq INT PRIMARY KEY,
+        name VARCHAR(255),
+        age INT,
+        gender VARCHAR(10),
+        recommended_card_id INT
+    )
+    """)
+    conn.commit()
+    cursor.close()
 
-conn.commit()
-cursor.close()
-conn.close()
+loader = BulkLoader(
+    "customers",
+    columns=["seq", "name", "age", "gender", "recommended_card_id"],
+    indexes={"idx_customers_recommended_card_id": ["recommended_card_id"]},
+    transform=lambda chunk: chunk.astype({"seq": "Int64", "age": "Int64", "recommended_card_id": "Int64"}),
+    **loader_kwargs_from_args(args)
+)
+loader.load_csv(args.csv_path, fresh=args.fresh)
 
 print("✅ 고객 정보가 MySQL에 저장되었습니다.")
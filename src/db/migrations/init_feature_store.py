@@ -0,0 +1,26 @@
+import argparse
+import os
+import sys
+from dotenv import load_dotenv
+
+# src 패키지(db, llm ...) 를 import 할 수 있도록 경로 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from db.pool import get_pool
+from db.feature_store import export_feature_store
+
+load_dotenv()
+
+# user_transactions → 컬럼형 memmap 피처 저장소 (테이블이 바뀌었을 때만 새 버전 생성)
+parser = argparse.ArgumentParser(description="user_transactions 피처 저장소 동기화")
+parser.add_argument("--path", default=None, help="저장 경로 (기본: FEATURE_STORE_PATH 또는 ./db_backup/feature_store/user_transactions)")
+parser.add_argument("--chunk-size", type=int, default=50000, help="한 번에 읽을 행 수")
+parser.add_argument("--force", action="store_true", help="체크섬이 같아도 다시 내보내기")
+args = parser.parse_args()
+
+pool = get_pool()
+conn = pool.acquire()
+try:
+    export_feature_store(conn, args.path, chunk_size=args.chunk_size, force=args.force)
+finally:
+    pool.release(conn)
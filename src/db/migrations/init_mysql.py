@@ -1,37 +1,35 @@
-import pandas as pd
-import pymysql
+import argparse
 import os
-from dotenv import load_dotenv
+import sys
 
-load_dotenv()
+# src 패키지(db, llm ...) 를 import 할 수 있도록 경로 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-df = pd.read_csv('./data/cards.csv')
+from db.pool import get_connection
+from db.bulk_loader import BulkLoader, add_loader_arguments, loader_kwargs_from_args
 
+parser = add_loader_arguments(argparse.ArgumentParser(description="카드 정보(cards) 적재"), './data/cards.csv')
+args = parser.parse_args()
 
-conn = pymysql.connect(
-    host=os.getenv('MYSQL_HOST'),
-    port=int(os.getenv('MYSQL_PORT')),
-    user=os.getenv('MYSQL_USER'),
-    password=os.getenv('MYSQL_PASSWORD'),
-    database=os.getenv('MYSQL_DATABASE'),
-    charset='utf8mb4'
-)
-cursor = conn.cursor()
+with get_connection() as conn:
+    cursor = conn.cursor()
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS cards (
+        card_id INT PRIMARY KEY,
+        card_name VARCHAR(255),
+        company VARCHAR(100),
+        image_url TEXT,
+        card_type VARCHAR(50)
+    )
+    """)
+    conn.commit()
+    cursor.close()
 
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS cards (
-    card_id INT PRIMARY KEY,
-    card_name VARCHAR(255),
-    company VARCHAR(100),
-    image_url TEXT,
-    card_type VARCHAR(50)
+loader = BulkLoader(
+    "cards",
+    columns=["card_id", "card_name", "company", "image_url", "card_type"],
+    indexes={"idx_cards_card_name": ["card_name"]},
+    transform=lambda chunk: chunk.astype({"card_id": "Int64"}),
+    **loader_kwargs_from_args(args)
 )
-""")
-
-for _, row in df.iterrows():
-    sql = "REPLACE INTO cards (card_id, card_name, company, image_url, card_type) VALUES (%s, %s, %s, %s, %s)"
-    cursor.execute(sql, (int(row['card_id']), row['card_name'], row['company'], row['image_url'], row['card_type']))
-
-conn.commit()
-cursor.close()
-conn.close()
+loader.load_csv(args.csv_path, fresh=args.fresh)
@@ -1,20 +1,20 @@
 import pandas as pd
-import pymysql
 import os
+import sys
 from dotenv import load_dotenv
 
+# src 패키지(db, llm ...) 를 import 할 수 있도록 경로 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from db.pool import get_pool
+from db.card_catalog import get_catalog, parse_card_code
+
 load_dotenv()
 
 df = pd.read_csv('./data/card_assignment_result_final.csv')
 
-conn = pymysql.connect(
-    host=os.getenv('MYSQL_HOST'),
-    port=int(os.getenv('MYSQL_PORT')),
-    user=os.getenv('MYSQL_USER'),
-    password=os.getenv('MYSQL_PASSWORD'),
-    database=os.getenv('MYSQL_DATABASE'),
-    charset='utf8mb4'
-)
+pool = get_pool()
+conn = pool.acquire()
 cursor = conn.cursor()
 
 cursor.execute("""
@@ -25,21 +25,23 @@ CREATE TABLE IF NOT EXISTS recommended_cards (
     recommended_rank INT,
     card_code VARCHAR(10),
     card_id INT,
-    card_name VARCHAR(255)
+    card_name VARCHAR(255),
+    INDEX idx_recommended_seq (seq, cluster)
 )
 """)
 
-cursor.execute("DELETE FROM recommended_cards")
+# ✅ 이전에 만든 테이블에도 seq 인덱스 추가 (챗봇의 사용자 군집 조회가 전체 스캔하지 않도록)
+cursor.execute(
+    "SELECT 1 FROM information_schema.statistics "
+    "WHERE table_schema = DATABASE() AND table_name = 'recommended_cards' AND index_name = 'idx_recommended_seq' LIMIT 1"
+)
+if cursor.fetchone() is None:
+    cursor.execute("ALTER TABLE recommended_cards ADD INDEX idx_recommended_seq (seq, cluster)")
+    print("[인덱스] recommended_cards.idx_recommended_seq 생성 완료")
 
-card_df = pd.read_sql("SELECT card_id, card_name FROM cards", conn)
-card_dict = dict(zip(card_df.card_id, card_df.card_name))
+cursor.execute("DELETE FROM recommended_cards")
 
-def parse_card_code(card_code):
-    if card_code.startswith("C"):
-        return "체크카드", int(card_code[1:])
-    elif card_code.startswith("R"):
-        return "신용카드", int(card_code[1:]) + 1000
-    return None, None
+catalog = get_catalog()
 
 insert_batch = []
 total_rows = len(df)
@@ -53,7 +55,7 @@ for idx, (_, row) in enumerate(df.iterrows()):
         if pd.notna(row[col]):
             card_code = str(row[col])
             card_type, card_id = parse_card_code(card_code)
-            card_name = card_dict.get(card_id)
+            card_name = catalog.card_name(card_id)
             insert_batch.append((seq, cluster, i, card_code, card_id, card_name))
     
     # 매 1000개마다 일괄 삽입
@@ -76,6 +78,6 @@ if insert_batch:
     print(f"[진행 상황] 전체 {total_rows}행 처리 완료")
 
 cursor.close()
-conn.close()
+pool.release(conn)
 
 print("✅ 추천 카드 정보가 MySQL에 저장되었습니다.")
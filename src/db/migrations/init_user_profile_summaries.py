@@ -0,0 +1,41 @@
+import argparse
+import os
+import sys
+from dotenv import load_dotenv
+
+# src 패키지(db, llm ...) 를 import 할 수 있도록 경로 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from db.pool import get_pool
+from db.feature_store import FeatureStore
+from db.profile_store import iter_transaction_frames, sync_profile_summaries
+
+load_dotenv()
+
+# user_transactions → user_profile_summaries (바뀐 사용자만 다시 계산, 반복 실행 가능)
+parser = argparse.ArgumentParser(description="사용자 소비 성향 요약 사전 계산")
+parser.add_argument("--chunk-size", type=int, default=20000, help="한 번에 읽어 계산할 사용자 수")
+parser.add_argument("--full", action="store_true", help="저장된 요약을 지우고 전체 다시 계산")
+parser.add_argument("--from-feature-store", action="store_true",
+                    help="MySQL 대신 피처 저장소(init_feature_store.py)에서 읽기")
+args = parser.parse_args()
+
+# 스트리밍 읽기용 / 쓰기용 커넥션을 풀에서 하나씩 사용
+pool = get_pool()
+read_conn = None if args.from_feature_store else pool.acquire()
+write_conn = pool.acquire()
+try:
+    if args.from_feature_store:
+        store = FeatureStore.open()
+        if store is None:
+            raise SystemExit(1)
+        frames = store.iter_frames(args.chunk_size)
+    else:
+        frames = iter_transaction_frames(read_conn, args.chunk_size)
+    result = sync_profile_summaries(frames, write_conn, full=args.full)
+finally:
+    if read_conn is not None:
+        pool.release(read_conn)
+    pool.release(write_conn)
+
+print("✅ user_profile_summaries 갱신 완료! (확인 {scanned}건, 갱신 {updated}건, 삭제 {removed}건)".format(**result))
@@ -1,25 +1,22 @@
-import pandas as pd
-import pymysql
+import argparse
 import os
-from dotenv import load_dotenv
-from tqdm import tqdm
+import sys
 
-# .env 환경변수 불러오기
-load_dotenv()
+# src 패키지(db, llm ...) 를 import 할 수 있도록 경로 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-# CSV 경로 지정
-csv_path = '/Users/james_kyh/Downloads/card_rag_project_collab_all_users/data/user_transactions.csv'
-df = pd.read_csv(csv_path)
+from db.pool import get_pool
+from db.bulk_loader import BulkLoader, add_loader_arguments, loader_kwargs_from_args
 
-# MySQL 연결
-conn = pymysql.connect(
-    host=os.getenv('MYSQL_HOST'),
-    port=int(os.getenv('MYSQL_PORT')),
-    user=os.getenv('MYSQL_USER'),
-    password=os.getenv('MYSQL_PASSWORD'),
-    database=os.getenv('MYSQL_DATABASE'),  # 예: card_recommend
-    charset='utf8mb4'
+# CSV 경로 지정 (인자로 덮어쓸 수 있음)
+parser = add_loader_arguments(
+    argparse.ArgumentParser(description="사용자 거래 요약(user_transactions) 적재"),
+    '/Users/james_kyh/Downloads/card_rag_project_collab_all_users/data/user_transactions.csv'
 )
+args = parser.parse_args()
+
+pool = get_pool()
+conn = pool.acquire()
 cursor = conn.cursor()
 
 # 테이블 생성 (컬럼 타입 추정 기반)
@@ -85,19 +82,12 @@ CREATE TABLE IF NOT EXISTS user_transactions (
 )
 """)
 
-# 자동으로 컬럼 및 placeholder 생성
-columns = df.columns.tolist()
-columns_str = ', '.join(columns)
-placeholders = ', '.join(['%s'] * len(columns))
-sql = f"REPLACE INTO user_transactions ({columns_str}) VALUES ({placeholders})"
-
-# 진행률 표시하며 insert 실행
-for _, row in tqdm(df.iterrows(), total=len(df), desc="Uploading to MySQL"):
-    cursor.execute(sql, tuple(row[col] for col in columns))
-
-# 커밋 및 종료
 conn.commit()
 cursor.close()
-conn.close()
+pool.release(conn)
+
+# 청크 단위 스트리밍 적재 (컬럼은 CSV 헤더를 그대로 사용)
+loader = BulkLoader("user_transactions", **loader_kwargs_from_args(args))
+loader.load_csv(args.csv_path, fresh=args.fresh)
 
-print("✅ user_transactions 테이블 저장 완료!")
\ No newline at end of file
+print("✅ user_transactions 테이블 저장 완료!")
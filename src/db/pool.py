@@ -0,0 +1,217 @@
+# 📁 db/pool.py
+# 공용 MySQL 커넥션 풀 (크기 제한 + 헬스 체크 + 끊긴 연결 재연결 + 대기/체크아웃 지표)
+
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import pymysql
+from dotenv import load_dotenv
+
+from utils.telemetry import register_collector
+
+load_dotenv()
+
+
+class PoolTimeoutError(Exception):
+    """풀에서 제한 시간 안에 커넥션을 얻지 못했을 때 발생합니다."""
+
+
+# ✅ 환경 변수 기반 접속 정보
+def get_connection_params(**overrides) -> dict:
+    params = dict(
+        host=os.getenv("MYSQL_HOST"),
+        port=int(os.getenv("MYSQL_PORT", "3306")),
+        user=os.getenv("MYSQL_USER"),
+        password=os.getenv("MYSQL_PASSWORD"),
+        database=os.getenv("MYSQL_DATABASE"),
+        charset="utf8mb4"
+    )
+    params.update(overrides)
+    return params
+
+
+class ConnectionPool:
+    def __init__(self, max_size=5, timeout=10.0, health_check_interval=30.0, **connect_kwargs):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.connect_kwargs = connect_kwargs or get_connection_params()
+
+        # (커넥션, 마지막 반납 시각) 을 담는 LIFO 큐: 최근에 쓴 커넥션을 먼저 재사용
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self._stats = {
+            "checkouts": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "timeouts": 0,
+            "connections_created": 0,
+            "reconnects": 0,
+            "discarded": 0,
+        }
+
+    def _connect(self):
+        conn = pymysql.connect(**self.connect_kwargs)
+        with self._lock:
+            self._stats["connections_created"] += 1
+        return conn
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._created -= 1
+            self._stats["discarded"] += 1
+
+    def _is_stale(self, last_used):
+        return time.monotonic() - last_used > self.health_check_interval
+
+    def acquire(self):
+        start = time.perf_counter()
+        conn, last_used = None, None
+
+        try:
+            conn, last_used = self._idle.get_nowait()
+        except queue.Empty:
+            # 유휴 커넥션이 없으면 한도 내에서 새로 만들고, 한도에 도달했으면 반납을 기다림
+            with self._lock:
+                can_create = self._created < self.max_size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                try:
+                    conn, last_used = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self._stats["timeouts"] += 1
+                    raise PoolTimeoutError(
+                        "MySQL 커넥션 풀 대기 시간 초과 ({0}초, 최대 {1}개)".format(self.timeout, self.max_size)
+                    )
+
+        # 오래 쉬었던 커넥션은 ping 으로 확인하고, 끊겼으면 새 커넥션으로 교체
+        if last_used is not None and self._is_stale(last_used):
+            try:
+                conn.ping(reconnect=False)
+            except Exception:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                try:
+                    conn = pymysql.connect(**self.connect_kwargs)
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+                with self._lock:
+                    self._stats["reconnects"] += 1
+
+        waited = time.perf_counter() - start
+        with self._lock:
+            self._in_use += 1
+            self._stats["checkouts"] += 1
+            self._stats["wait_time_total"] += waited
+            self._stats["wait_time_max"] = max(self._stats["wait_time_max"], waited)
+        return conn
+
+    def release(self, conn, broken=False):
+        with self._lock:
+            self._in_use -= 1
+        if broken or not conn.open:
+            self._discard(conn)
+            return
+        try:
+            # 커밋되지 않은 트랜잭션이 다음 사용자에게 넘어가지 않도록 정리
+            conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+        self._idle.put((conn, time.monotonic()))
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        broken = False
+        try:
+            yield conn
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self.release(conn, broken=broken)
+
+    def close(self):
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["max_size"] = self.max_size
+            stats["in_use"] = self._in_use
+            stats["open_connections"] = self._created
+        stats["idle"] = self._idle.qsize()
+        stats["wait_time_avg"] = stats["wait_time_total"] / stats["checkouts"] if stats["checkouts"] else 0.0
+        return stats
+
+
+# ✅ 프로세스 전역 풀 (Streamlit 세션/스레드가 함께 사용)
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    max_size=int(os.getenv("MYSQL_POOL_SIZE", "5")),
+                    timeout=float(os.getenv("MYSQL_POOL_TIMEOUT", "10")),
+                    health_check_interval=float(os.getenv("MYSQL_POOL_HEALTHCHECK", "30")),
+                    **get_connection_params()
+                )
+    return _pool
+
+
+def get_connection():
+    """`with get_connection() as conn:` 형태로 풀 커넥션을 빌려 씁니다."""
+    return get_pool().connection()
+
+
+def pool_stats() -> dict:
+    return get_pool().stats()
+
+
+def _collect_pool_metrics():
+    if _pool is None:
+        return []
+    stats = _pool.stats()
+    return [
+        ("mysql_pool_in_use", "gauge", "사용 중인 커넥션 수", {}, stats["in_use"]),
+        ("mysql_pool_open_connections", "gauge", "열려 있는 커넥션 수", {}, stats["open_connections"]),
+        ("mysql_pool_checkouts_total", "counter", "커넥션 대여 수", {}, stats["checkouts"]),
+        ("mysql_pool_wait_seconds_total", "counter", "커넥션 대기 시간 합계", {}, stats["wait_time_total"]),
+        ("mysql_pool_timeouts_total", "counter", "커넥션 대기 시간 초과 수", {}, stats["timeouts"]),
+    ]
+
+
+register_collector(_collect_pool_metrics)
@@ -0,0 +1,162 @@
+# 📁 db/profile_store.py
+# 사용자 소비 성향 요약 저장소 (user_profile_summaries 테이블)
+# 챗봇은 user_transactions 의 넓은 행 대신 미리 계산된 요약 한 건만 읽습니다.
+# sync_profile_summaries() 는 원본 행 해시를 비교하여 바뀐 사용자만 다시 계산합니다.
+
+import time
+
+import pandas as pd
+import pymysql
+
+from db.pool import get_connection
+from utils.user_summary import SUMMARY_VERSION, compute_profile_features, format_profile_summary, row_hashes
+
+CREATE_SQL = """
+CREATE TABLE IF NOT EXISTS user_profile_summaries (
+    SEQ VARCHAR(30) PRIMARY KEY,
+    row_hash VARCHAR(32) NOT NULL,
+    age_group INT,
+    sex INT,
+    digital INT,
+    total_spending FLOAT,
+    top_category_code INT NULL,
+    top_categories TEXT,
+    concentration FLOAT,
+    spend_tier VARCHAR(8),
+    leisure_spending FLOAT,
+    daily_spending FLOAT,
+    lifestyle VARCHAR(16),
+    summary_text TEXT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+"""
+
+FEATURE_COLUMNS = [
+    "SEQ", "row_hash", "age_group", "sex", "digital", "total_spending", "top_category_code", "top_categories",
+    "concentration", "spend_tier", "leisure_spending", "daily_spending", "lifestyle", "summary_text"
+]
+
+UPSERT_SQL = "INSERT INTO user_profile_summaries ({0}) VALUES ({1}) ON DUPLICATE KEY UPDATE {2}".format(
+    ", ".join(FEATURE_COLUMNS),
+    ", ".join(["%s"] * len(FEATURE_COLUMNS)),
+    ", ".join("{0} = VALUES({0})".format(col) for col in FEATURE_COLUMNS[1:])
+)
+
+
+_table_ready = False
+
+
+def ensure_table(conn):
+    # 챗봇 요약 저장(save_user_row) 경로에서 매번 CREATE TABLE 을 실행하지 않도록 프로세스당 한 번만 확인
+    global _table_ready
+    if _table_ready:
+        return
+    cursor = conn.cursor()
+    cursor.execute(CREATE_SQL)
+    conn.commit()
+    cursor.close()
+    _table_ready = True
+
+
+def fetch_summary(user_id: str):
+    """미리 계산된 챗봇용 요약 문장. 없으면(또는 테이블이 없으면) None"""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT summary_text FROM user_profile_summaries WHERE SEQ = %s", (user_id,))
+            row = cursor.fetchone()
+        except pymysql.err.ProgrammingError:
+            row = None
+        finally:
+            cursor.close()
+    return row[0] if row else None
+
+
+def _to_db(value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return value.item() if hasattr(value, "item") else value
+
+
+def build_summary_rows(df: pd.DataFrame, hashes=None):
+    """user_transactions 행들 → user_profile_summaries upsert 용 튜플 목록"""
+    features = compute_profile_features(df)
+    features["row_hash"] = (row_hashes(df) if hashes is None else hashes).to_numpy()
+    features["summary_text"] = [format_profile_summary(record) for record in features.to_dict("records")]
+    return [tuple(_to_db(value) for value in row) for row in features[FEATURE_COLUMNS].itertuples(index=False)]
+
+
+def save_summaries(conn, rows):
+    if not rows:
+        return 0
+    cursor = conn.cursor()
+    cursor.executemany(UPSERT_SQL, rows)
+    conn.commit()
+    cursor.close()
+    return len(rows)
+
+
+def save_user_row(user: dict):
+    """실시간 계산한 한 사용자의 요약을 저장 (챗봇 조회 시 저장소에 없을 때)"""
+    df = pd.DataFrame([user])
+    df["SEQ"] = df["SEQ"].astype(str)  # sync_profile_summaries 와 같은 키 형식
+    with get_connection() as conn:
+        ensure_table(conn)
+        save_summaries(conn, build_summary_rows(df))
+
+
+def iter_transaction_frames(read_conn, chunk_size=20000):
+    """user_transactions 를 SSCursor 로 스트리밍하여 DataFrame 청크로 반환합니다."""
+    stream = read_conn.cursor(pymysql.cursors.SSCursor)
+    stream.execute("SELECT * FROM user_transactions")
+    columns = [col[0] for col in stream.description]
+    try:
+        while True:
+            rows = stream.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield pd.DataFrame(rows, columns=columns)
+    finally:
+        stream.close()
+
+
+def sync_profile_summaries(frames, write_conn, full=False):
+    """
+    사용자 DataFrame 청크(frames)를 받아 원본 해시가 바뀐 사용자만 다시 계산하여 저장합니다.
+    frames 는 iter_transaction_frames() (MySQL) 또는 FeatureStore.iter_frames() (피처 저장소) 를 사용합니다.
+    """
+    ensure_table(write_conn)
+    cursor = write_conn.cursor()
+    if full:
+        cursor.execute("TRUNCATE TABLE user_profile_summaries")
+        write_conn.commit()
+    cursor.execute("SELECT SEQ, row_hash FROM user_profile_summaries")
+    existing = dict(cursor.fetchall())
+    cursor.close()
+    print("저장된 요약 {0}건 (버전 {1})".format(len(existing), SUMMARY_VERSION))
+
+    started = time.time()
+    seen, scanned, updated = set(), 0, 0
+    for df in frames:
+        df["SEQ"] = df["SEQ"].astype(str)
+        hashes = row_hashes(df)
+        seen.update(df["SEQ"])
+        scanned += len(df)
+
+        changed = (df["SEQ"].map(existing) != hashes).to_numpy()
+        if changed.any():
+            updated += save_summaries(write_conn, build_summary_rows(df[changed], hashes[changed]))
+        print("진행 중: {0}건 확인, {1}건 갱신 ({2:.1f}초)".format(scanned, updated, time.time() - started))
+
+    # user_transactions 에서 사라진 사용자 요약 삭제
+    removed = [seq for seq in existing if seq not in seen]
+    cursor = write_conn.cursor()
+    for start in range(0, len(removed), 10000):
+        part = removed[start:start + 10000]
+        cursor.execute(
+            "DELETE FROM user_profile_summaries WHERE SEQ IN ({})".format(", ".join(["%s"] * len(part))), tuple(part)
+        )
+    write_conn.commit()
+    cursor.close()
+
+    return {"scanned": scanned, "updated": updated, "removed": len(removed)}
@@ -0,0 +1,59 @@
+# 📁 llm/clients.py
+# 모델/외부 클라이언트 공용 지연 로딩 리소스
+# import 시점에는 아무것도 만들지 않고, 처음 사용하거나 워밍업 스레드가 호출할 때 한 번만 생성합니다.
+
+import os
+from dotenv import load_dotenv
+
+from utils.resources import lazy_resource
+
+load_dotenv()
+
+# ✅ 질문 인코더 결정 (모델은 로드하지 않음): 검색 인덱스에 기록된 인코더, 기록이 없으면 EMBEDDING_BACKEND
+@lazy_resource("query_encoder")
+def get_query_encoder():
+    """(backend, onnx_path, variant, encoder_name). 검색 인덱스가 아직 없으면 None (캐시되지 않음)"""
+    from models.encoder import encoder_name, resolve_index_encoder
+    retriever = get_benefit_retriever()
+    if retriever is None:
+        return None
+    backend, onnx_path, variant = resolve_index_encoder(retriever.encoder)
+    return backend, onnx_path, variant, encoder_name(backend, onnx_path, variant)
+
+
+# ✅ Sentence-BERT 임베딩 모델 (검색 인덱스와 같은 인코더, models.encoder)
+@lazy_resource("embedding_model")
+def get_embedding_model():
+    from models.encoder import load_resolved_encoder
+    spec = get_query_encoder()
+    if spec is None:
+        return None
+    backend, onnx_path, variant, _ = spec
+    return load_resolved_encoder(backend, onnx_path, variant)
+
+
+# ✅ 혜택 검색 백엔드 (RETRIEVER_BACKEND=chroma | faiss)
+@lazy_resource("benefit_retriever")
+def get_benefit_retriever():
+    from models.retriever import get_retriever
+    return get_retriever()
+
+
+# ✅ 혜택 BM25 어휘 검색 인덱스 (스냅샷이 없으면 검색 백엔드 문서로 생성)
+@lazy_resource("lexical_index")
+def get_lexical_index():
+    from models.lexical import BM25Index
+    return BM25Index.open(os.getenv("BM25_INDEX_PATH"), retriever=get_benefit_retriever())
+
+
+# ✅ OpenAI 클라이언트
+@lazy_resource("openai_client")
+def get_openai_client():
+    from openai import OpenAI
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+
+@lazy_resource("async_openai_client")
+def get_async_openai_client():
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
@@ -0,0 +1,120 @@
+# 📁 llm/embedding_cache.py
+# 질문 임베딩 LRU 캐시 (선택적으로 디스크에 저장하여 재시작 후에도 유지)
+# 키는 (인코더 이름, 정규화된 질문) 이므로 인코더가 바뀌면 이전 벡터는 다시 쓰이지 않고 LRU 로 밀려납니다.
+
+import atexit
+import os
+import pickle
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+_whitespace = re.compile(r"\s+")
+_trailing_punct = re.compile(r"[\s?？!！.~…]+$")
+
+SNAPSHOT_VERSION = 2  # 디스크 저장 형식 (2: 키에 인코더 이름 포함)
+
+
+def normalize_question(text: str) -> str:
+    """공백/전각 문자/끝 문장부호 차이만 있는 질문을 같은 키로 취급합니다."""
+    text = unicodedata.normalize("NFKC", text or "")
+    text = _whitespace.sub(" ", text).strip().lower()
+    return _trailing_punct.sub("", text)
+
+
+class EmbeddingCache:
+    def __init__(self, max_size=2048, persist_path=None, save_every=50):
+        self.max_size = max_size
+        self.persist_path = persist_path
+        self.save_every = save_every
+
+        self._items = OrderedDict()  # (인코더 이름, 정규화된 질문) → float32 벡터 (최근 사용 순)
+        self._lock = threading.Lock()
+        self._dirty = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if persist_path:
+            self.load()
+            atexit.register(self.save)
+
+    def get(self, key):
+        with self._lock:
+            vector = self._items.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, key, vector):
+        with self._lock:
+            self._items[key] = np.asarray(vector, dtype=np.float32)
+            self._items.move_to_end(key)
+            # 가장 오래 사용하지 않은 항목부터 제거 (LRU)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self.evictions += 1
+            self._dirty += 1
+            should_save = self.persist_path and self._dirty >= self.save_every
+        if should_save:
+            self.save()
+
+    def get_or_compute(self, text, encode_fn, encoder=None) -> list:
+        """캐시에 있으면 바로 반환하고, 없으면 encode_fn(정규화된 질문)으로 계산 후 저장합니다. encoder: 인코더 이름"""
+        question = normalize_question(text)
+        key = (encoder or "", question)
+        vector = self.get(key)
+        if vector is None:
+            vector = np.asarray(encode_fn(question), dtype=np.float32)
+            self.put(key, vector)
+        return vector.tolist()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._items),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0
+            }
+
+    # ✅ 디스크 저장/복원
+    def save(self):
+        if not self.persist_path:
+            return
+        with self._lock:
+            snapshot = list(self._items.items())
+            self._dirty = 0
+        directory = os.path.dirname(self.persist_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.persist_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"version": SNAPSHOT_VERSION, "items": snapshot}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.persist_path)
+
+    def load(self):
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, "rb") as f:
+                snapshot = pickle.load(f)
+        except Exception as e:
+            print("⚠️ 질문 임베딩 캐시를 읽지 못했습니다: {0} ({1})".format(self.persist_path, e))
+            return
+        if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+            # 인코더 이름 없이 저장된 이전 형식은 어떤 인코더의 벡터인지 알 수 없으므로 버림
+            print("⚠️ 인코더 정보가 없는 이전 질문 임베딩 캐시는 사용하지 않습니다: {}".format(self.persist_path))
+            return
+        with self._lock:
+            for key, vector in snapshot["items"][-self.max_size:]:
+                self._items[key] = vector
@@ -1,37 +1,53 @@
 # marketing_generator.py
+# 카드 광고 문구 생성
+# - (card_name, 혜택 내용 해시, PROMPT_VERSION) 키로 프로세스 메모리 → MySQL(marketing_copy_cache) 순서로 조회
+# - 캐시에 없는 카드만 스레드 풀에서 동시에 생성 (MARKETING_COPY_WORKERS 로 동시 요청 수 제한)
+# - 오류 문구는 저장하지 않아 다음 요청 때 다시 생성
 
+import contextvars
+import hashlib
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from openai import OpenAI
+
+from db.card_catalog import get_catalog
+from db.marketing_copy_store import fetch_copies, save_copies
+from llm.clients import get_openai_client
+from utils.telemetry import LLM_REQUESTS, LLM_TOKENS, counter, span, traced
 
 # 환경변수 로드
 load_dotenv()
 
-# OpenAI 클라이언트 초기화
-openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# 프롬프트/모델을 바꾸면 올려서 기존 캐시를 무효화
+PROMPT_VERSION = "1"
 
-# MySQL 연결
-engine = create_engine(
-    f"mysql+pymysql://{os.getenv('MYSQL_USER')}:{os.getenv('MYSQL_PASSWORD')}@{os.getenv('MYSQL_HOST')}:{os.getenv('MYSQL_PORT')}/{os.getenv('MYSQL_DATABASE')}"
-)
+_memory_cache = {}
+_memory_lock = threading.Lock()
 
-# 카드 정보 테이블 읽어오기
-card_info_df = pd.read_sql("SELECT * FROM card_info", engine)
+COPY_LOOKUPS = counter("marketing_copies_total", "광고 문구 조회 결과 (source=memory|db|generated|error)")
 
-def summarize_card_benefits_openai(card_name: str) -> str:
-    try:
-        row = card_info_df[card_info_df['Card Name'] == card_name].iloc[0]
-        benefit_columns = card_info_df.columns[8:]  # 8번째 컬럼 이후가 혜택 열
-        card_benefits = row[benefit_columns]
 
-        benefit_text = "\n".join(
-            f"- {col}: {val}" for col, val in card_benefits.items()
-            if pd.notna(val) and str(val).strip() != "0"
-        )
+def build_benefit_text(catalog, card_name):
+    row = catalog.card_info(card_name)
+    if row is None:
+        raise KeyError(f"card_info 에 {card_name} 카드가 없습니다")
+
+    # 8번째 컬럼 이후가 혜택 열
+    return "\n".join(
+        f"- {col}: {row[col]}" for col in catalog.benefit_columns
+        if pd.notna(row[col]) and str(row[col]).strip() != "0"
+    )
 
-        prompt = f"""
+
+def benefit_hash(benefit_text: str) -> str:
+    return hashlib.sha256(benefit_text.encode("utf-8")).hexdigest()
+
+
+def build_prompt(card_name: str, benefit_text: str) -> str:
+    return f"""
 {card_name} 카드는 다음과 같은 혜택이 있습니다:
 {benefit_text}
 
@@ -45,13 +61,97 @@ def summarize_card_benefits_openai(card_name: str) -> str:
 고객님, [카드 이름]으로 특별한 혜택을 만나보세요! (중략)
 ---
 """
-        completion = openai_client.chat.completions.create(
+
+
+def _generate(card_name: str, benefit_text: str) -> str:
+    LLM_REQUESTS.inc(purpose="marketing")
+    with span("llm.request", purpose="marketing", card_name=card_name):
+        completion = get_openai_client().chat.completions.create(
             model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
+            messages=[{"role": "user", "content": build_prompt(card_name, benefit_text)}],
             temperature=0.7
         )
+    if completion.usage is not None:
+        LLM_TOKENS.observe(completion.usage.prompt_tokens, kind="prompt", purpose="marketing")
+        LLM_TOKENS.observe(completion.usage.completion_tokens, kind="completion", purpose="marketing")
+    return completion.choices[0].message.content.strip()
 
-        return completion.choices[0].message.content.strip()
 
+@traced("marketing.generate")
+def generate_marketing_copies(card_names, max_workers=None, refresh=False) -> dict:
+    """
+    여러 카드의 광고 문구를 {card_name: 문구} 로 반환합니다.
+    refresh=True 이면 캐시를 무시하고 다시 생성하여 덮어씁니다.
+    """
+    card_names = list(dict.fromkeys(card_names))
+    max_workers = max_workers or int(os.getenv("MARKETING_COPY_WORKERS", "4"))
+    results, keys, benefit_texts = {}, {}, {}
+
+    try:
+        catalog = get_catalog()
     except Exception as e:
-        return f"오류 발생: {e}"
\ No newline at end of file
+        return {card_name: f"오류 발생: {e}" for card_name in card_names}
+
+    for card_name in card_names:
+        try:
+            benefit_texts[card_name] = build_benefit_text(catalog, card_name)
+        except Exception as e:
+            results[card_name] = f"오류 발생: {e}"
+            continue
+        keys[card_name] = (card_name, benefit_hash(benefit_texts[card_name]), PROMPT_VERSION)
+
+    missing = list(keys)
+    loaded = {}
+    if not refresh:
+        with _memory_lock:
+            for card_name in list(missing):
+                if keys[card_name] in _memory_cache:
+                    results[card_name] = _memory_cache[keys[card_name]]
+                    missing.remove(card_name)
+                    COPY_LOOKUPS.inc(source="memory")
+        if missing:
+            try:
+                with span("marketing.cache_lookup", cards=len(missing)):
+                    stored = fetch_copies(keys[card_name] for card_name in missing)
+            except Exception as e:
+                print(f"⚠️ 광고 문구 캐시 조회 실패: {e}")
+                stored = {}
+            for card_name in list(missing):
+                if keys[card_name] in stored:
+                    loaded[card_name] = results[card_name] = stored[keys[card_name]]
+                    missing.remove(card_name)
+                    COPY_LOOKUPS.inc(source="db")
+
+    generated = {}
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(missing))) as executor:
+            # 워커 스레드의 span 이 현재 span 아래에 기록되도록 컨텍스트를 복사해서 실행
+            futures = {
+                card_name: executor.submit(contextvars.copy_context().run, _generate, card_name, benefit_texts[card_name])
+                for card_name in missing
+            }
+            for card_name, future in futures.items():
+                try:
+                    generated[card_name] = future.result()
+                    COPY_LOOKUPS.inc(source="generated")
+                except Exception as e:
+                    results[card_name] = f"오류 발생: {e}"
+                    COPY_LOOKUPS.inc(source="error")
+        if generated:
+            try:
+                save_copies((*keys[card_name], copy_text) for card_name, copy_text in generated.items())
+            except Exception as e:
+                print(f"⚠️ 광고 문구 캐시 저장 실패: {e}")
+        results.update(generated)
+        loaded.update(generated)
+
+    # 저장된 문구와 새로 생성한 문구만 메모리에 보관 (오류 문구 제외)
+    with _memory_lock:
+        for card_name, copy_text in loaded.items():
+            _memory_cache[keys[card_name]] = copy_text
+
+    return {card_name: results[card_name] for card_name in card_names}
+
+
+def summarize_card_benefits_openai(card_name: str) -> str:
+    return generate_marketing_copies([card_name])[card_name]
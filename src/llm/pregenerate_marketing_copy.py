@@ -0,0 +1,45 @@
+# 📁 llm/pregenerate_marketing_copy.py
+# card_info 전체 카드의 광고 문구를 미리 생성하여 marketing_copy_cache 에 저장하는 오프라인 작업
+# 이미 같은 (카드, 혜택 해시, 프롬프트 버전) 으로 저장된 카드는 건너뜁니다.
+#
+# 사용법:
+#   python src/llm/pregenerate_marketing_copy.py --workers 8
+#   python src/llm/pregenerate_marketing_copy.py --refresh        # 전체 다시 생성
+
+import argparse
+import os
+import sys
+import time
+
+# src 패키지(db, llm ...) 를 import 할 수 있도록 경로 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.card_catalog import get_catalog
+from llm.marketing_generator import generate_marketing_copies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="card_info 전체 카드 광고 문구 사전 생성")
+    parser.add_argument("--workers", type=int, default=8, help="동시 OpenAI 요청 수")
+    parser.add_argument("--batch-size", type=int, default=50, help="한 번에 처리할 카드 수")
+    parser.add_argument("--refresh", action="store_true", help="캐시를 무시하고 다시 생성")
+    args = parser.parse_args()
+
+    card_names = [name for name in get_catalog().card_info_names() if name]
+    print(f"card_info 카드 {len(card_names)}개 광고 문구 생성 시작")
+
+    started = time.time()
+    failed = []
+    for start in range(0, len(card_names), args.batch_size):
+        part = card_names[start:start + args.batch_size]
+        copies = generate_marketing_copies(part, max_workers=args.workers, refresh=args.refresh)
+        failed.extend(name for name, text in copies.items() if text.startswith("오류 발생"))
+        print(f"진행 중: {min(start + args.batch_size, len(card_names))}/{len(card_names)}개 카드")
+
+    print(f"✅ 완료 ({time.time() - started:.1f}초), 실패 {len(failed)}개")
+    for name in failed:
+        print(f"❌ {name}")
+
+
+if __name__ == "__main__":
+    main()
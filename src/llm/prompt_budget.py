@@ -0,0 +1,110 @@
+# 📁 llm/prompt_budget.py
+# 토큰 예산 기반 프롬프트 구성 도구
+# - count_tokens / count_message_tokens : tiktoken 으로 gpt-4o 토큰 수 계산
+# - trim_to_relevant : 카드 혜택 문서에서 질문과 겹치는 문장만 예산 안에서 남김
+# - compress_history : 최근 대화만 그대로 두고 오래된 대화는 "질문 → 추천 카드" 한 줄로 압축
+# 대화가 길어져도 프롬프트 크기(비용/지연 시간)가 PROMPT_TOKEN_BUDGET 근처에서 유지됩니다.
+
+import os
+import re
+
+from models.lexical import tokenize
+from utils.resources import lazy_resource
+
+MODEL_NAME = "gpt-4o"
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))        # 요청 전체 (system + user)
+CARD_TOKEN_BUDGET = int(os.getenv("CARD_TOKEN_BUDGET", "350"))             # 카드 한 장의 혜택 설명
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "1200"))      # 이전 대화 전체
+KEEP_RECENT_TURNS = int(os.getenv("KEEP_RECENT_TURNS", "2"))               # 그대로 남길 최근 대화 수
+MIN_CARD_TOKENS = 80
+
+_SENTENCE_SPLIT = re.compile(r"\n+|(?<=[.!?다요])\s+")
+_CARD_NAME = re.compile(r'\d+\.\s+카드명:\s+([^\n]+)')
+
+
+@lazy_resource("tokenizer")
+def get_tokenizer():
+    import tiktoken
+    try:
+        return tiktoken.encoding_for_model(MODEL_NAME)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text) -> int:
+    return len(get_tokenizer().encode(text or ""))
+
+
+def count_message_tokens(messages) -> int:
+    # 메시지마다 role/구분자 토큰 약 4개 + 응답 시작 토큰 3개
+    return sum(count_tokens(message["content"]) + 4 for message in messages) + 3
+
+
+def truncate_tokens(text, max_tokens) -> str:
+    tokenizer = get_tokenizer()
+    tokens = tokenizer.encode(text or "")
+    if len(tokens) <= max_tokens:
+        return text
+    return tokenizer.decode(tokens[:max_tokens]).rstrip() + "…"
+
+
+def split_sentences(text):
+    return [sentence.strip() for sentence in _SENTENCE_SPLIT.split(text or "") if sentence.strip()]
+
+
+def trim_to_relevant(text, question, max_tokens) -> str:
+    """질문과 겹치는 n-gram 이 많은 문장부터 max_tokens 까지 고르고, 원래 순서대로 이어 붙입니다."""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    sentences = split_sentences(text)
+    query_terms = set(tokenize(question))
+    scored = []
+    for position, sentence in enumerate(sentences):
+        terms = tokenize(sentence)
+        overlap = sum(1 for term in terms if term in query_terms) / (len(terms) ** 0.5 or 1)
+        scored.append((overlap, -position, position, sentence))
+    scored.sort(reverse=True)
+
+    chosen, used = [], 0
+    for _, _, position, sentence in scored:
+        cost = count_tokens(sentence) + 1
+        if used + cost > max_tokens:
+            continue
+        chosen.append((position, sentence))
+        used += cost
+    if not chosen:
+        # 가장 관련 있는 문장 하나도 예산을 넘으면 잘라서 사용
+        return truncate_tokens(scored[0][3], max_tokens)
+    return "\n".join(sentence for _, sentence in sorted(chosen))
+
+
+def compress_turn(question, answer) -> str:
+    """오래된 대화 한 턴 → '질문 → 추천 카드' 한 줄 요약 (LLM 호출 없음)"""
+    cards = [name.strip() for name in _CARD_NAME.findall(answer or "")]
+    if cards:
+        return "{0} → 추천 카드: {1}".format(question, ", ".join(cards))
+    return "{0} → {1}".format(question, truncate_tokens(answer or "", 40))
+
+
+def compress_history(chat_history, max_tokens=HISTORY_TOKEN_BUDGET, keep_recent=KEEP_RECENT_TURNS) -> str:
+    """최근 keep_recent 턴은 원문(길면 잘라서), 그 이전은 한 줄 요약. 예산을 넘으면 오래된 것부터 뺍니다."""
+    if not chat_history:
+        return ""
+    chat_history = list(chat_history)
+    split = max(len(chat_history) - keep_recent, 0)
+    recent_budget = max(max_tokens // max(keep_recent, 1) // 2, 60)
+
+    blocks = []
+    for i, (q, a) in enumerate(chat_history):
+        if i < split:
+            blocks.append("[이전 대화 {0} 요약]: {1}".format(i + 1, compress_turn(q, a)))
+        else:
+            blocks.append("[이전 질문 {0}]: {1}\n[이전 답변 {2}]: {3}".format(i + 1, q, i + 1, truncate_tokens(a, recent_budget)))
+
+    costs = [count_tokens(block) + 2 for block in blocks]
+    while blocks and sum(costs) > max_tokens:
+        blocks.pop(0)
+        costs.pop(0)
+    return "\n\n".join(blocks) + "\n\n" if blocks else ""
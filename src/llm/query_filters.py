@@ -0,0 +1,83 @@
+# 📁 llm/query_filters.py
+# 질문 이해 → 검색 where 필터
+# "체크카드", "신한" 처럼 질문에 카드 유형이나 카드사가 들어 있으면 검색 후보를 해당 카드로 좁힙니다.
+# 필터 필드(card_type, company)는 insert_embeddings.py 가 혜택 청크마다 저장한 메타데이터입니다.
+
+import os
+import re
+import threading
+
+from db.card_catalog import CARD_TYPES
+
+QUERY_FILTERS = os.getenv("QUERY_FILTERS", "1") == "1"
+
+# ✅ 카드 유형 키워드 (둘 다 언급되면 필터하지 않음)
+CARD_TYPE_KEYWORDS = {
+    CARD_TYPES["C"]: ["체크카드", "체크 카드", "체크"],
+    CARD_TYPES["R"]: ["신용카드", "신용 카드", "신용"],
+}
+
+_LEADING_LATIN = re.compile(r'^[A-Za-z]+')
+_aliases = {}
+_aliases_lock = threading.Lock()
+
+
+def company_aliases(companies) -> dict:
+    """
+    카드사 이름 → 질문에서 찾을 정규식 {"하나카드": re.compile(...), ...}
+    - 전체 이름("하나카드", "KB국민카드")은 그대로 찾고
+    - 줄인 이름("하나", "KB국민", "국민")은 "하나카드", "하나 체크카드" 처럼 뒤에 카드/체크/신용이 올 때만 찾습니다.
+      ("카드 하나만", "우리 가족", "현대백화점", "롯데마트" 같은 일상 단어와 구분)
+    - 영문 약칭("KB")은 앞뒤가 영문이 아닐 때 찾습니다.
+    """
+    aliases = {}
+    for company in companies:
+        base = company.replace("(주)", "").strip()
+        short = base[:-2] if base.endswith("카드") else base
+        latin = _LEADING_LATIN.match(short)
+        full_names = [name for name in dict.fromkeys([company, base]) if len(name) >= 2]
+        short_names = [name for name in dict.fromkeys([short, _LEADING_LATIN.sub("", short)])
+                       if len(name) >= 2 and name not in full_names]
+        patterns = [re.escape(name) for name in full_names]
+        if short_names:
+            patterns.append(r'(?<![가-힣A-Za-z])(?:{})(?=\s*(?:카드|체크|신용))'.format("|".join(map(re.escape, short_names))))
+        if latin and len(latin.group(0)) >= 2 and latin.group(0) != short:
+            patterns.append(r'(?<![A-Za-z]){}(?![A-Za-z])'.format(re.escape(latin.group(0))))
+        aliases[company] = re.compile("|".join(patterns), re.IGNORECASE)
+    return aliases
+
+
+def _catalog_aliases(catalog) -> dict:
+    # 카탈로그가 다시 로드될 때만 별칭을 다시 계산
+    key = (id(catalog), catalog.version)
+    with _aliases_lock:
+        if key not in _aliases:
+            _aliases.clear()
+            _aliases[key] = company_aliases(catalog.companies())
+        return _aliases[key]
+
+
+def detect_card_type(question):
+    found = [card_type for card_type, keywords in CARD_TYPE_KEYWORDS.items() if any(keyword in question for keyword in keywords)]
+    return found[0] if len(found) == 1 else None
+
+
+def detect_companies(question, aliases) -> list:
+    return [company for company, pattern in aliases.items() if pattern.search(question)]
+
+
+def build_where(question, catalog=None):
+    """질문 → Chroma 형식 where 필터 (조건이 없으면 None)"""
+    if not QUERY_FILTERS or not question:
+        return None
+    conditions = []
+    card_type = detect_card_type(question)
+    if card_type:
+        conditions.append({"card_type": card_type})
+    if catalog is not None:
+        companies = detect_companies(question, _catalog_aliases(catalog))
+        if companies:
+            conditions.append({"company": {"$in": companies}})
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
@@ -1,194 +1,102 @@
 import os
-import pymysql
+import time
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
-import chromadb
-from openai import OpenAI
 from typing import List, Tuple
 
-# ✅ 환경 변수 로드
-load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-
-# ✅ MySQL 연결
-conn = pymysql.connect(
-    host=os.getenv("MYSQL_HOST"),
-    port=int(os.getenv("MYSQL_PORT")),
-    user=os.getenv("MYSQL_USER"),
-    password=os.getenv("MYSQL_PASSWORD"),
-    database=os.getenv("MYSQL_DATABASE"),
-    charset="utf8mb4"
+from db.pool import get_connection
+from db.card_catalog import get_catalog
+from db.profile_store import fetch_summary, save_user_row
+from db.db_utils import get_user_cluster
+from utils.user_summary import summarize_user_row
+from llm.clients import get_embedding_model, get_benefit_retriever, get_lexical_index, get_openai_client, get_query_encoder
+from llm.retrieval import HYBRID_SEARCH, search_cards
+from llm.query_filters import build_where
+from llm.embedding_cache import EmbeddingCache
+from llm.prompt_budget import (
+    PROMPT_TOKEN_BUDGET, CARD_TOKEN_BUDGET, MIN_CARD_TOKENS,
+    compress_history, count_message_tokens, count_tokens, trim_to_relevant
 )
+from llm.response_cache import ResponseCache, make_cache_key, replay_stream, record_stream
+from llm.structured_answer import STRUCTURED_OUTPUT, response_format
+from utils import telemetry
+from utils.telemetry import LLM_REQUESTS, LLM_TOKENS, TTFT_SECONDS, span, watch_cache
 
-# ✅ ChromaDB 클라이언트 초기화 (여러 경로 시도)
-chroma_client = None
-collection = None
-
-# ChromaDB 경로 후보들
-chroma_paths = [
-    "./db_backup/chroma_db",
-    "../db_backup/chroma_db",
-    "/Users/james_kyh/Downloads/card_rag_project_collab_all_users 4/db_backup/chroma_db"
-]
-
-for path in chroma_paths:
-    try:
-        print("ChromaDB 경로 시도: {}".format(path))
-        client = chromadb.PersistentClient(path=path)
-        collection = client.get_collection("card_benefits")
-        print("✅ ChromaDB 연결 성공: {}".format(path))
-        break
-    except Exception as e:
-        print("❌ ChromaDB 연결 실패: {}, 오류: {}".format(path, str(e)))
-        continue
+# ✅ 환경 변수 로드
+load_dotenv()
 
-if collection is None:
-    print("⚠️ 경고: ChromaDB 컬렉션을 찾을 수 없습니다. 먼저 insert_embeddings.py를 실행해주세요.")
+# ✅ 임베딩 모델, 검색 백엔드, OpenAI 클라이언트는 llm.clients 에서 처음 사용할 때 로드
 
-# ✅ Sentence-BERT 임베딩 모델 로드
-model = SentenceTransformer("snunlp/KR-SBERT-V40K-klueNLI-augSTS")
+# ✅ 질문 임베딩 캐시 (반복 질문은 encode 생략)
+embedding_cache = EmbeddingCache(
+    max_size=int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "2048")),
+    persist_path=os.getenv("QUERY_EMBEDDING_CACHE_PATH") or None
+)
 
-# ✅ OpenAI 클라이언트 준비
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
+def encode_question(question: str) -> list:
+    spec = get_query_encoder()
+    if spec is None:
+        # 검색 인덱스가 없으면 검색할 대상도 없으므로 모델을 로드하지 않음 (retrieve_benefits 가 빈 결과 반환)
+        return []
+    # 인코더가 바뀌면 (인덱스 재생성, ONNX 전환) 이전 인코더로 만든 캐시 벡터는 쓰지 않도록 인코더 이름도 키에 포함
+    return embedding_cache.get_or_compute(question, lambda text: get_embedding_model().encode(text), encoder=spec[3])
+
+# ✅ LLM 답변 캐시 (같은 질문 버킷 + 같은 카드 + 같은 사용자 요약이면 재사용)
+response_cache = ResponseCache(
+    max_size=int(os.getenv("RESPONSE_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+)
+watch_cache("query_embedding", embedding_cache)
+watch_cache("llm_response", response_cache)
 
 # ✅ 사용자 정보 요약 함수
 def get_user_profile_summary(user_id: str) -> str:
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM user_transactions WHERE SEQ = %s", (user_id,))
-    result = cursor.fetchone()
-    columns = [col[0] for col in cursor.description]
-    cursor.close()
-
-    if result:
-        user = dict(zip(columns, result))
-        
-        # 소비 항목 관련 컬럼들 추출
-        spending_columns = [col for col in user.keys() if col.endswith('_mean') and not col.startswith('TOT_')]
-        
-        # 소비 금액이 높은 순으로 정렬 (상위 8개만)
-        top_spending = sorted(
-            [(col.replace('_AM_mean', ''), user.get(col, 0)) for col in spending_columns],
-            key=lambda x: x[1], 
-            reverse=True
-        )[:8]
-        
-        # 소비 카테고리 매핑
-        category_mapping = {
-            "CLOTH": "쇼핑/의류",
-            "RESTRNT": "외식",
-            "TRVL": "여행",
-            "INSU": "보험",
-            "HOS": "의료/병원",
-            "CULTURE": "문화생활",
-            "OFFEDU": "교육",
-            "LEISURE_P": "레저/취미",
-            "LEISURE_S": "스포츠",
-            "DIST": "유통",
-            "GROCERY": "식료품",
-            "AUTOSL": "자동차",
-            "FUNITR": "가구/인테리어",
-            "APPLNC": "가전제품"
-        }
-        
-        summary_lines = [
-            "[사용자 정보 요약]",
-            f"- 연령대: {user['AGE_encoded']}0대",
-            f"- 성별: {'여성' if user['SEX_CD_encoded'] == 1 else '남성'}",
-            f"- 디지털 채널 이용: {'예' if user['DIGT_CHNL_USE_YN_encoded'] == 1 else '아니오'}",
-            "- 최근 소비 항목 분석 (월평균 지출):"
-        ]
-        
-        # 상위 소비 항목 추가
-        for category, amount in top_spending:
-            if amount > 0:
-                category_name = category_mapping.get(category, category)
-                summary_lines.append(f"  • {category_name}: {amount*1000:,.0f}원")
-        
-        # 주요 소비 패턴 분석
-        if user.get('TOP_SPENDING_CATEGORY_encoded'):
-            summary_lines.append("")
-            summary_lines.append("[주요 소비 패턴]")
-            summary_lines.append(f"- 최대 지출 카테고리: {category_mapping.get(user.get('TOP_SPENDING_CATEGORY_encoded'), user.get('TOP_SPENDING_CATEGORY_encoded'))}")
-            
-            # 소비 성향 분석
-            total_spending = user.get('TOT_USE_AM_mean', 0)
-            if total_spending > 0:
-                # 소비 집중도 분석
-                if top_spending and top_spending[0][1] > total_spending * 0.3:
-                    summary_lines.append(f"- 소비 성향: 특정 카테고리({category_mapping.get(top_spending[0][0], top_spending[0][0])})에 집중된 소비 패턴")
-                else:
-                    summary_lines.append(f"- 소비 성향: 다양한 카테고리에 분산된 소비 패턴")
-                
-                # 소비 규모 분석
-                if total_spending > 2.0:  # 200만원 이상
-                    summary_lines.append(f"- 소비 규모: 고액 소비자 (월평균 {total_spending*1000:,.0f}원)")
-                elif total_spending > 1.0:  # 100만원 이상
-                    summary_lines.append(f"- 소비 규모: 중간 소비자 (월평균 {total_spending*1000:,.0f}원)")
-                else:
-                    summary_lines.append(f"- 소비 규모: 소액 소비자 (월평균 {total_spending*1000:,.0f}원)")
-                
-                # 소비 패턴 분석
-                leisure_spending = sum([amount for category, amount in top_spending if category in ["TRVL", "CULTURE", "LEISURE_P", "LEISURE_S"]])
-                daily_spending = sum([amount for category, amount in top_spending if category in ["RESTRNT", "GROCERY", "DIST"]])
-                
-                if leisure_spending > daily_spending * 1.5:
-                    summary_lines.append(f"- 소비 특성: 여가/문화 활동 중심 소비자")
-                elif daily_spending > leisure_spending * 1.5:
-                    summary_lines.append(f"- 소비 특성: 일상/생활 중심 소비자")
-                else:
-                    summary_lines.append(f"- 소비 특성: 균형 있는 소비자")
-
-        return "\n".join(summary_lines)
-    return ""
-
-# ✅ 메인 함수: 개인화된 카드 추천 RAG
-def ask_card_rag(question, user_id=None, chat_history=None, top_k=5, stream=False) -> Tuple[str, List[dict], List[str]]:
-    cursor = conn.cursor()
-
-    # 1. 질문 임베딩 생성
-    query_vec = model.encode(question).tolist()
-
-    # 2. ChromaDB에서 embedding similarity 기반 검색
-    try:
-        # 최신 버전의 ChromaDB는 include_distances 파라미터를 지원
-        results = collection.query(query_embeddings=[query_vec], n_results=top_k, include_distances=True)
-    except TypeError:
-        # 이전 버전의 ChromaDB는 include_distances 파라미터를 지원하지 않음
-        results = collection.query(query_embeddings=[query_vec], n_results=top_k)
-
-    # 3. 검색 결과 확인
-    benefit_docs = results['documents'][0] if results['documents'] else []
-    metadatas = results['metadatas'][0] if results['metadatas'] else []
-    
-    # 거리 정보가 없으면 모든 결과에 순서에 따른 유사도 할당
-    if 'distances' in results and results['distances']:
-        distances = results['distances'][0]
-    else:
-        # 거리 정보가 없는 경우 순서에 따라 유사도 점수 할당 (첫 번째 결과가 가장 유사)
-        distances = [(idx * 0.1) for idx in range(len(benefit_docs))]
-
-    if not benefit_docs:
+    # 미리 계산된 요약(user_profile_summaries)을 우선 사용
+    summary = fetch_summary(user_id)
+    if summary is not None:
+        return summary
+
+    # 없으면 원본 행으로 계산하고 저장소에도 기록
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM user_transactions WHERE SEQ = %s", (user_id,))
+        result = cursor.fetchone()
+        columns = [col[0] for col in cursor.description]
         cursor.close()
-        return "죄송합니다. 해당 혜택과 관련된 카드를 찾지 못했습니다. 😥", [], []
 
-    # 4. 카드 ID로 정형 정보 조회
+    if not result:
+        return ""
+    user = dict(zip(columns, result))
+    try:
+        save_user_row(user)
+    except Exception as e:
+        print(f"⚠️ 사용자 요약 저장 실패: {e}")
+    return summarize_user_row(user)
+
+NO_RESULT_MESSAGE = "죄송합니다. 해당 혜택과 관련된 카드를 찾지 못했습니다. 😥"
+
+# ✅ 검색 단계: 질문 벡터로 혜택 청크를 검색하고 카드 단위로 집계 (llm.retrieval)
+def retrieve_benefits(query_vec, top_k=5, question=None, user_id=None):
+    retriever = get_benefit_retriever()
+    if retriever is None:
+        # 인덱스가 없으면 빈 결과 → 호출한 쪽에서 NO_RESULT_MESSAGE
+        return [], [], []
+    # 가맹점/혜택 단어가 정확히 들어간 혜택을 놓치지 않도록 BM25 결과와 합침
+    lexical = get_lexical_index() if question and HYBRID_SEARCH else None
+    # 질문의 카드 유형/카드사로 후보를 좁히고, 사용자 군집에서 많이 추천된 카드에 가중치
+    where = build_where(question, get_catalog()) if question else None
+    cluster = get_user_cluster(user_id) if user_id else None
+    return search_cards(query_vec, top_k, retriever, lexical=lexical, question=question, where=where, cluster=cluster)
+
+# ✅ context 구성 단계: 검색 결과 + 카드 카탈로그 정보로 프롬프트용 카드 목록 생성
+def build_context(benefit_docs, metadatas, distances, catalog, question=None, max_doc_tokens=None, with_card_id=False):
+    # 카드 ID로 정형 정보 조회 (메모리 카탈로그, DB 왕복 없음)
     card_ids = [meta['card_id'] for meta in metadatas]
     card_info_dict = {}
-    if card_ids:
-        placeholders = ','.join(['%s'] * len(card_ids))
-        cursor.execute(
-            f"SELECT card_id, card_name, company, image_url, card_type FROM cards WHERE card_id IN ({placeholders})",
-            tuple(card_ids)
-        )
-        for row in cursor.fetchall():
-            card_info_dict[row[0]] = {
-                "card_name": row[1],
-                "company": row[2],
-                "image_url": row[3],
-                "card_type": row[4]
-            }
-
-    # 5. context 구성
+    for card_id in card_ids:
+        card = catalog.get(card_id)
+        if card:
+            card_info_dict[card_id] = card
+
     context_lines = []
     image_info = []
     
@@ -215,31 +123,53 @@ def ask_card_rag(question, user_id=None, chat_history=None, top_k=5, stream=Fals
         company = card_info.get("company", "카드사 정보 없음")
         card_type = card_info.get("card_type", "")
         image_url = card_info.get("image_url", "")
+        if question and max_doc_tokens:
+            # 혜택 설명은 질문과 관련된 문장만 카드당 토큰 예산 안에서 사용
+            doc = trim_to_relevant(doc, question, max_doc_tokens)
         
         # 유사도 점수를 컨텍스트에 포함 (추가된 기능)
-        context_lines.append(
-            "[카드정보 #{0} (유사도: {1:.2f})]\n카드명: {2}\n카드사: {3}\n카드 유형: {4}\n혜택 설명: {5}\n카드 이미지: {6}".format(
-                original_idx+1, similarity, card_name, company, card_type, doc, image_url
-            )
+        context_line = "[카드정보 #{0} (유사도: {1:.2f})]\n카드명: {2}\n카드사: {3}\n카드 유형: {4}\n혜택 설명: {5}\n카드 이미지: {6}".format(
+            original_idx+1, similarity, card_name, company, card_type, doc, image_url
         )
+        if with_card_id:
+            # 구조화 출력 모드: 답변의 card_id 로 카드를 바로 찾을 수 있도록 ID 포함
+            context_line = context_line.replace("\n카드명:", "\n카드 ID: {}\n카드명:".format(card_id), 1)
+        context_lines.append(context_line)
         image_info.append({
             "card_id": card_id,
             "card_name": card_name,
+            "company": company,
+            "card_type": card_type,
             "image_url": image_url,
             "similarity": similarity  # 유사도 점수도 저장 (추가된 기능)
         })
     context = "\n\n".join(context_lines)
+    return context, image_info, card_ids
 
-    # 6. 유저 정보 프롬프트 요약
-    user_summary = get_user_profile_summary(user_id) if user_id else ""
+# ✅ 답변 형식 지시문 (자유 형식 / 구조화 출력)
+TEXT_ANSWER_FORMAT = """다음 형식으로 답변을 구성해주세요:
+---
+1. 카드명: [카드 이름]  
+   - 카드사 및 유형: [카드사], [카드 유형]  
+   - 관련 혜택: [context에 포함된 혜택 설명 그대로 작성]  
+   - 추천 이유: [사용자 질문과 관련된 혜택을 간략히 설명]
+2. ...
+(모든 카드에 대해 위 형식으로 추천 정보 제공)
+---"""
+
+JSON_ANSWER_FORMAT = """답변은 JSON 으로만 작성해주세요:
+- intro: 질문에 대한 한두 문장 요약 (없으면 빈 문자열)
+- cards: 추천 순서대로 카드마다 하나씩
+  - card_id: [카드 정보 목록의 카드 ID 그대로]
+  - benefits: [context에 포함된 혜택 설명을 항목별로 그대로 작성]
+  - reason: [사용자 질문과 관련된 혜택을 간략히 설명]"""
 
-    # 7. 이전 대화 프롬프트 구성
-    history_prompt = ""
-    if chat_history:
-        for i, (q, a) in enumerate(chat_history):
-            history_prompt += "[이전 질문 {0}]: {1}\n[이전 답변 {2}]: {3}\n\n".format(i+1, q, i+1, a)
+# ✅ 프롬프트 구성 단계
+def build_messages(question, context, user_summary="", chat_history=None, n_cards=0, structured=False):
+    # 이전 대화 프롬프트 구성 (최근 대화만 원문, 오래된 대화는 한 줄 요약)
+    history_prompt = compress_history(chat_history)
 
-    # 8. 전체 프롬프트 구성
+    # 전체 프롬프트 구성
     messages = [
         {
             "role": "system",
@@ -290,45 +220,128 @@ def ask_card_rag(question, user_id=None, chat_history=None, top_k=5, stream=Fals
 광고 문구나 마케팅 문구는 생성하지 마세요. 오직 객관적인 카드 정보와 혜택만 설명하세요.
 불필요한 소개나 결론을 최소화하고, 사용자 질문에 직접적으로 답변하세요.
 
-다음 형식으로 답변을 구성해주세요:
----
-1. 카드명: [카드 이름]  
-   - 카드사 및 유형: [카드사], [카드 유형]  
-   - 관련 혜택: [context에 포함된 혜택 설명 그대로 작성]  
-   - 추천 이유: [사용자 질문과 관련된 혜택을 간략히 설명]
-2. ...
-(모든 카드에 대해 위 형식으로 추천 정보 제공)
----
+{5}
 """.format(
                 user_summary,
                 '[이전 대화 기록]\n{}'.format(history_prompt) if chat_history else '',
                 question,
                 context,
-                len(result_items)
+                n_cards,
+                JSON_ANSWER_FORMAT if structured else TEXT_ANSWER_FORMAT
             )
         }
     ]
-
-    # 9. OpenAI 호출
-    cursor.close()
-    
-    if stream:
-        # 스트리밍 모드로 호출
-        completion_stream = openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=messages,
-            temperature=0.7,
-            stream=True
+    return messages
+
+# ✅ 토큰 예산 안에서 context + 프롬프트 구성
+def build_prompt(question, benefit_docs, metadatas, distances, catalog, user_summary="", chat_history=None, structured=False):
+    """(messages, image_info, card_ids). 예산을 넘으면 카드당 혜택 설명 예산을 줄여 다시 구성합니다."""
+    card_budget = CARD_TOKEN_BUDGET
+    while True:
+        context, image_info, card_ids = build_context(
+            benefit_docs, metadatas, distances, catalog, question=question, max_doc_tokens=card_budget,
+            with_card_id=structured
         )
-        return completion_stream, image_info, card_ids
-    else:
-        # 일반 모드로 호출
-        completion = openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=messages,
-            temperature=0.7
-        )
-        return completion.choices[0].message.content, image_info, card_ids
+        messages = build_messages(question, context, user_summary, chat_history, len(image_info), structured)
+        prompt_tokens = count_message_tokens(messages)
+        if prompt_tokens <= PROMPT_TOKEN_BUDGET or card_budget <= MIN_CARD_TOKENS:
+            break
+        card_budget = max(MIN_CARD_TOKENS, int(card_budget * PROMPT_TOKEN_BUDGET / prompt_tokens))
+
+    print("[prompt] tokens={0} (budget {1}, card {2}, history turns {3})".format(
+        prompt_tokens, PROMPT_TOKEN_BUDGET, card_budget, len(chat_history or [])))
+    return messages, image_info, card_ids
+
+def observe_stream(stream, started, purpose="chat"):
+    """첫 토큰까지 시간과 응답 토큰 수를 기록하면서 스트리밍 청크를 그대로 전달합니다 (텔레메트리 활성 시에만 사용)."""
+    parts = []
+    with span("llm.stream", purpose=purpose) as stream_span:
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                if not parts:
+                    TTFT_SECONDS.observe(time.perf_counter() - started)
+                parts.append(chunk.choices[0].delta.content)
+            yield chunk
+        completion_tokens = count_tokens("".join(parts))
+        stream_span.set_attribute("completion_tokens", completion_tokens)
+    LLM_TOKENS.observe(completion_tokens, kind="completion", purpose=purpose)
+
+# ✅ 메인 함수: 개인화된 카드 추천 RAG
+def ask_card_rag(question, user_id=None, chat_history=None, top_k=5, stream=False, structured=None) -> Tuple[str, List[dict], List[str]]:
+    """
+    structured=True 이면 답변이 CardAnswer JSON 입니다 (llm.structured_answer 로 파싱).
+    None 이면 STRUCTURED_OUTPUT 설정을 따르며, 검색 결과가 없을 때는 항상 NO_RESULT_MESSAGE 텍스트입니다.
+    stream=True 이면 결과가 없을 때도 NO_RESULT_MESSAGE 를 재생하는 청크 스트림을 반환합니다.
+    """
+    started = time.perf_counter()
+    if structured is None:
+        structured = STRUCTURED_OUTPUT
+    # 구조화 출력이면 JSON 스키마로 응답하도록 요청
+    format_options = {"response_format": response_format()} if structured else {}
+    with span("rag.ask", top_k=top_k, stream=stream, structured=structured) as turn:
+        # 1. 질문 임베딩 생성 (캐시 우선)
+        with span("rag.embed"):
+            query_vec = encode_question(question)
+
+        # 2~3. ChromaDB에서 embedding similarity 기반 검색
+        with span("rag.retrieve"):
+            benefit_docs, metadatas, distances = retrieve_benefits(query_vec, top_k, question, user_id)
+        if not benefit_docs:
+            # stream=True 를 호출한 쪽은 항상 청크를 순회하므로 안내 문구도 스트림 형태로 반환
+            return (replay_stream(NO_RESULT_MESSAGE) if stream else NO_RESULT_MESSAGE), [], []
+
+        # 4. 유저 정보 프롬프트 요약
+        with span("rag.user_summary"):
+            user_summary = get_user_profile_summary(user_id) if user_id else ""
+
+        # 5~8. 카드 정보 조회, context 및 이전 대화 포함 전체 프롬프트 구성 (토큰 예산 적용)
+        with span("rag.catalog"):
+            catalog = get_catalog()
+        with span("rag.build_prompt"):
+            messages, image_info, card_ids = build_prompt(
+                question, benefit_docs, metadatas, distances, catalog, user_summary, chat_history, structured
+            )
+
+        # 9. 캐시된 답변이 있으면 OpenAI 호출 없이 재생
+        cache_key = make_cache_key(query_vec, card_ids, user_summary, chat_history, structured=structured)
+        cached_answer = response_cache.get(cache_key)
+        turn.set_attribute("response_cache_hit", cached_answer is not None)
+        if cached_answer is not None:
+            if stream:
+                return replay_stream(cached_answer), image_info, card_ids
+            return cached_answer, image_info, card_ids
+
+        # 10. OpenAI 호출
+        LLM_REQUESTS.inc(purpose="chat")
+        if telemetry.ENABLED:
+            LLM_TOKENS.observe(count_message_tokens(messages), kind="prompt", purpose="chat")
+        if stream:
+            # 스트리밍 모드로 호출 (끝까지 수신되면 캐시에 저장)
+            with span("llm.request", purpose="chat"):
+                completion_stream = get_openai_client().chat.completions.create(
+                    model="gpt-4o",
+                    messages=messages,
+                    temperature=0.7,
+                    stream=True,
+                    **format_options
+                )
+            if telemetry.ENABLED:
+                completion_stream = observe_stream(completion_stream, started)
+            return record_stream(completion_stream, response_cache, cache_key), image_info, card_ids
+        else:
+            # 일반 모드로 호출
+            with span("llm.request", purpose="chat"):
+                completion = get_openai_client().chat.completions.create(
+                    model="gpt-4o",
+                    messages=messages,
+                    temperature=0.7,
+                    **format_options
+                )
+            if completion.usage is not None:
+                LLM_TOKENS.observe(completion.usage.completion_tokens, kind="completion", purpose="chat")
+            answer = completion.choices[0].message.content
+            response_cache.put(cache_key, answer)
+            return answer, image_info, card_ids
 
 # ✅ 단독 실행용
 if __name__ == "__main__":
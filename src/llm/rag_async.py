@@ -0,0 +1,193 @@
+# 📁 llm/rag_async.py
+# asyncio 기반 RAG 파이프라인 (ask_card_rag_async)
+# 서로 독립적인 단계를 동시에 실행합니다.
+#   - 사용자 요약 조회 (aiomysql)  ─┐
+#   - 질문 임베딩 → 혜택 검색       ├─ 동시에 실행 후 프롬프트 구성 → AsyncOpenAI 스트리밍
+#   - 카드 카탈로그 준비            ─┘
+
+import asyncio
+import os
+import time
+from typing import AsyncIterator, List, Tuple
+
+import aiomysql
+
+from db.pool import get_connection_params
+from db.card_catalog import get_catalog
+from db.profile_store import save_user_row
+from llm.clients import get_async_openai_client
+from llm.rag_answer import (
+    NO_RESULT_MESSAGE,
+    encode_question,
+    retrieve_benefits,
+    build_prompt,
+    response_cache,
+)
+from utils.user_summary import summarize_user_row
+from llm.response_cache import make_cache_key
+from llm.structured_answer import STRUCTURED_OUTPUT, response_format
+from llm.prompt_budget import count_message_tokens, count_tokens
+from utils import telemetry
+from utils.telemetry import LLM_REQUESTS, LLM_TOKENS, TTFT_SECONDS, span
+
+_aio_pools = {}
+
+
+# ✅ 비동기 MySQL 커넥션 풀 (이벤트 루프마다 하나)
+async def get_aio_pool():
+    loop = asyncio.get_running_loop()
+    pool = _aio_pools.get(loop)
+    if pool is None:
+        params = get_connection_params()
+        pool = await aiomysql.create_pool(
+            host=params["host"],
+            port=params["port"],
+            user=params["user"],
+            password=params["password"],
+            db=params["database"],
+            charset=params["charset"],
+            autocommit=True,
+            minsize=1,
+            maxsize=int(os.getenv("MYSQL_POOL_SIZE", "5")),
+            pool_recycle=3600  # 오래된 커넥션은 재생성
+        )
+        # 동시에 두 코루틴이 만들었으면 먼저 등록된 풀을 사용
+        existing = _aio_pools.setdefault(loop, pool)
+        if existing is not pool:
+            pool.close()
+            await pool.wait_closed()
+            pool = existing
+    return pool
+
+
+async def get_user_profile_summary_async(user_id: str) -> str:
+    with span("rag.user_summary"):
+        return await _fetch_user_profile_summary(user_id)
+
+
+async def _fetch_user_profile_summary(user_id: str) -> str:
+    pool = await get_aio_pool()
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cursor:
+            # 미리 계산된 요약(user_profile_summaries)을 우선 사용
+            try:
+                await cursor.execute("SELECT summary_text FROM user_profile_summaries WHERE SEQ = %s", (user_id,))
+                stored = await cursor.fetchone()
+            except aiomysql.ProgrammingError:
+                stored = None
+            if stored:
+                return stored[0]
+
+            await cursor.execute("SELECT * FROM user_transactions WHERE SEQ = %s", (user_id,))
+            result = await cursor.fetchone()
+            columns = [col[0] for col in cursor.description]
+
+    if not result:
+        return ""
+    # 동기 경로(get_user_profile_summary)와 같이 저장소에도 기록하여 다음 요청부터는 요약 한 건만 읽음
+    user = dict(zip(columns, result))
+    try:
+        await asyncio.to_thread(save_user_row, user)
+    except Exception as e:
+        print(f"⚠️ 사용자 요약 저장 실패: {e}")
+    return summarize_user_row(user)
+
+
+async def _empty_summary() -> str:
+    return ""
+
+
+async def _retrieve(question, top_k, user_id=None):
+    # SentenceTransformer / Chroma 는 동기 API 이므로 스레드에서 실행
+    with span("rag.embed"):
+        query_vec = await asyncio.to_thread(encode_question, question)
+    with span("rag.retrieve"):
+        benefit_docs, metadatas, distances = await asyncio.to_thread(retrieve_benefits, query_vec, top_k, question, user_id)
+    return query_vec, benefit_docs, metadatas, distances
+
+
+async def _replay(answer) -> AsyncIterator[str]:
+    yield answer
+
+
+async def _stream_tokens(messages, cache_key, started, structured=False) -> AsyncIterator[str]:
+    LLM_REQUESTS.inc(purpose="chat")
+    if telemetry.ENABLED:
+        LLM_TOKENS.observe(count_message_tokens(messages), kind="prompt", purpose="chat")
+    with span("llm.stream", purpose="chat"):
+        stream = await get_async_openai_client().chat.completions.create(
+            model="gpt-4o",
+            messages=messages,
+            temperature=0.7,
+            stream=True,
+            **({"response_format": response_format()} if structured else {})
+        )
+        parts = []
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content is not None:
+                token = chunk.choices[0].delta.content
+                if not parts:
+                    TTFT_SECONDS.observe(time.perf_counter() - started)
+                parts.append(token)
+                yield token
+    answer = "".join(parts)
+    if telemetry.ENABLED:
+        LLM_TOKENS.observe(count_tokens(answer), kind="completion", purpose="chat")
+    # 끝까지 수신된 답변만 캐시에 저장
+    response_cache.put(cache_key, answer)
+
+
+# ✅ 메인 함수: 비동기 개인화 카드 추천 RAG
+async def ask_card_rag_async(question, user_id=None, chat_history=None, top_k=5, structured=None) -> Tuple[AsyncIterator[str], List[dict], List[str]]:
+    """
+    ask_card_rag 의 asyncio 버전입니다.
+    (토큰 async generator, image_info, card_ids) 를 반환하며, 토큰은 `async for` 로 소비합니다.
+    structured 는 ask_card_rag 와 같습니다 (True 이면 토큰을 이어 붙인 결과가 CardAnswer JSON).
+    """
+    started = time.perf_counter()
+    if structured is None:
+        structured = STRUCTURED_OUTPUT
+    summary_task = asyncio.create_task(
+        get_user_profile_summary_async(user_id) if user_id else _empty_summary()
+    )
+    catalog_task = asyncio.create_task(asyncio.to_thread(get_catalog))
+
+    try:
+        query_vec, benefit_docs, metadatas, distances = await _retrieve(question, top_k, user_id)
+    except Exception:
+        summary_task.cancel()
+        catalog_task.cancel()
+        raise
+
+    if not benefit_docs:
+        summary_task.cancel()
+        catalog_task.cancel()
+        return _replay(NO_RESULT_MESSAGE), [], []
+
+    catalog, user_summary = await asyncio.gather(catalog_task, summary_task)
+    with span("rag.build_prompt"):
+        messages, image_info, card_ids = build_prompt(
+            question, benefit_docs, metadatas, distances, catalog, user_summary, chat_history, structured
+        )
+
+    cache_key = make_cache_key(query_vec, card_ids, user_summary, chat_history, structured=structured)
+    cached_answer = response_cache.get(cache_key)
+    if cached_answer is not None:
+        return _replay(cached_answer), image_info, card_ids
+
+    return _stream_tokens(messages, cache_key, started, structured), image_info, card_ids
+
+
+# ✅ 단독 실행용
+if __name__ == "__main__":
+    async def _main():
+        user_id = input("👤 사용자 ID: ")
+        question = input("❓ 질문: ")
+        tokens, images, _ = await ask_card_rag_async(question, user_id=user_id or None)
+        async for token in tokens:
+            print(token, end="", flush=True)
+        print("\n\n🖼️ 관련 카드 이미지 URL:")
+        for item in images:
+            print("{0}: {1}".format(item['card_name'], item['image_url']))
+
+    asyncio.run(_main())
@@ -0,0 +1,79 @@
+# 📁 llm/response_cache.py
+# LLM 답변 캐시
+# (질문 임베딩 버킷, 검색된 card_id 집합, 사용자 요약 해시) 가 같으면 gpt-4o 호출 없이 이전 답변을 재생합니다.
+
+import hashlib
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+
+from utils.ttl_cache import TTLCache
+
+# 프롬프트 형식이 바뀌면 올려서 이전 답변을 무효화
+PROMPT_VERSION = "1"
+
+_planes = {}
+_planes_lock = threading.Lock()
+
+
+def _hyperplanes(dim, n_bits, seed):
+    key = (dim, n_bits, seed)
+    with _planes_lock:
+        if key not in _planes:
+            _planes[key] = np.random.default_rng(seed).standard_normal((n_bits, dim)).astype(np.float32)
+        return _planes[key]
+
+
+def embedding_bucket(vector, n_bits=16, seed=20240501) -> str:
+    """랜덤 초평면 SimHash 로 비슷한 질문 임베딩을 같은 버킷에 묶습니다."""
+    vector = np.asarray(vector, dtype=np.float32)
+    bits = (_hyperplanes(vector.shape[0], n_bits, seed) @ vector) > 0
+    return "".join("1" if bit else "0" for bit in bits)
+
+
+def _digest(text) -> str:
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+
+def make_cache_key(query_vec, card_ids, user_summary, chat_history=None, model="gpt-4o", structured=False) -> str:
+    history_text = "\n".join("{0}\n{1}".format(q, a) for q, a in chat_history) if chat_history else ""
+    parts = [
+        PROMPT_VERSION,
+        model + (":json" if structured else ""),
+        embedding_bucket(query_vec),
+        ",".join(str(card_id) for card_id in sorted(card_ids)),
+        _digest(user_summary),
+        _digest(history_text)
+    ]
+    return _digest("|".join(parts))
+
+
+class ResponseCache(TTLCache):
+    """LLM 답변 캐시 (utils.ttl_cache.TTLCache). 비어 있는 답변(중단/실패한 스트림)은 저장하지 않습니다."""
+
+    def put(self, key, answer):
+        if not answer:
+            return
+        super().put(key, answer)
+
+
+# ✅ OpenAI 스트리밍 인터페이스 호환 (chunk.choices[0].delta.content)
+def _chunk(content):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content), finish_reason=None)])
+
+
+def replay_stream(answer, chunk_size=40):
+    """캐시된 답변을 app.py 가 소비하는 스트리밍 청크 형태로 재생합니다."""
+    for start in range(0, len(answer), chunk_size):
+        yield _chunk(answer[start:start + chunk_size])
+
+
+def record_stream(stream, cache, key):
+    """스트림을 그대로 전달하면서 끝까지 소비되면 전체 답변을 캐시에 저장합니다."""
+    parts = []
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content is not None:
+            parts.append(chunk.choices[0].delta.content)
+        yield chunk
+    cache.put(key, "".join(parts))
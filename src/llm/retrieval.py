@@ -0,0 +1,127 @@
+# 📁 llm/retrieval.py
+# 혜택 청크 검색 → 카드 단위 집계
+# 검색 백엔드는 혜택 한 줄(청크)마다 벡터를 가지므로, 청크 검색 결과를 card_id 별로 모아
+# 카드 점수(max 또는 상위 m 개 평균)를 계산하고, 프롬프트에는 질문과 맞은 혜택 줄만 전달합니다.
+# BM25 어휘 검색 결과도 같은 방식으로 카드 단위로 모은 뒤 RRF 로 합칩니다.
+# 카드 단위로 합친 문서 컬렉션(card_benefits)을 쓰는 환경에서도 카드당 청크가 하나인 경우로 똑같이 동작합니다.
+# where 필터(질문의 카드 유형/카드사)로 좁힌 결과가 부족하면 필터 없이 다시 검색하고,
+# 사용자 군집이 주어지면 청크 메타데이터의 군집 친화도(cluster_<n>)만큼 카드 점수를 올립니다.
+
+import os
+
+from models.lexical import reciprocal_rank_fusion
+from utils.telemetry import span
+
+CHUNK_CANDIDATES = int(os.getenv("CHUNK_CANDIDATES", "8"))    # 청크 후보 수 = top_k × N
+CHUNK_TOP_M = int(os.getenv("CHUNK_TOP_M", "3"))              # 카드당 사용할 상위 혜택 줄 수
+CARD_SCORE_MODE = os.getenv("CARD_SCORE_MODE", "max")         # max | sum (상위 m 개 합 / m)
+
+# ✅ 어휘(BM25) + 벡터 하이브리드 검색 설정
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "1") == "1"
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+# ✅ 메타데이터 필터 / 군집 가중치 설정
+FILTER_MIN_CARDS = int(os.getenv("FILTER_MIN_CARDS", "1"))    # 필터 결과가 이보다 적으면 필터 없이 재검색
+CLUSTER_BOOST = float(os.getenv("CLUSTER_BOOST", "0.05"))     # 카드 점수 += CLUSTER_BOOST × 군집 친화도
+
+
+def cluster_field(cluster) -> str:
+    """청크 메타데이터의 군집 친화도 필드 이름 (insert_embeddings.py 와 공통)"""
+    return "cluster_{}".format(int(cluster))
+
+
+def aggregate_chunks(documents, metadatas, similarities, top_m=CHUNK_TOP_M, mode=CARD_SCORE_MODE):
+    """청크 검색 결과 → [{"card_id", "meta", "lines": [(유사도, 문장), ...], "score"}] (점수 내림차순)"""
+    cards = {}
+    for doc, meta, similarity in zip(documents, metadatas, similarities):
+        entry = cards.setdefault(meta['card_id'], {"card_id": meta['card_id'], "meta": meta, "lines": []})
+        if all(doc != text for _, text in entry["lines"]):
+            entry["lines"].append((similarity, doc))
+
+    for entry in cards.values():
+        entry["lines"].sort(key=lambda line: line[0], reverse=True)
+        top = [similarity for similarity, _ in entry["lines"][:top_m]]
+        entry["score"] = max(top) if mode == "max" else sum(top) / top_m
+    return sorted(cards.values(), key=lambda entry: entry["score"], reverse=True)
+
+
+def boost_by_cluster(cards, cluster, weight=CLUSTER_BOOST):
+    """사용자 군집에서 많이 추천된 카드일수록 점수를 올리고 다시 정렬합니다."""
+    if cluster is None or not weight:
+        return cards
+    field = cluster_field(cluster)
+    for entry in cards:
+        entry["score"] += weight * float(entry["meta"].get(field) or 0.0)
+    return sorted(cards, key=lambda entry: entry["score"], reverse=True)
+
+
+def dense_card_hits(retriever, query_vec, top_k, where=None):
+    documents, metadatas, distances = retriever.query(query_vec, top_k * CHUNK_CANDIDATES, where=where)
+    if not distances:
+        # 거리 정보가 없는 경우 순서에 따라 유사도 점수 할당 (첫 번째 결과가 가장 유사)
+        distances = [(idx * 0.1) for idx in range(len(documents))]
+    return aggregate_chunks(documents, metadatas, [1.0 - distance for distance in distances])
+
+
+def lexical_card_hits(lexical, question, top_k, where=None):
+    hits = lexical.search(question, top_k * CHUNK_CANDIDATES, where=where)
+    if not hits:
+        return []
+    best = hits[0][1]
+    return aggregate_chunks(
+        [lexical.documents[row] for row, _ in hits],
+        [lexical.metadatas[row] for row, _ in hits],
+        [score / best for _, score in hits]
+    )
+
+
+def _card_text(*entries, top_m=CHUNK_TOP_M):
+    """카드별로 각 검색에서 맞은 상위 혜택 줄만 합칩니다 (중복 제거)."""
+    lines = []
+    for entry in entries:
+        if entry is None:
+            continue
+        for _, text in entry["lines"][:top_m]:
+            if text not in lines:
+                lines.append(text)
+    return "\n".join(lines)
+
+
+def search_cards(query_vec, top_k, retriever, lexical=None, question=None, where=None, cluster=None):
+    """
+    (benefit_docs, metadatas, distances) 를 카드 단위로 반환합니다.
+    benefit_docs 는 카드별로 맞은 혜택 줄, distances 는 1 - 카드 점수 (RRF 사용 시 1 - RRF 점수 / 최대 점수).
+    where 로 찾은 카드가 FILTER_MIN_CARDS 보다 적으면 필터 없이 다시 검색합니다.
+    """
+    results = _search_cards(query_vec, top_k, retriever, lexical, question, where, cluster)
+    if where and len(results[0]) < FILTER_MIN_CARDS:
+        print("[retrieval] 필터 {0} 결과 {1}개 → 필터 없이 재검색".format(where, len(results[0])))
+        results = _search_cards(query_vec, top_k, retriever, lexical, question, None, cluster)
+    return results
+
+
+def _search_cards(query_vec, top_k, retriever, lexical, question, where, cluster):
+    with span("retrieval.dense", candidates=top_k * CHUNK_CANDIDATES, filtered=bool(where)):
+        dense = boost_by_cluster(dense_card_hits(retriever, query_vec, top_k, where), cluster)
+    if lexical is None or not question:
+        cards = dense[:top_k]
+        return [_card_text(entry) for entry in cards], [entry["meta"] for entry in cards], \
+            [1.0 - entry["score"] for entry in cards]
+
+    # 가맹점/혜택 단어가 정확히 들어간 혜택을 놓치지 않도록 BM25 결과와 card_id 기준 RRF 로 합침
+    with span("retrieval.lexical"):
+        lexical_hits = lexical_card_hits(lexical, question, top_k, where)
+    dense_by_card = {entry["card_id"]: entry for entry in dense}
+    lexical_by_card = {entry["card_id"]: entry for entry in lexical_hits}
+    fused = reciprocal_rank_fusion(
+        [[entry["card_id"] for entry in dense], [entry["card_id"] for entry in lexical_hits]], k=RRF_K
+    )[:top_k]
+
+    best = 2.0 / (RRF_K + 1)  # 두 검색 모두 1위일 때의 점수
+    benefit_docs, metadatas, distances = [], [], []
+    for card_id, score in fused:
+        dense_entry, lexical_entry = dense_by_card.get(card_id), lexical_by_card.get(card_id)
+        benefit_docs.append(_card_text(dense_entry, lexical_entry))
+        metadatas.append((dense_entry or lexical_entry)["meta"])
+        distances.append(1.0 - score / best)
+    return benefit_docs, metadatas, distances
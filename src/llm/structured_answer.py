@@ -0,0 +1,151 @@
+# 📁 llm/structured_answer.py
+# 구조화 출력(JSON 모드) 답변 스키마와 스트리밍 증분 파서
+# STRUCTURED_OUTPUT=1 이면 gpt-4o 에 자유 형식 "1. 카드명: ..." 대신 CardAnswer JSON 스키마로 답하도록 요청합니다.
+# 카드 객체 하나가 닫히는 즉시 CardStreamParser 가 꺼내 주므로 화면은 카드 단위로 바로 그릴 수 있고,
+# 답변을 정규식으로 다시 나누는 후처리가 필요 없습니다.
+
+import json
+import os
+from typing import List
+
+from pydantic import BaseModel, ConfigDict, ValidationError
+
+# ✅ 구조화 출력 사용 여부 (기본 꺼짐: 기존 자유 형식 답변)
+STRUCTURED_OUTPUT = os.getenv("STRUCTURED_OUTPUT", "0") == "1"
+
+
+# ✅ 답변 스키마 (strict 모드: 모든 필드 필수, 추가 필드 금지)
+class CardRecommendation(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    card_id: str
+    benefits: List[str]
+    reason: str
+
+
+class CardAnswer(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    intro: str
+    cards: List[CardRecommendation]
+
+
+def response_format() -> dict:
+    """chat.completions.create(response_format=...) 에 넘길 JSON 스키마"""
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": "card_answer", "strict": True, "schema": CardAnswer.model_json_schema()}
+    }
+
+
+class CardStreamParser:
+    """
+    스트리밍으로 들어오는 CardAnswer JSON 조각을 이어 붙이면서,
+    최상위 객체의 배열(cards) 안에서 닫힌 카드 객체를 바로 CardRecommendation 으로 돌려줍니다.
+    문자열 안의 괄호/따옴표는 무시하도록 문자열·이스케이프 상태를 같이 추적합니다.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.intro = None
+        self.cards = []
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._card_start = None
+        self._expect_key = False
+        self._last_key = None
+        self._string_start = None
+
+    def feed(self, text) -> List[CardRecommendation]:
+        """새 조각을 추가하고 이번에 완성된 카드 목록을 반환합니다."""
+        self.buffer += text
+        completed = []
+        buffer = self.buffer
+        for pos in range(self._pos, len(buffer)):
+            ch = buffer[pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._end_string(pos)
+                continue
+            if ch == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif ch in "{[":
+                if ch == "{" and self._stack == ["{", "["]:
+                    self._card_start = pos
+                self._stack.append(ch)
+                self._expect_key = self._stack == ["{"]
+            elif self._stack == ["{"] and ch in ",:":
+                self._expect_key = ch == ","
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if ch == "}" and self._stack == ["{", "["] and self._card_start is not None:
+                    card = self._parse_card(buffer[self._card_start:pos + 1])
+                    self._card_start = None
+                    if card is not None:
+                        self.cards.append(card)
+                        completed.append(card)
+        self._pos = len(buffer)
+        return completed
+
+    def _end_string(self, pos):
+        # 최상위 객체의 키를 기억해 두었다가 "intro" 값이 닫히면 소개 문단으로 저장
+        if self._stack != ["{"]:
+            return
+        value = json.loads(self.buffer[self._string_start:pos + 1])
+        if self._expect_key:
+            self._last_key = value
+        elif self._last_key == "intro":
+            self.intro = value
+
+    @staticmethod
+    def _parse_card(text):
+        try:
+            return CardRecommendation.model_validate_json(text)
+        except ValidationError as e:
+            print(f"⚠️ 구조화 답변 카드 파싱 실패: {e}")
+            return None
+
+    def result(self) -> CardAnswer:
+        """스트림이 끝난 뒤 전체 답변 (전체 JSON 이 깨졌으면 지금까지 완성된 카드만)"""
+        try:
+            return CardAnswer.model_validate_json(self.buffer)
+        except ValidationError as e:
+            print(f"⚠️ 구조화 답변 전체 파싱 실패, 완성된 카드 {len(self.cards)}개만 사용: {e}")
+            return CardAnswer(intro=self.intro or "", cards=list(self.cards))
+
+
+def parse_answer(text) -> CardAnswer:
+    """스트리밍이 아닌 응답/캐시된 응답 전체를 한 번에 파싱"""
+    parser = CardStreamParser()
+    parser.feed(text)
+    return parser.result()
+
+
+def answer_to_text(answer: CardAnswer, image_info) -> str:
+    """
+    구조화 답변 → 기존 "1. 카드명: ..." 형식 텍스트.
+    대화 기록(compress_history 의 카드명 요약)과 이전 세션 화면이 그대로 동작하도록 저장용으로 사용합니다.
+    """
+    cards_by_id = {str(card["card_id"]): card for card in image_info or []}
+    lines = [answer.intro.strip()] if answer.intro.strip() else []
+    for rank, card in enumerate(answer.cards, start=1):
+        info = cards_by_id.get(card.card_id, {})
+        company = ", ".join(part for part in (info.get("company"), info.get("card_type")) if part)
+        block = ["{0}. 카드명: {1}".format(rank, info.get("card_name", card.card_id))]
+        if company:
+            block.append("   - 카드사 및 유형: {}".format(company))
+        if card.benefits:
+            block.append("   - 관련 혜택:")
+            block.extend("     • {}".format(benefit) for benefit in card.benefits)
+        block.append("   - 추천 이유: {}".format(card.reason))
+        lines.append("\n".join(block))
+    return "\n\n".join(lines)
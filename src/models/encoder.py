@@ -0,0 +1,349 @@
+# 📁 models/encoder.py
+# KR-SBERT 문장 인코더 백엔드 (EMBEDDING_BACKEND=torch | onnx)
+# - torch : sentence-transformers 원본 모델 (기본)
+# - onnx  : ONNX Runtime 으로 내보낸 같은 모델, int8 동적 양자화본(기본) 또는 fp32
+# 두 백엔드 모두 SentenceTransformer 와 같은 encode(sentences, batch_size=...) 인터페이스를 제공합니다.
+# ONNX 모델은 `check` 로 torch 모델과의 코사인 일치도를 확인해 기준을 통과한 경우에만 사용됩니다.
+#
+# 사용법:
+#   python src/models/encoder.py export                 # ./db_backup/onnx/kr-sbert 에 fp32 + int8 모델 저장
+#   python src/models/encoder.py check --tolerance 0.99 # 혜택 코퍼스로 torch 와 비교하고 결과를 meta.json 에 기록
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+# src 패키지(db, llm, models ...) 를 import 할 수 있도록 경로 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.retriever import normalize_rows
+
+MODEL_NAME = "snunlp/KR-SBERT-V40K-klueNLI-augSTS"
+
+# ONNX 모델 경로 후보들
+ONNX_PATHS = [
+    "./db_backup/onnx/kr-sbert",
+    "../db_backup/onnx/kr-sbert"
+]
+
+ONNX_FILES = {"fp32": "model.onnx", "int8": "model_int8.onnx"}
+DEFAULT_TOLERANCE = 0.99  # 혜택 문장별 torch 와의 코사인 유사도 평균 최소값
+
+
+def get_backend():
+    return os.getenv("EMBEDDING_BACKEND", "torch").lower()
+
+
+def get_variant():
+    return os.getenv("ONNX_VARIANT", "int8").lower()
+
+
+def find_onnx_path(path=None):
+    for candidate in ([path] if path else ONNX_PATHS):
+        if candidate and os.path.exists(os.path.join(candidate, "meta.json")):
+            return candidate
+    return None
+
+
+def read_meta(path):
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_meta(path, meta):
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+
+class OnnxEncoder:
+    def __init__(self, path, variant="int8", threads=None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        meta = read_meta(path)
+        if variant not in meta["files"]:
+            raise FileNotFoundError("{0} 에 {1} 모델이 없습니다. export 를 다시 실행해주세요.".format(path, variant))
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = threads or int(os.getenv("ONNX_THREADS", "0"))
+        if threads:
+            options.intra_op_num_threads = threads
+
+        self.path = path
+        self.variant = variant
+        self.meta = meta
+        self.session = ort.InferenceSession(
+            os.path.join(path, meta["files"][variant]), options, providers=["CPUExecutionProvider"]
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(path)
+        self.input_names = [item.name for item in self.session.get_inputs()]
+        self.max_seq_length = meta["max_seq_length"]
+        self.pooling = meta["pooling"]
+        self.normalize = meta.get("normalize", False)
+        self.dimension = meta["dimension"]
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def _pool(self, hidden, attention_mask):
+        if self.pooling == "cls":
+            return hidden[:, 0]
+        mask = attention_mask[..., None].astype(np.float32)
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def encode(self, sentences, batch_size=32, show_progress_bar=False, convert_to_numpy=True,
+               normalize_embeddings=False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+
+        # 길이가 비슷한 문장끼리 묶어 패딩 토큰 계산을 줄임 (SentenceTransformer 와 같은 방식)
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        for start in range(0, len(texts), batch_size):
+            rows = order[start:start + batch_size]
+            batch = self.tokenizer(
+                [texts[row] for row in rows], padding=True, truncation=True,
+                max_length=self.max_seq_length, return_tensors="np"
+            )
+            feeds = {name: batch[name].astype(np.int64) for name in self.input_names}
+            hidden = self.session.run(None, feeds)[0]
+            embeddings[rows] = self._pool(hidden, batch["attention_mask"])
+            if show_progress_bar:
+                print("진행 중: {0}/{1}개 문장 인코딩".format(min(start + batch_size, len(texts)), len(texts)))
+
+        if self.normalize or normalize_embeddings:
+            embeddings = normalize_rows(embeddings)
+        return embeddings[0] if single else embeddings
+
+
+def load_torch_encoder():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(MODEL_NAME, device="cpu")
+
+
+def resolve_backend(backend=None, path=None, variant=None):
+    """
+    사용할 인코더를 모델을 로드하지 않고 결정합니다. 반환: ("torch", None, None) 또는 ("onnx", 경로, 변형)
+    ONNX 모델이 없거나 정확도 확인(check)을 통과하지 못했으면 경고 후 torch 를 사용합니다.
+    """
+    backend = backend or get_backend()
+    if backend == "torch":
+        return "torch", None, None
+    if backend != "onnx":
+        raise ValueError("알 수 없는 EMBEDDING_BACKEND: {} (torch | onnx)".format(backend))
+
+    variant = variant or get_variant()
+    onnx_path = find_onnx_path(path or os.getenv("ONNX_MODEL_PATH"))
+    if onnx_path is None:
+        print("⚠️ 경고: ONNX 모델을 찾을 수 없어 torch 모델을 사용합니다. encoder.py export 를 먼저 실행해주세요.")
+        return "torch", None, None
+
+    agreement = read_meta(onnx_path).get("agreement", {}).get(variant)
+    if not (agreement and agreement["passed"]) and os.getenv("ONNX_REQUIRE_CHECK", "1") == "1":
+        print("⚠️ 경고: {0} ONNX 모델이 정확도 확인을 통과하지 않아 torch 모델을 사용합니다. "
+              "encoder.py check 를 먼저 실행해주세요.".format(variant))
+        return "torch", None, None
+    return "onnx", onnx_path, variant
+
+
+def encoder_name(backend="torch", path=None, variant=None) -> str:
+    """임베딩 내용 해시에 쓰는 인코더 이름. 백엔드가 바뀌면 저장된 임베딩도 다시 만들어야 하므로 구분합니다."""
+    if backend == "onnx":
+        return "{0}#onnx-{1}".format(MODEL_NAME, variant)
+    return MODEL_NAME
+
+
+def parse_encoder_name(name):
+    """encoder_name() 의 역변환: "모델#onnx-int8" → ("onnx", "int8"), 모델 → ("torch", None)"""
+    model_name, _, variant = name.partition("#onnx-")
+    if model_name != MODEL_NAME:
+        raise ValueError("지원하지 않는 인코더: {}".format(name))
+    return ("onnx", variant) if variant else ("torch", None)
+
+
+def resolve_index_encoder(index_encoder=None, path=None):
+    """
+    검색 인덱스를 만든 인코더(컬렉션/FAISS 메타데이터의 encoder)와 같은 인코더를 결정합니다.
+    질문과 문서를 다른 인코더로 임베딩하면 거리가 어긋나므로 EMBEDDING_BACKEND 보다 인덱스 기록을 따릅니다.
+    기록이 없는 이전 인덱스는 resolve_backend() 결과를 그대로 사용합니다.
+    """
+    if not index_encoder:
+        print("⚠️ 경고: 검색 인덱스에 인코더 기록이 없어 EMBEDDING_BACKEND 설정을 사용합니다. "
+              "insert_embeddings.py 를 다시 실행하면 기록됩니다.")
+        return resolve_backend(path=path)
+
+    backend, variant = parse_encoder_name(index_encoder)
+    if backend == "torch":
+        resolved = ("torch", None, None)
+    else:
+        # 인덱스를 만들 때 이미 이 변형으로 임베딩했으므로 정확도 확인(check) 결과는 다시 보지 않음
+        onnx_path = find_onnx_path(path or os.getenv("ONNX_MODEL_PATH"))
+        if onnx_path is None or variant not in read_meta(onnx_path)["files"]:
+            raise RuntimeError("검색 인덱스는 {0} 로 만들어졌지만 해당 ONNX 모델을 찾을 수 없습니다. "
+                               "encoder.py export 를 실행하거나 insert_embeddings.py 로 인덱스를 다시 만들어주세요."
+                               .format(index_encoder))
+        resolved = ("onnx", onnx_path, variant)
+
+    configured = (get_backend(), get_variant() if get_backend() == "onnx" else None)
+    if configured != (backend, variant):
+        print("⚠️ 경고: EMBEDDING_BACKEND 설정과 달리 검색 인덱스를 만든 인코더({})를 사용합니다.".format(index_encoder))
+    return resolved
+
+
+def load_resolved_encoder(backend, onnx_path=None, variant=None):
+    if backend == "onnx":
+        print("✅ ONNX 인코더 로드: {0} ({1})".format(onnx_path, variant))
+        return OnnxEncoder(onnx_path, variant=variant)
+    return load_torch_encoder()
+
+
+def load_encoder(backend=None, path=None, variant=None):
+    """EMBEDDING_BACKEND 에 맞는 인코더 (SentenceTransformer 또는 OnnxEncoder) 를 반환합니다."""
+    return load_resolved_encoder(*resolve_backend(backend, path, variant))
+
+
+# ✅ ONNX 내보내기 + int8 동적 양자화
+def export_onnx(output_dir, model_name=MODEL_NAME, quantize=True, opset=17):
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer, pooling = model[0], model[1]
+    os.makedirs(output_dir, exist_ok=True)
+    transformer.tokenizer.save_pretrained(output_dir)
+
+    sample = transformer.tokenizer(["스타벅스 결제 시 10% 할인"], return_tensors="pt")
+    input_names = list(sample.keys())
+    auto_model = transformer.auto_model.eval()
+
+    class _HiddenStates(torch.nn.Module):
+        # 풀링은 numpy 에서 하므로 마지막 hidden state 만 내보냄
+        def forward(self, *inputs):
+            return auto_model(**dict(zip(input_names, inputs)), return_dict=True).last_hidden_state
+
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+    fp32_path = os.path.join(output_dir, ONNX_FILES["fp32"])
+    with torch.no_grad():
+        torch.onnx.export(
+            _HiddenStates(), tuple(sample[name] for name in input_names), fp32_path,
+            input_names=input_names, output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes, opset_version=opset
+        )
+    files = {"fp32": ONNX_FILES["fp32"]}
+    print("✅ ONNX 모델 저장: {}".format(fp32_path))
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = os.path.join(output_dir, ONNX_FILES["int8"])
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        files["int8"] = ONNX_FILES["int8"]
+        print("✅ int8 동적 양자화 모델 저장: {0} ({1:.0f}MB → {2:.0f}MB)".format(
+            int8_path, os.path.getsize(fp32_path) / 2 ** 20, os.path.getsize(int8_path) / 2 ** 20))
+
+    write_meta(output_dir, {
+        "model_name": model_name,
+        "files": files,
+        "max_seq_length": model.max_seq_length,
+        "pooling": "cls" if pooling.pooling_mode_cls_token else "mean",
+        "normalize": any(type(module).__name__ == "Normalize" for module in model),
+        "dimension": model.get_sentence_embedding_dimension(),
+        "agreement": {}
+    })
+    return output_dir
+
+
+# ✅ 정확도 확인: 같은 문장에 대한 torch / ONNX 임베딩 비교
+def compare_embeddings(reference, candidate, top_k=5):
+    """
+    문장별 코사인 유사도(평균/최소/하위 1%)와, 각 문장을 질문으로 삼았을 때
+    코퍼스 내 top-k 이웃이 얼마나 같은지(top_k_overlap)를 반환합니다.
+    """
+    reference, candidate = normalize_rows(reference), normalize_rows(candidate)
+    cosine = (reference * candidate).sum(axis=1)
+
+    k = min(top_k + 1, len(reference))
+    ref_top = np.argsort(-(reference @ reference.T), axis=1)[:, :k]
+    cand_top = np.argsort(-(candidate @ reference.T), axis=1)[:, :k]
+    overlap = np.mean([len(set(a) & set(b)) / k for a, b in zip(ref_top, cand_top)])
+    return {
+        "mean_cosine": float(cosine.mean()),
+        "min_cosine": float(cosine.min()),
+        "p01_cosine": float(np.percentile(cosine, 1)),
+        "top_k_overlap": float(overlap)
+    }
+
+
+def load_corpus(limit=None):
+    """혜택 청크 문장 (insert_embeddings 가 임베딩하는 것과 같은 문장)"""
+    import pandas as pd
+    from models.insert_embeddings import build_benefit_chunks
+
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    chunks = build_benefit_chunks(pd.read_csv(os.path.join(root, "data", "benefits.csv")))
+    texts = [text for _, text in (chunks[key] for key in sorted(chunks))]
+    return texts[:limit] if limit else texts
+
+
+def check_onnx(path, texts, tolerance=DEFAULT_TOLERANCE, batch_size=64):
+    """torch 모델과 비교해 변형(fp32/int8)별 결과를 meta.json 의 agreement 에 기록합니다."""
+    meta = read_meta(path)
+    torch_model = load_torch_encoder()
+    started = time.perf_counter()
+    reference = torch_model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+    print("[torch] {0}개 문장 {1:.1f}초".format(len(texts), time.perf_counter() - started))
+
+    results = {}
+    for variant in meta["files"]:
+        encoder = OnnxEncoder(path, variant=variant)
+        started = time.perf_counter()
+        candidate = encoder.encode(texts, batch_size=batch_size)
+        elapsed = time.perf_counter() - started
+        result = compare_embeddings(reference, candidate)
+        result.update({"tolerance": tolerance, "passed": result["mean_cosine"] >= tolerance, "texts": len(texts)})
+        results[variant] = result
+        print("[onnx-{0}] {1:.1f}초, 코사인 평균 {2:.4f} / 최소 {3:.4f}, top-k 일치 {4:.3f} → {5}".format(
+            variant, elapsed, result["mean_cosine"], result["min_cosine"], result["top_k_overlap"],
+            "통과" if result["passed"] else "실패"))
+
+    meta["agreement"] = results
+    write_meta(path, meta)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KR-SBERT ONNX 내보내기 / 정확도 확인")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="ONNX(fp32) 내보내기 + int8 동적 양자화")
+    export.add_argument("--output", default=ONNX_PATHS[0])
+    export.add_argument("--no-quantize", action="store_true", help="int8 양자화 모델은 만들지 않음")
+    export.add_argument("--opset", type=int, default=17)
+
+    check = sub.add_parser("check", help="혜택 코퍼스로 torch 모델과 코사인 일치도 확인")
+    check.add_argument("--path", default=None)
+    check.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="코사인 유사도 평균 최소값")
+    check.add_argument("--limit", type=int, default=None, help="비교할 최대 문장 수")
+    check.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_onnx(args.output, quantize=not args.no_quantize, opset=args.opset)
+        return
+
+    path = find_onnx_path(args.path)
+    if path is None:
+        raise SystemExit("ONNX 모델을 찾을 수 없습니다. export 를 먼저 실행해주세요.")
+    results = check_onnx(path, load_corpus(args.limit), tolerance=args.tolerance, batch_size=args.batch_size)
+    if not all(result["passed"] for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,21 @@
+import argparse
+import hashlib
 import pandas as pd
-from sentence_transformers import SentenceTransformer
 import chromadb
 import os
+import sys
+
+import pymysql
+
+# src 패키지(db, llm, models ...) 를 import 할 수 있도록 경로 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.retriever import FAISS_PATHS, COLLECTION_NAME, CHUNK_COLLECTION_NAME, export_faiss_index, record_encoder
+from models.lexical import BM25_PATHS, export_bm25_index
+from models.encoder import MODEL_NAME, OnnxEncoder, encoder_name, load_torch_encoder, resolve_backend
+from db.pool import get_connection
+from db.card_catalog import normalize_card_type
+from llm.retrieval import cluster_field
 
 # ChromaDB 경로 후보들
 chroma_paths = [
@@ -10,83 +24,243 @@ chroma_paths = [
     "/Users/james_kyh/Downloads/card_rag_project_collab_all_users 4/db_backup/chroma_db"
 ]
 
+# 의미 없는 문구가 포함된 혜택은 제외
+SKIP_PHRASES = ["확인", "변동될 수 있습니다", "주의사항", "유의사항"]
+
+
 # 적절한 ChromaDB 경로 찾기
-chroma_client = None
-for path in chroma_paths:
-    try:
-        print(f"ChromaDB 경로 시도: {path}")
-        chroma_client = chromadb.PersistentClient(path=path)
-        # 간단한 작업으로 연결 테스트
+def connect_chroma():
+    for path in chroma_paths:
         try:
-            chroma_client.list_collections()
-            print(f"✅ ChromaDB 연결 성공: {path}")
-            break
-        except:
-            raise Exception("연결 테스트 실패")
-    except Exception as e:
-        print(f"❌ ChromaDB 연결 실패: {path}, 오류: {str(e)}")
-        continue
-
-if chroma_client is None:
+            print(f"ChromaDB 경로 시도: {path}")
+            chroma_client = chromadb.PersistentClient(path=path)
+            # 간단한 작업으로 연결 테스트
+            try:
+                chroma_client.list_collections()
+                print(f"✅ ChromaDB 연결 성공: {path}")
+                return chroma_client
+            except:
+                raise Exception("연결 테스트 실패")
+        except Exception as e:
+            print(f"❌ ChromaDB 연결 실패: {path}, 오류: {str(e)}")
+            continue
+
     raise Exception("ChromaDB에 연결할 수 없습니다. 경로를 확인해주세요.")
 
-# Sentence-BERT 모델 로드
-model = SentenceTransformer('snunlp/KR-SBERT-V40K-klueNLI-augSTS')
 
-# 현재 파일 경로에서 데이터 파일 경로 추정
-current_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-benefits_csv_path = os.path.join(current_dir, 'data', 'benefits.csv')
+def content_hash(text: str, model_name: str = MODEL_NAME) -> str:
+    # 모델(또는 ONNX 백엔드)이 바뀌면 같은 문서라도 다시 임베딩해야 하므로 인코더 이름도 함께 해시
+    return hashlib.sha256(f"{model_name}\n{text}".encode("utf-8")).hexdigest()
+
+
+def build_benefit_chunks(df: pd.DataFrame) -> dict:
+    """
+    혜택 한 줄을 하나의 문서로 {chunk_id: (card_id, text)} 를 반환합니다.
+    chunk_id 는 (card_id, 문장) 해시이므로 CSV 행 순서가 바뀌어도 같은 혜택은 같은 ID 를 가집니다.
+    """
+    chunks = {}
+    for card_id, benefit in df.dropna(subset=['card_id', 'benefit_text'])[['card_id', 'benefit_text']].itertuples(index=False):
+        text = str(benefit).strip()
+        if not text or any(skip in text for skip in SKIP_PHRASES):
+            continue
+        card_id = int(card_id)
+        digest = hashlib.sha1(f"{card_id}\n{text}".encode("utf-8")).hexdigest()[:16]
+        chunks[f"chunk_{card_id}_{digest}"] = (card_id, f"- {text}")
+    return chunks
+
+
+def build_card_documents(df: pd.DataFrame) -> dict:
+    """card_id 별로 필터링된 혜택 문장을 모아 {card_id: merged_text} 로 반환합니다. (card_benefits 컬렉션용)"""
+    grouped = df.dropna(subset=['card_id', 'benefit_text']).groupby('card_id')['benefit_text'].apply(list)
 
-print(f"데이터 파일 로드 중: {benefits_csv_path}")
-df = pd.read_csv(benefits_csv_path)
+    documents = {}
+    for card_id, benefit_list in grouped.items():
+        cleaned_benefits = [
+            benefit for benefit in benefit_list
+            if not any(skip in benefit for skip in SKIP_PHRASES)
+        ]
+        if not cleaned_benefits:
+            continue  # 모든 혜택이 무의미한 문장이면 저장하지 않음
+        documents[int(card_id)] = "\n".join(f"- {benefit}" for benefit in cleaned_benefits)  # 필터링된 혜택만 합치기
+    return documents
 
-# 기존 컬렉션이 있으면 삭제
-try:
-    chroma_client.delete_collection(name="card_benefits")
-    print("기존 card_benefits 컬렉션 삭제 완료")
-except:
-    print("기존 컬렉션이 없거나 삭제할 수 없습니다.")
 
-# 새 컬렉션 생성
-collection = chroma_client.create_collection(name="card_benefits")
-print("새 card_benefits 컬렉션 생성 완료")
+def load_card_metadata() -> dict:
+    """
+    혜택 청크에 함께 저장할 카드 메타데이터 {card_id: {"card_type", "company", "cluster_<n>": 친화도}}.
+    군집 친화도 = 해당 군집 사용자 중 이 카드를 추천받은 비율 (recommended_cards).
+    """
+    metadata = {}
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT card_id, company, card_type FROM cards")
+        for card_id, company, card_type in cursor.fetchall():
+            if card_id is None:
+                continue
+            meta = {"card_type": normalize_card_type(card_type, card_id), "company": (company or "").strip() or None}
+            metadata[int(card_id)] = {key: value for key, value in meta.items() if value}
+
+        try:
+            cursor.execute("SELECT cluster, COUNT(DISTINCT seq) FROM recommended_cards GROUP BY cluster")
+            cluster_sizes = {cluster: size for cluster, size in cursor.fetchall() if cluster is not None and size}
+            cursor.execute(
+                "SELECT cluster, card_id, COUNT(DISTINCT seq) FROM recommended_cards "
+                "WHERE card_id IS NOT NULL GROUP BY cluster, card_id"
+            )
+            for cluster, card_id, users in cursor.fetchall():
+                if cluster in cluster_sizes:
+                    metadata.setdefault(int(card_id), {})[cluster_field(cluster)] = round(users / cluster_sizes[cluster], 4)
+        except pymysql.err.ProgrammingError:
+            print("⚠️ recommended_cards 테이블이 없어 군집 친화도는 저장하지 않습니다.")
+        cursor.close()
+    return metadata
 
-# card_id별로 benefit_text 모으기
-grouped = df.dropna(subset=['card_id', 'benefit_text']).groupby('card_id')['benefit_text'].apply(list).reset_index()
 
-total_rows = len(grouped)
-progress_step = max(1, total_rows // 20)
+def card_documents_as_items(documents: dict) -> dict:
+    """{card_id: merged_text} → sync_embeddings 입력 {doc_id: (card_id, text)}"""
+    return {f"benefit_{card_id}": (card_id, text) for card_id, text in documents.items()}
 
-for i, row in grouped.iterrows():
-    if i % progress_step == 0:
-        print(f"진행 중: {i}/{total_rows}개 카드 임베딩 중... ({i/total_rows*100:.1f}%)")
 
-    benefit_list = row['benefit_text']
+def document_metadata(card_id, digest, card_metadata=None) -> dict:
+    return {"card_id": card_id, "content_hash": digest, **((card_metadata or {}).get(card_id) or {})}
 
-    # 의미 없는 문구를 제거하는 필터링
-    cleaned_benefits = []
-    for benefit in benefit_list:
-        if any(skip in benefit for skip in ["확인", "변동될 수 있습니다", "주의사항", "유의사항"]):
+
+def sync_embeddings(collection, load_model, items: dict, batch_size=64, upsert_size=1000, model_name=MODEL_NAME,
+                    card_metadata=None):
+    """
+    items: {doc_id: (card_id, text)}
+    내용 해시가 바뀐 문서만 배치로 임베딩하여 upsert 하고, 사라진 문서는 삭제합니다.
+    card_metadata({card_id: {...}}) 만 바뀐 문서는 다시 임베딩하지 않고 메타데이터만 갱신합니다.
+    load_model 은 변경된 문서가 있을 때만 호출되어 인코더를 반환합니다.
+    """
+    existing = collection.get(include=["metadatas"])
+    existing_metas = {doc_id: meta or {} for doc_id, meta in zip(existing["ids"], existing["metadatas"])}
+
+    wanted = {doc_id: (card_id, text, content_hash(text, model_name)) for doc_id, (card_id, text) in items.items()}
+    changed = [(doc_id, *item) for doc_id, item in wanted.items()
+               if existing_metas.get(doc_id, {}).get("content_hash") != item[2]]
+    removed = [doc_id for doc_id in existing_metas if doc_id not in wanted]
+
+    # 내용은 같고 카드 메타데이터(카드 유형/카드사/군집 친화도)만 바뀐 문서
+    changed_ids = {doc_id for doc_id, _, _, _ in changed}
+    retagged = []
+    for doc_id, (card_id, _, digest) in wanted.items():
+        if doc_id in changed_ids or doc_id not in existing_metas:
             continue
-        cleaned_benefits.append(benefit)
+        meta = document_metadata(card_id, digest, card_metadata)
+        old = existing_metas[doc_id]
+        # 더 이상 추천되지 않는 군집의 친화도는 0 으로 덮어씀
+        if card_metadata:
+            meta.update({key: 0.0 for key in old if key.startswith("cluster_") and key not in meta})
+        if any(old.get(key) != value for key, value in meta.items()):
+            retagged.append((doc_id, meta))
+
+    print(f"[{collection.name}] 전체 {len(wanted)}개 문서 중 변경 {len(changed)}개, 삭제 {len(removed)}개, "
+          f"메타데이터 갱신 {len(retagged)}개")
+
+    if removed:
+        collection.delete(ids=removed)
+
+    for start in range(0, len(retagged), upsert_size):
+        part = retagged[start:start + upsert_size]
+        collection.update(ids=[doc_id for doc_id, _ in part], metadatas=[meta for _, meta in part])
+
+    if not changed:
+        return 0
+
+    # 변경된 문서만 한 번에 배치 인코딩
+    model = load_model()
+    texts = [text for _, _, text, _ in changed]
+    embeddings = model.encode(texts, batch_size=batch_size, show_progress_bar=True, convert_to_numpy=True)
+
+    for start in range(0, len(changed), upsert_size):
+        part = changed[start:start + upsert_size]
+        # 카드 ID 메타데이터로 저장
+        collection.upsert(
+            ids=[doc_id for doc_id, _, _, _ in part],
+            documents=[text for _, _, text, _ in part],
+            embeddings=embeddings[start:start + upsert_size].tolist(),
+            metadatas=[document_metadata(card_id, digest, card_metadata) for _, card_id, _, digest in part]
+        )
+        print(f"진행 중: {min(start + upsert_size, len(changed))}/{len(changed)}개 문서 저장")
+
+    return len(changed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="카드 혜택 임베딩을 ChromaDB 에 동기화")
+    parser.add_argument("--full", action="store_true", help="컬렉션을 지우고 전체를 다시 임베딩")
+    parser.add_argument("--batch-size", type=int, default=64, help="인코딩 배치 크기")
+    parser.add_argument("--faiss", choices=["flat", "hnsw"], default=None,
+                        help="동기화 후 같은 임베딩으로 FAISS 인덱스도 생성 (RETRIEVER_BACKEND=faiss 용)")
+    parser.add_argument("--faiss-path", default=os.getenv("FAISS_INDEX_PATH", FAISS_PATHS[0]), help="FAISS 인덱스 저장 경로")
+    parser.add_argument("--card-documents", action="store_true",
+                        help="카드 단위로 합친 문서 컬렉션(card_benefits)도 함께 갱신 (이전 방식 호환용)")
+    parser.add_argument("--backend", choices=["torch", "onnx"], default=None,
+                        help="인코더 백엔드 (기본: EMBEDDING_BACKEND, 없으면 torch)")
+    parser.add_argument("--bm25-path", default=os.getenv("BM25_INDEX_PATH", BM25_PATHS[0]), help="BM25 문서 스냅샷 저장 경로")
+    parser.add_argument("--no-card-metadata", action="store_true",
+                        help="카드 유형/카드사/군집 친화도 메타데이터를 MySQL 에서 읽지 않음 (card_id 만 저장)")
+    args = parser.parse_args()
+
+    chroma_client = connect_chroma()
+
+    # 현재 파일 경로에서 데이터 파일 경로 추정
+    current_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    benefits_csv_path = os.path.join(current_dir, 'data', 'benefits.csv')
+
+    print(f"데이터 파일 로드 중: {benefits_csv_path}")
+    df = pd.read_csv(benefits_csv_path)
+
+    # 혜택 한 줄 = 문서 하나 (card_benefit_chunks). --card-documents 이면 카드 단위 문서(card_benefits)도 유지
+    targets = [(CHUNK_COLLECTION_NAME, build_benefit_chunks(df))]
+    if args.card_documents:
+        targets.append((COLLECTION_NAME, card_documents_as_items(build_card_documents(df))))
+
+    # 검색 필터(card_type, company)와 군집 가중치(cluster_<n>)용 카드 메타데이터
+    card_metadata = {}
+    if not args.no_card_metadata:
+        try:
+            card_metadata = load_card_metadata()
+            print(f"카드 메타데이터 로드: {len(card_metadata)}개 카드")
+        except pymysql.err.Error as e:
+            print(f"⚠️ 카드 메타데이터를 읽지 못해 card_id 만 저장합니다: {e}")
+
+    # 인코더(torch 또는 정확도 확인을 통과한 ONNX)는 다시 임베딩할 문서가 있을 때만 한 번 로드
+    backend, onnx_path, variant = resolve_backend(args.backend)
+    model_name = encoder_name(backend, onnx_path, variant)
+    print(f"인코더: {model_name}")
+    model = []
+
+    def load_model():
+        if not model:
+            model.append(OnnxEncoder(onnx_path, variant=variant) if backend == "onnx" else load_torch_encoder())
+        return model[0]
+
+    for name, items in targets:
+        if args.full:
+            try:
+                chroma_client.delete_collection(name=name)
+                print(f"기존 {name} 컬렉션 삭제 완료")
+            except:
+                print("기존 컬렉션이 없거나 삭제할 수 없습니다.")
+
+        collection = chroma_client.get_or_create_collection(name=name)
+        updated = sync_embeddings(collection, load_model, items, batch_size=args.batch_size, model_name=model_name,
+                                  card_metadata=card_metadata)
+        # 모든 문서가 model_name 으로 임베딩된 상태이므로 검색 시 질문도 같은 인코더로 임베딩하도록 기록
+        record_encoder(collection, model_name)
+        print(f"✅ {name} 임베딩 동기화 완료: {updated}개 문서 갱신")
 
-    if not cleaned_benefits:
-        continue  # 모든 혜택이 무의미한 문장이면 저장하지 않음
+    chunk_collection = chroma_client.get_collection(CHUNK_COLLECTION_NAME)
+    chunks = targets[0][1]
 
-    merged_text = "\n".join(f"- {benefit}" for benefit in cleaned_benefits)  # 필터링된 혜택만 합치기
+    # 같은 혜택 청크로 하이브리드 검색용 BM25 스냅샷도 갱신
+    export_bm25_index(chunks, args.bm25_path, card_metadata, encoder=model_name)
 
-    embedding = model.encode(merged_text).tolist()
+    if args.faiss:
+        export_faiss_index(chunk_collection, args.faiss_path, kind=args.faiss)
 
-    # 디버깅 출력 (처음 10개만)
-    if i < 10:
-        print(f"{i+1}: 카드 ID = {row['card_id']} - 혜택 {len(cleaned_benefits)}개 합침")
 
-    # 카드 ID 메타데이터로 저장
-    collection.add(
-        documents=[merged_text],
-        embeddings=[embedding],
-        metadatas=[{
-            "card_id": int(row['card_id'])
-        }],
-        ids=[f"benefit_{row['card_id']}"]
-    )
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# 📁 models/lexical.py
+# 혜택 청크 BM25 어휘 검색 + 벡터 검색 결과와의 RRF(reciprocal rank fusion)
+# 한국어 형태소 분석기 없이 어절별 문자 2/3-gram 을 토큰으로 사용하므로 "스타벅스", "리터당" 같은
+# 가맹점/혜택 단어가 합쳐진 긴 문서 안에 있어도 정확히 매칭됩니다.
+# 역색인은 메모리에 상주하며 질의 한 번은 몇 개의 posting 배열 합산이라 마이크로초 단위로 끝납니다.
+
+import json
+import os
+import re
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from models.retriever import MetadataFilter
+
+# BM25 문서 스냅샷 경로 후보들 (insert_embeddings.py 가 임베딩과 함께 저장)
+BM25_PATHS = [
+    "./db_backup/bm25/card_benefits.json",
+    "../db_backup/bm25/card_benefits.json"
+]
+
+_NON_WORD = re.compile(r"[^0-9a-zA-Z가-힣]+")
+
+
+def tokenize(text, ngram_sizes=(2, 3)):
+    """어절마다 문자 n-gram 을 만들고, n 보다 짧은 어절은 그대로 토큰으로 사용합니다."""
+    tokens = []
+    for word in _NON_WORD.sub(" ", str(text or "").lower()).split():
+        if len(word) < min(ngram_sizes):
+            tokens.append(word)
+            continue
+        for n in ngram_sizes:
+            tokens.extend(word[i:i + n] for i in range(len(word) - n + 1))
+    return tokens
+
+
+class BM25Index:
+    def __init__(self, ids, documents, metadatas, k1=1.2, b=0.75, encoder=None):
+        self.ids = list(ids)
+        self.documents = list(documents)
+        self.metadatas = list(metadatas)
+        self.encoder = encoder  # 같은 청크로 만든 벡터 인덱스의 인코더 (스냅샷이 어느 인덱스와 짝인지 확인용)
+        self._filter = MetadataFilter(self.metadatas)
+        self.k1 = k1
+        self.b = b
+
+        postings = defaultdict(lambda: ([], []))
+        lengths = np.zeros(len(self.documents), dtype=np.float32)
+        for row, document in enumerate(self.documents):
+            counts = Counter(tokenize(document))
+            lengths[row] = sum(counts.values())
+            for term, tf in counts.items():
+                postings[term][0].append(row)
+                postings[term][1].append(tf)
+
+        n_docs = max(len(self.documents), 1)
+        avg_length = float(lengths.mean()) if len(lengths) else 0.0
+        # 문서 길이 정규화 항은 미리 계산: k1 * (1 - b + b * len / avg)
+        norm = self.k1 * (1 - self.b + self.b * lengths / (avg_length or 1.0))
+
+        # term → (행 번호 배열, 미리 계산한 BM25 가중치 배열)
+        self._postings = {}
+        for term, (rows, tfs) in postings.items():
+            rows = np.asarray(rows, dtype=np.int32)
+            tfs = np.asarray(tfs, dtype=np.float32)
+            idf = np.log(1 + (n_docs - len(rows) + 0.5) / (len(rows) + 0.5))
+            self._postings[term] = (rows, (idf * tfs * (self.k1 + 1) / (tfs + norm[rows])).astype(np.float32))
+
+    def __len__(self):
+        return len(self.documents)
+
+    def search(self, query, top_k=10, where=None):
+        """(행 번호, BM25 점수) 목록을 점수 내림차순으로 반환합니다."""
+        scores = np.zeros(len(self.documents), dtype=np.float32)
+        matched = False
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if posting is not None:
+                scores[posting[0]] += posting[1]
+                matched = True
+        if not matched:
+            return []
+
+        if where:
+            scores[~self._filter.mask(where)] = 0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(row), float(scores[row])) for row in candidates]
+
+    # ✅ 저장 / 로드 (역색인은 로드할 때 다시 만듦)
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"ids": self.ids, "documents": self.documents, "metadatas": self.metadatas,
+                       "encoder": self.encoder}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["ids"], data["documents"], data["metadatas"], encoder=data.get("encoder"))
+
+    @classmethod
+    def open(cls, path=None, retriever=None):
+        """저장된 스냅샷을 읽고, 없으면 검색 백엔드의 문서로 바로 만듭니다."""
+        paths = [path] if path else BM25_PATHS
+        for candidate in paths:
+            if os.path.exists(candidate):
+                print("✅ BM25 인덱스 로드: {}".format(candidate))
+                index = cls.load(candidate)
+                if retriever is not None and index.encoder and retriever.encoder and index.encoder != retriever.encoder:
+                    print("⚠️ 경고: BM25 스냅샷({0})과 검색 인덱스({1})가 다른 인코더로 만든 빌드입니다. "
+                          "insert_embeddings.py 를 다시 실행해주세요.".format(index.encoder, retriever.encoder))
+                return index
+        if retriever is not None:
+            ids, _, documents, metadatas = retriever.get_all()
+            print("✅ BM25 인덱스를 검색 백엔드 문서로 생성 ({}개)".format(len(ids)))
+            return cls(ids, documents, metadatas, encoder=retriever.encoder)
+        print("⚠️ 경고: BM25 인덱스를 찾을 수 없습니다. insert_embeddings.py 를 먼저 실행해주세요.")
+        return None
+
+
+def export_bm25_index(items: dict, path, card_metadata=None, encoder=None):
+    """
+    insert_embeddings.build_benefit_chunks 결과 {chunk_id: (card_id, text)} 로 BM25 스냅샷을 저장합니다.
+    card_metadata({card_id: {...}}) 를 주면 벡터 검색과 같은 where 필터를 쓸 수 있도록 메타데이터에 포함합니다.
+    """
+    card_metadata = card_metadata or {}
+    doc_ids = sorted(items)
+    index = BM25Index(
+        doc_ids,
+        [items[doc_id][1] for doc_id in doc_ids],
+        [{"card_id": items[doc_id][0], **(card_metadata.get(items[doc_id][0]) or {})} for doc_id in doc_ids],
+        encoder=encoder
+    )
+    index.save(path)
+    print("✅ BM25 인덱스 저장: {0} ({1}개 문서)".format(path, len(index)))
+    return index
+
+
+def reciprocal_rank_fusion(rankings, k=60, weights=None):
+    """
+    rankings: [[key, ...], ...] (각 목록은 좋은 순서). 반환: [(key, 점수), ...] 점수 내림차순
+    점수 = Σ weight / (k + 순위), 순위는 1부터
+    """
+    weights = weights or [1.0] * len(rankings)
+    scores = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + weight / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,331 @@
+# 📁 models/retriever.py
+# 혜택 벡터 검색 백엔드 (RETRIEVER_BACKEND=chroma | faiss)
+# 두 백엔드 모두 query() 는 (documents, metadatas, distances) 를 반환하며
+# distances 는 작을수록 유사한 값입니다.
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+COLLECTION_NAME = "card_benefits"              # 카드당 혜택을 합친 문서 (이전 방식)
+CHUNK_COLLECTION_NAME = "card_benefit_chunks"   # 혜택 한 줄당 문서 (기본)
+
+# 컬렉션 이름을 지정하지 않으면 혜택 청크 컬렉션을 먼저 찾고, 없으면 카드 단위 컬렉션 사용
+DEFAULT_COLLECTIONS = [CHUNK_COLLECTION_NAME, COLLECTION_NAME]
+
+# ChromaDB 경로 후보들
+CHROMA_PATHS = [
+    "./db_backup/chroma_db",
+    "../db_backup/chroma_db",
+    "/Users/james_kyh/Downloads/card_rag_project_collab_all_users 4/db_backup/chroma_db"
+]
+
+# FAISS 인덱스 경로 후보들
+FAISS_PATHS = [
+    "./db_backup/faiss/card_benefits",
+    "../db_backup/faiss/card_benefits"
+]
+
+# 컬렉션/인덱스 메타데이터에 임베딩을 만든 인코더 이름(models.encoder.encoder_name)을 기록하는 키
+ENCODER_KEY = "encoder"
+
+
+def normalize_rows(vectors):
+    """행(마지막 축)마다 L2 정규화한 float32 배열. 길이가 0 인 행은 그대로 둡니다."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def matches_where(meta, where):
+    """Chroma where 필터 중 {"field": value}, {"field": {"$eq"|"$in"|"$ne"|"$nin": ...}}, $and, $or 만 지원."""
+    if not where:
+        return True
+    if "$and" in where:
+        return all(matches_where(meta, cond) for cond in where["$and"])
+    if "$or" in where:
+        return any(matches_where(meta, cond) for cond in where["$or"])
+    for field, cond in where.items():
+        value = meta.get(field)
+        if isinstance(cond, dict):
+            for op, operand in cond.items():
+                if op == "$eq" and value != operand:
+                    return False
+                if op == "$ne" and value == operand:
+                    return False
+                if op == "$in" and value not in operand:
+                    return False
+                if op == "$nin" and value in operand:
+                    return False
+        elif value != cond:
+            return False
+    return True
+
+
+class MetadataFilter:
+    """
+    matches_where 와 같은 조건을 문서 전체에 대해 NumPy 연산으로 평가합니다. (질문마다 문서별 파이썬 반복 없음)
+    필드마다 값 → 정수 코드 배열을 처음 쓸 때 한 번 만들고, 같은 where 의 결과 마스크는 캐시합니다.
+    """
+    MASK_CACHE_SIZE = 256
+
+    def __init__(self, metadatas):
+        self.metadatas = metadatas
+        self._fields = {}  # field → (값 → 코드 dict, 문서별 코드 배열)
+        self._masks = {}   # json(where) → bool 마스크
+
+    def _field(self, field):
+        encoded = self._fields.get(field)
+        if encoded is None:
+            codes = {}
+            column = np.fromiter((codes.setdefault(meta.get(field), len(codes)) for meta in self.metadatas),
+                                 dtype=np.int32, count=len(self.metadatas))
+            encoded = self._fields[field] = (codes, column)
+        return encoded
+
+    def _build(self, where):
+        if "$and" in where:
+            return np.logical_and.reduce([self._build(cond) for cond in where["$and"]] or [self._all()])
+        if "$or" in where:
+            return np.logical_or.reduce([self._build(cond) for cond in where["$or"]] or [~self._all()])
+        mask = self._all()
+        for field, cond in where.items():
+            codes, column = self._field(field)
+            for op, operand in (cond.items() if isinstance(cond, dict) else [("$eq", cond)]):
+                if op in ("$eq", "$ne"):
+                    matched = column == codes.get(operand, -1)
+                elif op in ("$in", "$nin"):
+                    matched = np.isin(column, [codes[value] for value in operand if value in codes])
+                else:
+                    continue
+                mask &= matched if op in ("$eq", "$in") else ~matched
+        return mask
+
+    def _all(self):
+        return np.ones(len(self.metadatas), dtype=bool)
+
+    def mask(self, where) -> np.ndarray:
+        """조건을 만족하는 문서면 True 인 bool 배열 (읽기 전용으로 사용)"""
+        if not where:
+            return self._all()
+        key = json.dumps(where, sort_keys=True, ensure_ascii=False, default=str)
+        mask = self._masks.get(key)
+        if mask is None:
+            if len(self._masks) >= self.MASK_CACHE_SIZE:
+                self._masks.clear()
+            mask = self._masks[key] = self._build(where)
+        return mask
+
+
+class ChromaRetriever:
+    backend = "chroma"
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    @property
+    def encoder(self):
+        return (self.collection.metadata or {}).get(ENCODER_KEY)
+
+    @classmethod
+    def open(cls, path=None, collection_name=None):
+        import chromadb
+
+        paths = [path] if path else CHROMA_PATHS
+        names = [collection_name] if collection_name else DEFAULT_COLLECTIONS
+        for candidate in paths:
+            for name in names:
+                try:
+                    print("ChromaDB 경로 시도: {0} ({1})".format(candidate, name))
+                    client = chromadb.PersistentClient(path=candidate)
+                    collection = client.get_collection(name)
+                    print("✅ ChromaDB 연결 성공: {0} ({1})".format(candidate, name))
+                    return cls(collection)
+                except Exception as e:
+                    print("❌ ChromaDB 연결 실패: {}, 오류: {}".format(candidate, str(e)))
+        print("⚠️ 경고: ChromaDB 컬렉션을 찾을 수 없습니다. 먼저 insert_embeddings.py를 실행해주세요.")
+        return None
+
+    def query(self, query_vec, top_k=5, where=None):
+        kwargs = {"query_embeddings": [list(query_vec)], "n_results": top_k}
+        if where:
+            kwargs["where"] = where
+        try:
+            # 최신 버전의 ChromaDB는 include_distances 파라미터를 지원
+            results = self.collection.query(include_distances=True, **kwargs)
+        except TypeError:
+            # 이전 버전의 ChromaDB는 include_distances 파라미터를 지원하지 않음
+            results = self.collection.query(**kwargs)
+
+        documents = results['documents'][0] if results['documents'] else []
+        metadatas = results['metadatas'][0] if results['metadatas'] else []
+        distances = results['distances'][0] if results.get('distances') else []
+        return documents, metadatas, distances
+
+    def get_all(self):
+        result = self.collection.get(include=["embeddings", "documents", "metadatas"])
+        return result["ids"], np.asarray(result["embeddings"], dtype=np.float32), result["documents"], result["metadatas"]
+
+    def get_embeddings(self, card_ids):
+        result = self.collection.get(where={"card_id": {"$in": list(card_ids)}}, include=["embeddings"])
+        embeddings = result.get("embeddings")
+        if embeddings is None or len(embeddings) == 0:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.asarray(embeddings, dtype=np.float32)
+
+
+class FaissRetriever:
+    """정규화 벡터의 내적(코사인) 검색. distances 는 1 - 코사인 유사도입니다."""
+    backend = "faiss"
+
+    def __init__(self, index, ids, documents, metadatas, kind="flat", encoder=None):
+        self.index = index
+        self.ids = list(ids)
+        self.documents = list(documents)
+        self.metadatas = list(metadatas)
+        self.kind = kind
+        self.encoder = encoder
+        self._filter = MetadataFilter(self.metadatas)
+        self._rows_by_card = {}
+        for row, meta in enumerate(self.metadatas):
+            self._rows_by_card.setdefault(meta.get("card_id"), []).append(row)
+
+    @classmethod
+    def build(cls, ids, embeddings, documents, metadatas, kind="flat", hnsw_m=32, ef_search=64, encoder=None):
+        import faiss
+
+        vectors = normalize_rows(embeddings)
+        dim = vectors.shape[1]
+        if kind == "hnsw":
+            index = faiss.IndexHNSWFlat(dim, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efSearch = ef_search
+        elif kind == "flat":
+            index = faiss.IndexFlatIP(dim)
+        else:
+            raise ValueError("지원하지 않는 FAISS 인덱스 종류: {}".format(kind))
+        index.add(vectors)
+        return cls(index, ids, documents, metadatas, kind=kind, encoder=encoder)
+
+    def save(self, path):
+        import faiss
+
+        os.makedirs(path, exist_ok=True)
+        faiss.write_index(self.index, os.path.join(path, "index.faiss"))
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "kind": self.kind,
+                ENCODER_KEY: self.encoder,
+                "ids": self.ids,
+                "documents": self.documents,
+                "metadatas": self.metadatas
+            }, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        import faiss
+
+        index_path = os.path.join(path, "index.faiss")
+        try:
+            index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if mmap else 0)
+        except RuntimeError:
+            # mmap 을 지원하지 않는 인덱스 종류는 메모리로 읽음
+            index = faiss.read_index(index_path)
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(index, meta["ids"], meta["documents"], meta["metadatas"], kind=meta.get("kind", "flat"),
+                   encoder=meta.get(ENCODER_KEY))
+
+    @classmethod
+    def open(cls, path=None):
+        paths = [path] if path else FAISS_PATHS
+        for candidate in paths:
+            if os.path.exists(os.path.join(candidate, "index.faiss")):
+                print("✅ FAISS 인덱스 로드: {}".format(candidate))
+                return cls.load(candidate)
+        print("⚠️ 경고: FAISS 인덱스를 찾을 수 없습니다. insert_embeddings.py --faiss 로 먼저 생성해주세요.")
+        return None
+
+    def query(self, query_vec, top_k=5, where=None):
+        query = normalize_rows(query_vec).reshape(1, -1)
+        if where:
+            # 필터가 있으면 조건을 만족하는 행만 대상으로 검색
+            import faiss
+
+            allowed = np.flatnonzero(self._filter.mask(where)).astype(np.int64)
+            if len(allowed) == 0:
+                return [], [], []
+            params = faiss.SearchParametersHNSW(sel=faiss.IDSelectorBatch(allowed)) if self.kind == "hnsw" \
+                else faiss.SearchParameters(sel=faiss.IDSelectorBatch(allowed))
+            scores, rows = self.index.search(query, min(top_k, len(allowed)), params=params)
+        else:
+            scores, rows = self.index.search(query, min(top_k, len(self.ids)))
+
+        documents, metadatas, distances = [], [], []
+        for score, row in zip(scores[0], rows[0]):
+            if row < 0:
+                continue
+            documents.append(self.documents[row])
+            metadatas.append(self.metadatas[row])
+            distances.append(float(1.0 - score))
+        return documents, metadatas, distances
+
+    def get_all(self):
+        embeddings = self.index.reconstruct_n(0, self.index.ntotal)
+        return self.ids, np.asarray(embeddings, dtype=np.float32), self.documents, self.metadatas
+
+    def get_embeddings(self, card_ids):
+        rows = [row for card_id in card_ids for row in self._rows_by_card.get(card_id, [])]
+        if not rows:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([self.index.reconstruct(int(row)) for row in rows])
+
+
+def get_retriever(backend=None, chroma_path=None, faiss_path=None, collection_name=None):
+    """RETRIEVER_BACKEND 환경 변수(기본 chroma)에 따라 검색 백엔드를 엽니다."""
+    backend = (backend or os.getenv("RETRIEVER_BACKEND", "chroma")).lower()
+    collection_name = collection_name or os.getenv("BENEFIT_COLLECTION") or None
+    if backend == "faiss":
+        return FaissRetriever.open(faiss_path or os.getenv("FAISS_INDEX_PATH"))
+    if backend == "chroma":
+        return ChromaRetriever.open(chroma_path, collection_name)
+    raise ValueError("지원하지 않는 RETRIEVER_BACKEND: {}".format(backend))
+
+
+def record_encoder(collection, name):
+    """Chroma 컬렉션 메타데이터에 임베딩을 만든 인코더 이름을 기록합니다. (검색 시 같은 인코더로 질문을 임베딩)"""
+    metadata = dict(collection.metadata or {})
+    if metadata.get(ENCODER_KEY) == name:
+        return
+    metadata[ENCODER_KEY] = name
+    try:
+        collection.modify(metadata=metadata)
+    except Exception as e:
+        print("⚠️ 경고: {0} 컬렉션에 인코더를 기록하지 못했습니다: {1}".format(collection.name, e))
+
+
+def export_faiss_index(collection, path, kind="flat"):
+    """Chroma 컬렉션의 임베딩/메타데이터로 FAISS 인덱스를 만들어 저장합니다. (인코더 기록도 그대로 옮김)"""
+    chroma = ChromaRetriever(collection)
+    ids, embeddings, documents, metadatas = chroma.get_all()
+    retriever = FaissRetriever.build(ids, embeddings, documents, metadatas, kind=kind, encoder=chroma.encoder)
+    retriever.save(path)
+    print("✅ FAISS 인덱스 저장: {0} ({1}개 벡터, {2})".format(path, len(ids), kind))
+    return retriever
+
+
+# ✅ 단독 실행: Chroma 컬렉션 → FAISS 인덱스 변환
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chroma 컬렉션을 FAISS 인덱스로 내보내기")
+    parser.add_argument("--chroma-path", default=None)
+    parser.add_argument("--collection", default=None, help="기본: card_benefit_chunks, 없으면 card_benefits")
+    parser.add_argument("--out", default=FAISS_PATHS[0])
+    parser.add_argument("--kind", choices=["flat", "hnsw"], default="flat")
+    args = parser.parse_args()
+
+    chroma = ChromaRetriever.open(args.chroma_path, args.collection)
+    if chroma is None:
+        raise SystemExit(1)
+    export_faiss_index(chroma.collection, args.out, kind=args.kind)
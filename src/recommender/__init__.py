@@ -0,0 +1 @@
+# 이 파일은 recommender 디렉토리를 Python 패키지로 인식하게 합니다. 
\ No newline at end of file
@@ -0,0 +1,144 @@
+# 📁 recommender/collaborative.py
+# 희소 행렬 기반 협업 필터링 엔진
+# recommended_cards 를 한 번만 읽어 사용자×카드 희소 행렬을 만들고,
+# 카드 동시 출현(co-occurrence) 행렬 곱으로 모든 사용자의 점수를 배치 단위로 계산합니다.
+
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from db.pool import get_connection
+from db.card_catalog import get_catalog
+
+INSERT_SQL = (
+    "INSERT INTO collab_recommendations (seq, recommended_card_code, score, source, card_name) "
+    "VALUES (%s, %s, %s, %s, %s)"
+)
+
+
+class CollaborativeEngine:
+    def __init__(self, seqs, card_codes, counts):
+        # seqs[i] / card_codes[j] 는 counts 행렬의 i 행 / j 열에 대응
+        self.seqs = np.asarray(seqs)
+        self.card_codes = np.asarray(card_codes)
+        self.counts = counts.tocsr()
+        # 카드를 하나라도 공유하면 "비슷한 사용자" 이므로 보유 여부는 0/1 로 사용
+        self.owned = (self.counts > 0).astype(np.float32).tocsr()
+        # card×card 동시 출현 행렬: cooccurrence[a, b] = 카드 a 보유자들이 가진 카드 b 의 수
+        self.cooccurrence = (self.owned.T @ self.counts).tocsr()
+        self.seq_index = {seq: i for i, seq in enumerate(self.seqs)}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame):
+        df = df.dropna(subset=["seq", "card_code"])
+        user_idx, seqs = pd.factorize(df["seq"].astype(str))
+        card_idx, card_codes = pd.factorize(df["card_code"].astype(str))
+        counts = sparse.csr_matrix(
+            (np.ones(len(df), dtype=np.float32), (user_idx, card_idx)),
+            shape=(len(seqs), len(card_codes))
+        )  # 같은 (사용자, 카드) 쌍이 여러 번 있으면 합산됨
+        return cls(seqs, card_codes, counts)
+
+    @classmethod
+    def from_connection(cls, conn):
+        cursor = conn.cursor()
+        cursor.execute("SELECT seq, card_code FROM recommended_cards")
+        df = pd.DataFrame(cursor.fetchall(), columns=["seq", "card_code"])
+        cursor.close()
+        return cls.from_frame(df)
+
+    def score_rows(self, rows):
+        """사용자 행 인덱스 배열에 대해 (배치×카드) 점수 행렬을 반환합니다. 이미 가진 카드는 0점."""
+        owned = self.owned[rows]
+        # user·cardᵀ·card : 나와 카드를 공유한 사용자들이 가진 카드를 공유 카드 수만큼 가중 합산
+        scores = (owned @ self.cooccurrence).toarray()
+        scores[owned.nonzero()] = 0
+        return scores
+
+    def recommend(self, top_n=3, batch_size=20000, rows=None):
+        """(seq, card_code, score) 를 배치 단위로 생성합니다."""
+        if rows is None:
+            rows = np.arange(len(self.seqs))
+        k = min(top_n, len(self.card_codes))
+        if k == 0:
+            return
+
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            scores = self.score_rows(batch)
+
+            # 상위 k 개만 부분 정렬 후 점수 순으로 정렬
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind="stable")
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+            for row, cards, card_scores in zip(batch, top, top_scores):
+                seq = self.seqs[row]
+                for card, score in zip(cards, card_scores):
+                    if score > 0:
+                        yield seq, self.card_codes[card], int(score)
+
+
+# ✅ 샤드 실행용: 워커 프로세스마다 행렬을 한 번 로드하고 담당 SEQ 구간만 계산
+_worker_engine = None
+_worker_top_n = 3
+
+
+def init_worker(top_n=3):
+    global _worker_engine, _worker_top_n
+    with get_connection() as conn:
+        _worker_engine = CollaborativeEngine.from_connection(conn)
+    _worker_top_n = top_n
+
+
+def score_shard(shard):
+    rows = np.array([_worker_engine.seq_index[seq] for seq in shard.seqs if seq in _worker_engine.seq_index], dtype=np.int64)
+    return [
+        (str(seq), str(card_code), score)
+        for seq, card_code, score in _worker_engine.recommend(top_n=_worker_top_n, rows=rows)
+    ]
+
+
+def save_recommendations(conn, recommendations, catalog, chunk_size=10000, seqs=None):
+    """추천 결과를 한 번에 교체합니다. seqs 를 주면 해당 사용자들만 교체합니다."""
+    cursor = conn.cursor()
+    if seqs is None:
+        cursor.execute("DELETE FROM collab_recommendations")
+    else:
+        seqs = list(seqs)
+        for start in range(0, len(seqs), chunk_size):
+            part = seqs[start:start + chunk_size]
+            placeholders = ", ".join(["%s"] * len(part))
+            cursor.execute("DELETE FROM collab_recommendations WHERE seq IN ({})".format(placeholders), tuple(part))
+
+    batch = []
+    total = 0
+    for seq, card_code, score in recommendations:
+        card = catalog.by_code(card_code)
+        batch.append((seq, card_code, score, "collaborative", card["card_name"] if card else None))
+        if len(batch) >= chunk_size:
+            cursor.executemany(INSERT_SQL, batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        cursor.executemany(INSERT_SQL, batch)
+        total += len(batch)
+
+    conn.commit()
+    cursor.close()
+    return total
+
+
+def run(conn, top_n=3, batch_size=20000):
+    started = time.perf_counter()
+    engine = CollaborativeEngine.from_connection(conn)
+    print("[협업 필터링] 사용자 {0:,}명 × 카드 {1:,}종 행렬 로드 ({2:.1f}초)".format(
+        len(engine.seqs), len(engine.card_codes), time.perf_counter() - started))
+
+    total = save_recommendations(conn, engine.recommend(top_n=top_n, batch_size=batch_size), get_catalog())
+    print("[협업 필터링] 추천 {0:,}건 저장 ({1:.1f}초)".format(total, time.perf_counter() - started))
+    return total
@@ -0,0 +1,170 @@
+# 📁 recommender/content.py
+# 임베딩 행렬 기반 콘텐츠 추천 엔진
+# 카드별 혜택 임베딩을 한 번만 읽어 정규화된 (카드 × 차원) 행렬을 만들고,
+# 사용자×카드 희소 행렬 곱으로 사용자 프로필 벡터를 구한 뒤 모든 카드와의 코사인 유사도를 배치 단위로 계산합니다.
+
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from db.pool import get_connection
+from db.card_catalog import get_catalog
+from models.retriever import get_retriever, normalize_rows
+
+INSERT_SQL = (
+    "INSERT INTO content_recommendations (seq, recommended_card_id, card_name, score) "
+    "VALUES (%s, %s, %s, %s)"
+)
+
+
+class ContentEngine:
+    def __init__(self, card_ids, card_vectors, seqs, owned):
+        # card_ids[j] 는 card_vectors 의 j 행 / owned 의 j 열에 대응
+        self.card_ids = np.asarray(card_ids)
+        self.card_vectors = normalize_rows(card_vectors)
+        self.seqs = np.asarray(seqs)
+        self.owned = owned.tocsr()
+        self.seq_index = {seq: i for i, seq in enumerate(self.seqs)}
+
+    @staticmethod
+    def card_matrix(embeddings, metadatas):
+        """혜택 단위 임베딩 → 카드 단위 평균 벡터 (card_ids, 정규화 행렬)"""
+        doc_card_ids = [int(meta["card_id"]) for meta in metadatas]
+        card_idx, card_ids = pd.factorize(pd.Series(doc_card_ids))
+        counts = np.bincount(card_idx, minlength=len(card_ids)).astype(np.float32)
+        # (카드 × 문서) 평균 행렬 곱으로 카드별 혜택 벡터 평균
+        averaging = sparse.csr_matrix(
+            (1.0 / counts[card_idx], (card_idx, np.arange(len(doc_card_ids)))),
+            shape=(len(card_ids), len(doc_card_ids))
+        )
+        return np.asarray(card_ids), normalize_rows(averaging @ normalize_rows(embeddings))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, card_ids, card_vectors):
+        """df: recommended_cards 의 (seq, card_id). 임베딩이 없는 카드는 제외합니다."""
+        column_of = {card_id: j for j, card_id in enumerate(card_ids)}
+        df = df.dropna(subset=["seq", "card_id"])
+        cols = df["card_id"].astype(int).map(column_of)
+        df, cols = df[cols.notna()], cols.dropna().astype(int)
+        user_idx, seqs = pd.factorize(df["seq"].astype(str))
+        owned = sparse.csr_matrix(
+            (np.ones(len(df), dtype=np.float32), (user_idx, cols.to_numpy())),
+            shape=(len(seqs), len(card_ids))
+        )
+        owned.sum_duplicates()
+        owned.data[:] = 1.0  # 같은 카드가 여러 번 있어도 한 번만 반영
+        return cls(card_ids, card_vectors, seqs, owned)
+
+    @classmethod
+    def from_connection(cls, conn, retriever):
+        _, embeddings, _, metadatas = retriever.get_all()
+        card_ids, card_vectors = cls.card_matrix(embeddings, metadatas)
+
+        cursor = conn.cursor()
+        cursor.execute("SELECT seq, card_id FROM recommended_cards")
+        df = pd.DataFrame(cursor.fetchall(), columns=["seq", "card_id"])
+        cursor.close()
+        return cls.from_frame(df, card_ids, card_vectors)
+
+    def score_rows(self, rows):
+        """사용자 행 인덱스 배열에 대해 (배치×카드) 코사인 유사도를 반환합니다. 이미 가진 카드는 -inf."""
+        owned = self.owned[rows]
+        profiles = normalize_rows(owned @ self.card_vectors)
+        scores = profiles @ self.card_vectors.T
+        scores[owned.nonzero()] = -np.inf
+        return scores
+
+    def recommend(self, top_n=3, batch_size=20000, rows=None):
+        """(seq, card_id, score) 를 배치 단위로 생성합니다."""
+        if rows is None:
+            rows = np.arange(len(self.seqs))
+        k = min(top_n, len(self.card_ids))
+        if k == 0:
+            return
+
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            scores = self.score_rows(batch)
+
+            # 상위 k 개만 부분 정렬 후 점수 순으로 정렬
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind="stable")
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+            for row, cards, card_scores in zip(batch, top, top_scores):
+                seq = self.seqs[row]
+                for card, score in zip(cards, card_scores):
+                    if np.isfinite(score):
+                        yield seq, int(self.card_ids[card]), float(score)
+
+
+# ✅ 샤드 실행용: 워커 프로세스마다 행렬을 한 번 로드하고 담당 SEQ 구간만 계산
+_worker_engine = None
+_worker_top_n = 3
+
+
+def init_worker(chroma_path=None, collection_name=None, top_n=3):
+    global _worker_engine, _worker_top_n
+    retriever = get_retriever(chroma_path=chroma_path, collection_name=collection_name)
+    with get_connection() as conn:
+        _worker_engine = ContentEngine.from_connection(conn, retriever)
+    _worker_top_n = top_n
+
+
+def score_shard(shard):
+    catalog = get_catalog()
+    rows = np.array([_worker_engine.seq_index[seq] for seq in shard.seqs if seq in _worker_engine.seq_index], dtype=np.int64)
+    return [
+        (str(seq), card_id, catalog.card_name(card_id, ""), score)
+        for seq, card_id, score in _worker_engine.recommend(top_n=_worker_top_n, rows=rows)
+    ]
+
+
+def save_recommendations(conn, recommendations, seqs=None, chunk_size=10000):
+    """추천 결과를 저장합니다. seqs 를 주면 해당 사용자들만, 없으면 전체를 교체합니다."""
+    cursor = conn.cursor()
+    if seqs is None:
+        cursor.execute("DELETE FROM content_recommendations")
+    else:
+        seqs = list(seqs)
+        for start in range(0, len(seqs), chunk_size):
+            part = seqs[start:start + chunk_size]
+            placeholders = ", ".join(["%s"] * len(part))
+            cursor.execute("DELETE FROM content_recommendations WHERE seq IN ({})".format(placeholders), tuple(part))
+
+    batch = []
+    total = 0
+    for row in recommendations:
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            cursor.executemany(INSERT_SQL, batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        cursor.executemany(INSERT_SQL, batch)
+        total += len(batch)
+
+    conn.commit()
+    cursor.close()
+    return total
+
+
+def run(conn, retriever, top_n=3, batch_size=20000):
+    """전체 사용자를 한 번에 계산하여 content_recommendations 를 교체합니다."""
+    started = time.perf_counter()
+    engine = ContentEngine.from_connection(conn, retriever)
+    print("[콘텐츠 추천] 사용자 {0:,}명 × 카드 {1:,}종 (차원 {2}) 행렬 로드 ({3:.1f}초)".format(
+        len(engine.seqs), len(engine.card_ids), engine.card_vectors.shape[1], time.perf_counter() - started))
+
+    catalog = get_catalog()
+    rows = (
+        (str(seq), card_id, catalog.card_name(card_id, ""), score)
+        for seq, card_id, score in engine.recommend(top_n=top_n, batch_size=batch_size)
+    )
+    total = save_recommendations(conn, rows)
+    print("[콘텐츠 추천] 추천 {0:,}건 저장 ({1:.1f}초)".format(total, time.perf_counter() - started))
+    return total
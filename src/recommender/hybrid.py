@@ -0,0 +1,168 @@
+# 📁 recommender/hybrid.py
+# 하이브리드 추천 블렌더
+# 클러스터 추천 순위(recommended_cards), 협업 필터링 점수(collab_recommendations),
+# 콘텐츠 유사도(content_recommendations) 를 사용자별로 0~1 로 정규화한 뒤 가중합하여
+# 화면에 필요한 카드 정보까지 담은 user_recommendations_hybrid 테이블을 만듭니다.
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from db.card_catalog import get_catalog, parse_card_code
+
+DEFAULT_WEIGHTS = {"cluster": 0.5, "collaborative": 0.3, "content": 0.2}
+SOURCES = list(DEFAULT_WEIGHTS)
+
+TABLE_NAME = "user_recommendations_hybrid"
+
+CREATE_SQL = """
+CREATE TABLE IF NOT EXISTS {table} (
+    user_id VARCHAR(50) NOT NULL,
+    rank_no INT NOT NULL,
+    card_id INT NOT NULL,
+    card_name VARCHAR(255),
+    company VARCHAR(100),
+    card_type VARCHAR(20),
+    image_url TEXT,
+    score FLOAT,
+    cluster_score FLOAT,
+    collab_score FLOAT,
+    content_score FLOAT,
+    PRIMARY KEY (user_id, rank_no)
+) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci
+"""
+
+INSERT_SQL = (
+    "INSERT INTO {table} (user_id, rank_no, card_id, card_name, company, card_type, image_url, "
+    "score, cluster_score, collab_score, content_score) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
+)
+
+
+def parse_weights(text=None) -> dict:
+    """'cluster=0.5,collaborative=0.3,content=0.2' (또는 HYBRID_WEIGHTS) → 합이 1 인 가중치"""
+    text = text if text is not None else os.getenv("HYBRID_WEIGHTS", "")
+    weights = dict(DEFAULT_WEIGHTS)
+    for part in filter(None, (item.strip() for item in text.split(","))):
+        name, _, value = part.partition("=")
+        if name.strip() not in weights:
+            raise ValueError("알 수 없는 가중치 이름: {} (가능: {})".format(name, ", ".join(SOURCES)))
+        weights[name.strip()] = float(value)
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("가중치 합은 0보다 커야 합니다")
+    return {name: value / total for name, value in weights.items()}
+
+
+def _fetch_frame(conn, sql, columns):
+    cursor = conn.cursor()
+    cursor.execute(sql)
+    df = pd.DataFrame(cursor.fetchall(), columns=columns)
+    cursor.close()
+    return df
+
+
+def _per_user_max_scale(df, column):
+    """사용자별 최댓값으로 나누어 0~1 로 정규화"""
+    values = pd.to_numeric(df[column], errors="coerce").fillna(0).clip(lower=0)
+    peak = values.groupby(df["seq"]).transform("max")
+    return np.where(peak > 0, values / peak.where(peak > 0, 1), 0.0)
+
+
+def load_signals(conn) -> pd.DataFrame:
+    """세 추천 결과를 (seq, card_id) 기준으로 합쳐 소스별 0~1 점수 컬럼을 만듭니다."""
+    cluster = _fetch_frame(conn, "SELECT seq, card_id, recommended_rank FROM recommended_cards",
+                           ["seq", "card_id", "recommended_rank"])
+    cluster = cluster.dropna(subset=["seq", "card_id"])
+    # 1위 = 1.0, 최하위로 갈수록 선형 감소
+    ranks = pd.to_numeric(cluster["recommended_rank"], errors="coerce").fillna(0)
+    max_rank = ranks.groupby(cluster["seq"]).transform("max").clip(lower=1)
+    cluster["cluster"] = (max_rank + 1 - ranks) / max_rank
+
+    collab = _fetch_frame(conn, "SELECT seq, recommended_card_code, score FROM collab_recommendations",
+                          ["seq", "card_code", "score"])
+    codes = collab["card_code"].drop_duplicates()
+    code_to_id = dict(zip(codes, (parse_card_code(code)[1] for code in codes)))
+    collab["card_id"] = collab["card_code"].map(code_to_id)
+    collab = collab.dropna(subset=["seq", "card_id"])
+    collab["collaborative"] = _per_user_max_scale(collab, "score")
+
+    content = _fetch_frame(conn, "SELECT seq, recommended_card_id, score FROM content_recommendations",
+                           ["seq", "card_id", "score"])
+    content = content.dropna(subset=["seq", "card_id"])
+    # 코사인 유사도는 이미 -1~1 이므로 음수만 0 으로
+    content["content"] = pd.to_numeric(content["score"], errors="coerce").fillna(0).clip(0, 1)
+
+    frames = []
+    for df, name in ((cluster, "cluster"), (collab, "collaborative"), (content, "content")):
+        part = df[["seq", "card_id", name]].copy()
+        part["seq"] = part["seq"].astype(str)
+        part["card_id"] = part["card_id"].astype(int)
+        frames.append(part.groupby(["seq", "card_id"], sort=False)[name].max())
+
+    return pd.concat(frames, axis=1).fillna(0.0).reset_index()
+
+
+def blend(signals: pd.DataFrame, weights: dict, top_n=3) -> pd.DataFrame:
+    """가중합 점수로 사용자별 상위 top_n 개 카드를 (seq, rank_no, card_id, score, 소스별 점수) 로 반환"""
+    signals = signals.copy()
+    signals["score"] = sum(signals[name] * weights[name] for name in SOURCES)
+    signals = signals.sort_values(["seq", "score", "card_id"], ascending=[True, False, True], kind="stable")
+    top = signals.groupby("seq", sort=False).head(top_n).copy()
+    top["rank_no"] = top.groupby("seq", sort=False).cumcount() + 1
+    return top
+
+
+def _rows(top, catalog):
+    for record in top.itertuples(index=False):
+        card = catalog.get(int(record.card_id)) or {}
+        yield (
+            record.seq, int(record.rank_no), int(record.card_id),
+            card.get("card_name"), card.get("company"), card.get("card_type"), card.get("image_url"),
+            float(record.score), float(record.cluster), float(record.collaborative), float(record.content)
+        )
+
+
+def save_hybrid(conn, top, catalog, chunk_size=10000):
+    """새 테이블에 모두 적재한 뒤 RENAME 으로 교체하여 읽는 쪽이 빈 테이블을 보지 않게 합니다."""
+    new_table, old_table = TABLE_NAME + "_new", TABLE_NAME + "_old"
+    cursor = conn.cursor()
+    cursor.execute(CREATE_SQL.format(table=TABLE_NAME))
+    cursor.execute("DROP TABLE IF EXISTS {}".format(new_table))
+    cursor.execute("DROP TABLE IF EXISTS {}".format(old_table))
+    cursor.execute(CREATE_SQL.format(table=new_table))
+
+    insert_sql = INSERT_SQL.format(table=new_table)
+    batch, total = [], 0
+    for row in _rows(top, catalog):
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            cursor.executemany(insert_sql, batch)
+            conn.commit()
+            total += len(batch)
+            batch = []
+    if batch:
+        cursor.executemany(insert_sql, batch)
+        conn.commit()
+        total += len(batch)
+
+    cursor.execute("RENAME TABLE {0} TO {1}, {2} TO {0}".format(TABLE_NAME, old_table, new_table))
+    cursor.execute("DROP TABLE {}".format(old_table))
+    conn.commit()
+    cursor.close()
+    return total
+
+
+def run(conn, weights=None, top_n=3):
+    started = time.perf_counter()
+    weights = weights or parse_weights()
+    signals = load_signals(conn)
+    print("[하이브리드] 후보 {0:,}건 (사용자 {1:,}명) 로드 ({2:.1f}초), 가중치 {3}".format(
+        len(signals), signals["seq"].nunique(), time.perf_counter() - started,
+        ", ".join("{0}={1:.2f}".format(name, value) for name, value in weights.items())))
+
+    top = blend(signals, weights, top_n=top_n)
+    total = save_hybrid(conn, top, get_catalog())
+    print("[하이브리드] 추천 {0:,}건 저장 ({1:.1f}초)".format(total, time.perf_counter() - started))
+    return total
@@ -0,0 +1,191 @@
+# 📁 recommender/sharding.py
+# 전체 사용자 배치 작업용 샤드 실행기
+# - SEQ 공간을 정렬된 구간(range)으로 나누어 프로세스 풀에서 병렬 처리
+# - 워커마다 initializer 로 자체 DB 커넥션/모델을 준비
+# - 샤드별 결과를 체크포인트 파일로 저장하여 실패한 샤드만 다시 실행 가능 (--resume / --retry-shard)
+# - 체크포인트는 입력 스냅샷(SEQ 목록 체크섬 + 작업 파라미터)에 묶이며, 결과 저장 후 finish_job 으로 삭제
+
+import argparse
+import bisect
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+DEFAULT_CHECKPOINT_DIR = "./.shard_checkpoints"
+
+# start_seq 이상, end_seq 미만(None 이면 끝까지) 구간의 사용자들
+Shard = namedtuple("Shard", ["index", "start_seq", "end_seq", "seqs"])
+
+
+def plan_shards(seqs, n_shards, starts=None):
+    """정렬된 SEQ 를 n_shards 개의 연속 구간으로 나눕니다. starts 를 주면 그 경계를 그대로 사용합니다."""
+    seqs = sorted(set(str(seq) for seq in seqs))
+    if not seqs:
+        return []
+
+    if starts is None:
+        n_shards = max(1, min(n_shards, len(seqs)))
+        size, extra = divmod(len(seqs), n_shards)
+        starts, offset = [], 0
+        for i in range(n_shards):
+            starts.append(seqs[offset])
+            offset += size + (1 if i < extra else 0)
+
+    shards = []
+    for i, start in enumerate(starts):
+        end = starts[i + 1] if i + 1 < len(starts) else None
+        lo = bisect.bisect_left(seqs, start) if i > 0 else 0
+        hi = bisect.bisect_left(seqs, end) if end is not None else len(seqs)
+        shards.append(Shard(i, start, end, seqs[lo:hi]))
+    return shards
+
+
+def _shard_path(job_dir, index):
+    return os.path.join(job_dir, "shard_{:04d}.jsonl".format(index))
+
+
+def _run_shard(shard_fn, job_dir, shard):
+    started = time.perf_counter()
+    rows = shard_fn(shard)
+
+    # 임시 파일에 다 쓴 뒤 교체하여, 중간에 죽은 샤드가 완료로 보이지 않게 함
+    path = _shard_path(job_dir, shard.index)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(list(row), ensure_ascii=False) + "\n")
+    os.replace(tmp_path, path)
+    return shard.index, len(rows), time.perf_counter() - started
+
+
+def input_fingerprint(seqs, params=None) -> str:
+    """입력 스냅샷 식별자: 정렬된 SEQ 목록(행 수 포함) + 작업 파라미터의 체크섬"""
+    digest = hashlib.sha1()
+    seqs = sorted(set(str(seq) for seq in seqs))
+    digest.update("{}\n".format(len(seqs)).encode("utf-8"))
+    for seq in seqs:
+        digest.update(seq.encode("utf-8") + b"\n")
+    digest.update(json.dumps(params or {}, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _load_plan(job_dir):
+    path = os.path.join(job_dir, "plan.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_plan(job_dir, shards, fingerprint):
+    with open(os.path.join(job_dir, "plan.json"), "w", encoding="utf-8") as f:
+        json.dump({"fingerprint": fingerprint, "starts": [shard.start_seq for shard in shards]}, f, ensure_ascii=False)
+
+
+def _clear_job(job_dir):
+    for name in os.listdir(job_dir):
+        if name.startswith("shard_") or name == "plan.json":
+            os.remove(os.path.join(job_dir, name))
+
+
+def run_sharded(job_name, shard_fn, seqs, n_workers=None, n_shards=None, checkpoint_dir=DEFAULT_CHECKPOINT_DIR,
+                only=None, fresh=False, resume=False, params=None, initializer=None, initargs=()):
+    """
+    shard_fn(shard) -> [tuple, ...] 을 샤드마다 워커 프로세스에서 실행합니다.
+    resume=True (또는 only 지정) 이고 같은 입력(seqs + params)의 체크포인트가 있을 때만 완료된 샤드를 건너뛰며,
+    only 로 특정 샤드 번호만 다시 실행할 수 있습니다. 그 외에는 이전 체크포인트를 지우고 처음부터 실행합니다.
+    반환값은 (전체 샤드 목록, 실패한 샤드 번호 목록) 입니다. 결과를 저장한 뒤에는 finish_job 을 호출하세요.
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    job_dir = os.path.join(checkpoint_dir, job_name)
+    os.makedirs(job_dir, exist_ok=True)
+    fingerprint = input_fingerprint(seqs, params)
+
+    plan = _load_plan(job_dir)
+    if plan is not None and not fresh:
+        if plan.get("fingerprint") != fingerprint:
+            print("[샤드 실행] {}: 입력(SEQ 목록/파라미터)이 이전 체크포인트와 달라 처음부터 실행합니다.".format(job_name))
+            fresh = True
+        elif not (resume or only):
+            print("[샤드 실행] {}: 이전 체크포인트가 있지만 --resume 이 없어 처음부터 실행합니다.".format(job_name))
+            fresh = True
+    if fresh:
+        _clear_job(job_dir)
+        plan = None
+        if only:
+            print("[샤드 실행] {}: 이어서 실행할 체크포인트가 없어 --retry-shard 대신 전체 샤드를 실행합니다.".format(job_name))
+            only = None
+
+    # 이어서 실행할 때는 이전 실행의 샤드 경계를 그대로 사용해야 체크포인트와 어긋나지 않음
+    starts = plan["starts"] if plan is not None else None
+    shards = plan_shards(seqs, n_shards or n_workers * 4, starts=starts)
+    if starts is None:
+        _save_plan(job_dir, shards, fingerprint)
+
+    pending = [shard for shard in shards if not os.path.exists(_shard_path(job_dir, shard.index))]
+    if only:
+        only = set(only)
+        pending = [shard for shard in shards if shard.index in only]
+    print("[샤드 실행] {0}: 전체 {1}개 중 {2}개 실행 (워커 {3}개)".format(job_name, len(shards), len(pending), n_workers))
+
+    failed = []
+    if pending:
+        # fork 대신 spawn 을 사용해 부모의 DB 커넥션/모델 상태를 워커가 공유하지 않도록 함
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=n_workers, mp_context=ctx,
+                                 initializer=initializer, initargs=initargs) as executor:
+            futures = {executor.submit(_run_shard, shard_fn, job_dir, shard): shard for shard in pending}
+            for future in as_completed(futures):
+                shard = futures[future]
+                try:
+                    index, n_rows, seconds = future.result()
+                    print("[샤드 {0:04d}] 사용자 {1:,}명 → {2:,}건 ({3:.1f}초)".format(
+                        index, len(shard.seqs), n_rows, seconds))
+                except Exception as e:
+                    failed.append(shard.index)
+                    print("❌ [샤드 {0:04d}] 실패: {1} (--retry-shard {0} 로 재실행)".format(shard.index, e))
+
+    return shards, sorted(failed)
+
+
+def finish_job(job_name, checkpoint_dir=DEFAULT_CHECKPOINT_DIR):
+    """합친 결과를 저장한 뒤 체크포인트 디렉터리를 삭제하여 다음 실행이 이전 결과를 재사용하지 않게 합니다."""
+    job_dir = os.path.join(checkpoint_dir, job_name)
+    if os.path.isdir(job_dir):
+        shutil.rmtree(job_dir)
+        print("[샤드 실행] {}: 체크포인트 삭제".format(job_name))
+
+
+def iter_shard_rows(job_name, shards, checkpoint_dir=DEFAULT_CHECKPOINT_DIR):
+    """완료된 샤드 체크포인트의 결과 행을 순서대로 읽습니다."""
+    job_dir = os.path.join(checkpoint_dir, job_name)
+    for shard in shards:
+        path = _shard_path(job_dir, shard.index)
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                yield tuple(json.loads(line))
+
+
+def completed_seqs(job_name, shards, checkpoint_dir=DEFAULT_CHECKPOINT_DIR):
+    job_dir = os.path.join(checkpoint_dir, job_name)
+    for shard in shards:
+        if os.path.exists(_shard_path(job_dir, shard.index)):
+            yield from shard.seqs
+
+
+def add_shard_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="워커 프로세스 수")
+    parser.add_argument("--shards", type=int, default=None, help="샤드 수 (기본: 워커 수 × 4)")
+    parser.add_argument("--retry-shard", type=int, action="append", default=None,
+                        help="지정한 샤드만 다시 실행 (여러 번 지정 가능, 이전 체크포인트를 이어서 사용)")
+    parser.add_argument("--resume", action="store_true",
+                        help="같은 입력의 이전 체크포인트가 있으면 완료된 샤드는 건너뛰고 이어서 실행")
+    parser.add_argument("--fresh", action="store_true", help="이전 체크포인트를 지우고 처음부터 실행 (기본 동작)")
+    return parser
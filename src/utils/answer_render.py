@@ -0,0 +1,196 @@
+# 📁 utils/answer_render.py
+# 챗봇 답변 → 화면용 카드 블록 변환 (답변마다 한 번만 계산)
+# 답변을 카드 단위로 나누고 카드 설명을 HTML 로 정리한 결과를 dict 로 만들어 세션에 저장해 두면,
+# Streamlit 이 다시 실행될 때는 저장된 조각만 출력하므로 대화가 길어져도 정규식을 다시 돌리지 않습니다.
+
+import re
+
+# ✅ 미리 컴파일한 정규식
+CARD_PATTERN = re.compile(r'(\d+)\.\s+카드명:\s+([^\n]+)')
+CARD_SPLIT = re.compile(r'\d+\.\s+카드명:')
+BLANK_LINES = re.compile(r'\n\s*\n')
+AD_EMOJI_LINE = re.compile(r'📝\s*.*?(\n|$)')
+AD_KEYWORDS = ['광고', '광고 문구', '마케팅', '홍보']
+AD_LINE = re.compile(r'.*(?:{}).*(\n|$)'.format("|".join(map(re.escape, AD_KEYWORDS))))
+COMPANY = re.compile(r'카드사 및 유형:?\s*([^•\n-]+)')
+BENEFIT_SECTION = re.compile(r'관련 혜택:?(.*?)(?=추천 이유:|$)', re.DOTALL)
+BENEFIT_ITEM = re.compile(r'(?:^|\n)\s*[•\-*]\s*(.*?)(?=\n\s*[•\-*]|\n\s*추천 이유:|$)', re.DOTALL)
+REASON = re.compile(r'추천 이유:?\s*(.*?)$', re.DOTALL)
+
+# ✅ 카드 설명 컨테이너 스타일 정의 (CARD_DESCRIPTION_STYLE 은 카드마다 넣지 않고 화면에 한 번만 출력)
+CARD_CONTAINER_STYLE = """
+<div style="border: 1px solid #e0e0e0; border-radius: 10px; padding: 20px; background-color: #ffffff; box-shadow: 0 2px 5px rgba(0,0,0,0.08);">
+    <h4 style="color: #1a73e8; margin-top: 0; margin-bottom: 15px; border-bottom: 1px solid #f0f0f0; padding-bottom: 10px; font-size: 18px;">{card_num}. {card_name}</h4>
+    {card_text}
+</div>
+"""
+
+CARD_DESCRIPTION_STYLE = """<style>
+.card-section {
+    margin-bottom: 15px;
+}
+.section-title {
+    font-weight: bold;
+    color: #1a73e8;
+    margin-bottom: 8px;
+    font-size: 16px;
+}
+.company-info {
+    background-color: #f8f9fa;
+    padding: 8px 12px;
+    border-radius: 6px;
+    display: inline-block;
+    font-weight: 500;
+    color: #333;
+}
+.benefits-list {
+    margin: 0;
+    padding-left: 25px;
+}
+.benefits-list li {
+    margin-bottom: 8px;
+    color: #333;
+    line-height: 1.5;
+}
+.recommendation {
+    padding-left: 10px;
+    color: #555;
+    font-style: italic;
+    border-left: 3px solid #e0e0e0;
+    margin-top: 5px;
+}
+</style>"""
+
+
+# ✅ 응답에서 카드 정보 추출하는 함수
+def extract_card_info(response):
+    return CARD_PATTERN.findall(response)
+
+
+def remove_ad_lines(text):
+    """광고 문구 관련 키워드가 포함된 줄 제거"""
+    return AD_LINE.sub('', text)
+
+
+# ✅ 카드 설명 텍스트 정리 함수
+def clean_card_description(text):
+    # 불필요한 줄바꿈 제거 후 여러 줄 바꿈을 하나로 통합
+    text = BLANK_LINES.sub('\n\n', text.strip())
+
+    # 광고 문구로 보이는 부분 제거 (📝 이모지로 시작하는 부분, 광고 키워드가 포함된 줄)
+    text = remove_ad_lines(AD_EMOJI_LINE.sub('', text))
+
+    # 카드사 및 유형 추출
+    company_match = COMPANY.search(text)
+    card_company = company_match.group(1).strip() if company_match else ""
+
+    # 혜택 항목 추출 - 모든 글머리 기호 패턴 처리
+    benefits = []
+    benefit_section = BENEFIT_SECTION.search(text)
+    if benefit_section:
+        benefit_items = BENEFIT_ITEM.findall(benefit_section.group(1).strip())
+        benefits = [item.strip() for item in benefit_items if item.strip()]
+
+    # 추천 이유 추출
+    reason_match = REASON.search(text)
+    recommendation = reason_match.group(1).strip() if reason_match else ""
+
+    return card_description_html(card_company, benefits, recommendation)
+
+
+def card_description_html(card_company, benefits, recommendation):
+    """카드사 및 유형 / 관련 혜택 / 추천 이유 → 카드 설명 HTML"""
+    html_parts = []
+    if card_company:
+        html_parts.append("""<div class="card-section">
+<div class="section-title">카드사 및 유형</div>
+<div class="company-info">{}</div>
+</div>""".format(card_company))
+
+    if benefits:
+        benefits_html = '<ul class="benefits-list">' + ''.join(f'<li>{benefit}</li>' for benefit in benefits) + '</ul>'
+        html_parts.append("""<div class="card-section">
+<div class="section-title">관련 혜택</div>
+{}
+</div>""".format(benefits_html))
+
+    if recommendation:
+        html_parts.append("""<div class="card-section">
+<div class="section-title">추천 이유</div>
+<div class="recommendation">{}</div>
+</div>""".format(recommendation))
+
+    return ''.join(html_parts)
+
+
+def _match_card(card_name, image_info, by_name, position):
+    """답변의 카드명 → 검색된 카드 (정확히 같은 이름 → 이름 포함 → 같은 순서 → 첫 번째 카드)"""
+    card = by_name.get(card_name)
+    if card is not None:
+        return card
+    for card in image_info:
+        if card_name in card.get("card_name", ""):
+            return card
+    if len(image_info) > position:
+        return image_info[position]
+    return image_info[0] if image_info else None
+
+
+def card_block(card_num, card_name, card, card_text) -> dict:
+    return {
+        "card_num": card_num,
+        "card_name": card_name,
+        "image_url": card["image_url"],
+        "caption": card.get("card_name", "카드 이름 없음"),
+        "html": CARD_CONTAINER_STYLE.format(card_num=card_num, card_name=card_name, card_text=card_text)
+    }
+
+
+def render_answer(answer, image_info) -> dict:
+    """
+    답변 한 턴을 화면에 그릴 조각으로 변환합니다.
+    반환: {"intro": 소개 문단 또는 None, "cards": [{"card_num", "card_name", "image_url", "caption", "html"}], "fallback": 전체 답변 표시 여부}
+    """
+    if not image_info:
+        return {"intro": None, "cards": [], "fallback": True}
+
+    card_names = [name.strip() for _, name in extract_card_info(answer)]
+    card_sections = CARD_SPLIT.split(answer)
+
+    # 전체 응답에서 카드 정보 부분을 제외한 소개/결론 부분 (광고 문구가 아닌 경우에만)
+    intro_text = remove_ad_lines(card_sections[0] if card_sections else "").strip()
+    intro = intro_text if intro_text and not any(keyword in intro_text for keyword in AD_KEYWORDS) else None
+
+    cards = []
+    if len(card_sections) > 1:
+        by_name = {}
+        for card in image_info:
+            by_name.setdefault(card.get("card_name", ""), card)
+        for j, card_name in enumerate(card_names):
+            matching_card = _match_card(card_name, image_info, by_name, j)
+            if not matching_card or not matching_card.get("image_url"):
+                continue
+            section_text = card_sections[j + 1] if j + 1 < len(card_sections) else ""
+            cards.append(card_block(j + 1, card_name, matching_card, clean_card_description(section_text)))
+    return {"intro": intro, "cards": cards, "fallback": False}
+
+
+# ✅ 구조화 출력(llm.structured_answer) 답변: 정규식 없이 필드에서 바로 HTML 구성
+def render_structured_card(card, card_num, image_info):
+    """CardRecommendation 하나 → 카드 블록. 검색되지 않은 card_id 나 이미지가 없는 카드는 None"""
+    matching_card = next((info for info in image_info or [] if str(info["card_id"]) == card.card_id), None)
+    if not matching_card or not matching_card.get("image_url"):
+        return None
+    company = ", ".join(part for part in (matching_card.get("company"), matching_card.get("card_type")) if part)
+    card_text = card_description_html(company, [benefit.strip() for benefit in card.benefits if benefit.strip()], card.reason.strip())
+    return card_block(card_num, matching_card.get("card_name", card.card_id), matching_card, card_text)
+
+
+def render_structured(answer, image_info) -> dict:
+    """CardAnswer → render_answer 와 같은 형태의 dict"""
+    cards = []
+    for card in answer.cards:
+        block = render_structured_card(card, len(cards) + 1, image_info)
+        if block is not None:
+            cards.append(block)
+    return {"intro": answer.intro.strip() or None, "cards": cards, "fallback": False}
@@ -0,0 +1,93 @@
+# 📁 utils/resources.py
+# 지연 로딩 리소스 레지스트리
+# - @lazy_resource 로 등록한 로더는 처음 호출될 때 한 번만 실행되는 프로세스 전역 싱글턴 (st.cache_resource 와 유사)
+#   로더가 None 을 반환하면 캐시하지 않으므로 인덱스를 나중에 만들어도 재시작 없이 다음 호출 때 로드됩니다.
+# - warm_up() 으로 백그라운드 스레드에서 미리 로드하여 UI 는 바로 그리고, 첫 사용 시 대기 시간을 줄임
+# - 시작 단계별/리소스별 소요 시간을 기록하여 콜드 스타트 회귀를 확인
+
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+_instances = {}
+_locks = {}
+_registry_lock = threading.Lock()
+_timings = {}
+
+
+def _record(name, seconds):
+    _timings[name] = seconds
+    print("[startup] {0}: {1:.2f}초".format(name, seconds))
+
+
+def lazy_resource(name):
+    """
+    @lazy_resource("embedding_model")
+    def get_embedding_model():
+        return SentenceTransformer(...)
+    """
+    def decorator(loader):
+        with _registry_lock:
+            _locks.setdefault(name, threading.Lock())
+
+        @functools.wraps(loader)
+        def getter():
+            if name in _instances:
+                return _instances[name]
+            # 같은 리소스를 워밍업 스레드와 요청 스레드가 동시에 요청하면 한쪽이 끝날 때까지 대기
+            with _locks[name]:
+                if name not in _instances:
+                    started = time.perf_counter()
+                    instance = loader()
+                    if instance is None:
+                        # 아직 준비되지 않은 리소스(인덱스 미생성 등)는 저장하지 않고 다음 호출 때 다시 로드
+                        print("⚠️ 리소스를 로드하지 못했습니다: {} (다음 사용 시 다시 시도)".format(name))
+                        return None
+                    _instances[name] = instance
+                    _record("resource:" + name, time.perf_counter() - started)
+            return _instances[name]
+
+        getter.resource_name = name
+        getter.is_loaded = lambda: name in _instances
+        return getter
+    return decorator
+
+
+def reset_resource(name):
+    """테스트/재설정용: 다음 호출 때 다시 로드되도록 캐시된 인스턴스를 버립니다."""
+    with _locks.get(name, _registry_lock):
+        _instances.pop(name, None)
+
+
+def warm_up(getters, background=True):
+    """getter 함수들을 차례로 호출하여 미리 로드합니다. 실패해도 첫 사용 시 다시 시도합니다."""
+    def run():
+        started = time.perf_counter()
+        for getter in getters:
+            try:
+                getter()
+            except Exception as e:
+                print("⚠️ 워밍업 실패: {0} ({1})".format(getattr(getter, "resource_name", getter.__name__), e))
+        _record("warm_up", time.perf_counter() - started)
+
+    if not background:
+        run()
+        return None
+    thread = threading.Thread(target=run, name="resource-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+@contextmanager
+def startup_phase(name):
+    """with startup_phase("imports"): ... 형태로 시작 단계 소요 시간을 기록합니다."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record("phase:" + name, time.perf_counter() - started)
+
+
+def startup_timings() -> dict:
+    return dict(_timings)
@@ -0,0 +1,354 @@
+# 📁 utils/telemetry.py
+# 가벼운 추적(span) + 지표(counter / histogram) 계층
+# - span("rag.retrieve") : 단계별 소요 시간을 rag_stage_seconds 히스토그램에 기록하고,
+#   trace_id / span_id / parent_span_id 를 가진 OpenTelemetry 형식 span 을 JSON lines 파일로 내보냅니다.
+#   opentelemetry 패키지가 설치되어 있고 TELEMETRY_OTEL=1 이면 같은 span 을 OTel tracer 로도 보냅니다.
+# - Prometheus 텍스트 형식으로 /metrics 엔드포인트(TELEMETRY_METRICS_PORT) 또는 파일(TELEMETRY_METRICS_PATH)로 노출합니다.
+# TELEMETRY=1 이 아니면 span() 은 공용 no-op 객체를 돌려주고 지표 기록은 즉시 반환하므로 오버헤드가 거의 없습니다.
+
+import atexit
+import contextvars
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENABLED = os.getenv("TELEMETRY", "0") == "1"
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+_metrics = {}
+_collectors = []
+_registry_lock = threading.Lock()
+
+
+def _label_text(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join('{0}="{1}"'.format(key, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+                          for key, value in labels) + "}"
+
+
+def _number(value) -> str:
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value)) if value != float("inf") else "+Inf"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        if not ENABLED:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=SECONDS_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels → [버킷별 개수..., 합계, 개수]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        if not ENABLED:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+                    break
+            row[-2] += value
+            row[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            rows = [(key, list(row)) for key, row in self._values.items()]
+        samples = []
+        for key, row in rows:
+            cumulative = 0
+            for bound, count in zip(self.buckets, row):
+                cumulative += count
+                samples.append((self.name + "_bucket", key + (("le", _number(bound)),), cumulative))
+            samples.append((self.name + "_bucket", key + (("le", "+Inf"),), row[-1]))
+            samples.append((self.name + "_sum", key, row[-2]))
+            samples.append((self.name + "_count", key, row[-1]))
+        return samples
+
+
+def _register(cls, name, *args):
+    with _registry_lock:
+        if name not in _metrics:
+            _metrics[name] = cls(name, *args)
+        return _metrics[name]
+
+
+def counter(name, help_text) -> Counter:
+    return _register(Counter, name, help_text)
+
+
+def histogram(name, help_text, buckets=SECONDS_BUCKETS) -> Histogram:
+    return _register(Histogram, name, help_text, buckets)
+
+
+def register_collector(collect):
+    """collect() → [(이름, 종류, 설명, {라벨}, 값), ...] 를 /metrics 조회 시점에만 호출합니다."""
+    with _registry_lock:
+        _collectors.append(collect)
+
+
+def watch_cache(name, cache):
+    """hits / misses 속성을 가진 캐시의 적중 수와 적중률을 노출합니다 (요청 경로에는 비용 없음)."""
+    def collect():
+        hits, misses = cache.hits, cache.misses
+        total = hits + misses
+        labels = {"cache": name}
+        return [
+            ("cache_hits_total", "counter", "캐시 적중 수", labels, hits),
+            ("cache_misses_total", "counter", "캐시 미적중 수", labels, misses),
+            ("cache_hit_ratio", "gauge", "캐시 적중률", labels, hits / total if total else 0.0),
+        ]
+    register_collector(collect)
+
+
+# ✅ 공용 지표
+STAGE_SECONDS = histogram("rag_stage_seconds", "단계별 소요 시간 (span)")
+STAGE_ERRORS = counter("rag_stage_errors_total", "예외로 끝난 단계 수")
+TTFT_SECONDS = histogram("rag_ttft_seconds", "질문부터 첫 답변 토큰까지 시간")
+LLM_REQUESTS = counter("llm_requests_total", "OpenAI 호출 수")
+LLM_TOKENS = histogram("llm_tokens", "요청당 프롬프트/응답 토큰 수", TOKEN_BUCKETS)
+
+
+# ✅ span
+_current_span = contextvars.ContextVar("telemetry_span", default=None)
+_spans_lock = threading.Lock()
+_spans_file = None
+_tracer = None
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+        self.trace_id = self.span_id = self.parent_span_id = None
+        self._otel_context = self._otel_span = self._token = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+        if self._otel_span is not None:
+            self._otel_span.set_attribute(key, value)
+
+    def __enter__(self):
+        parent = _current_span.get()
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.parent_span_id = parent.span_id if parent else None
+        self.span_id = os.urandom(8).hex()
+        self._token = _current_span.set(self)
+        if _tracer is not None:
+            self._otel_context = _tracer.start_as_current_span(self.name, attributes=dict(self.attributes))
+            self._otel_span = self._otel_context.__enter__()
+        self.start_ns = time.time_ns()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._started
+        self.end_ns = self.start_ns + int(duration * 1e9)
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            pass  # 제너레이터처럼 다른 컨텍스트에서 끝난 경우
+        if self._otel_context is not None:
+            self._otel_context.__exit__(exc_type, exc, tb)
+
+        STAGE_SECONDS.observe(duration, stage=self.name)
+        if exc_type is not None:
+            STAGE_ERRORS.inc(stage=self.name)
+        if _spans_file is not None:
+            record = {
+                "name": self.name,
+                "trace_id": self.trace_id,
+                "span_id": self.span_id,
+                "parent_span_id": self.parent_span_id,
+                "start_time_unix_nano": self.start_ns,
+                "end_time_unix_nano": self.end_ns,
+                "status": "ERROR" if exc_type is not None else "OK",
+                "attributes": self.attributes
+            }
+            line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+            with _spans_lock:
+                _spans_file.write(line)
+        return False
+
+
+def span(name, **attributes):
+    """with span("rag.retrieve", top_k=5) as s: ... (비활성 시 no-op)"""
+    if not ENABLED:
+        return _NOOP_SPAN
+    return Span(name, attributes)
+
+
+def traced(name):
+    """함수 전체를 span 으로 감쌉니다. 비활성 시에는 원래 함수를 그대로 반환합니다."""
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        def wrapper(*args, **kwargs):
+            with Span(name, {}):
+                return func(*args, **kwargs)
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        wrapper.__wrapped__ = func
+        return wrapper
+    return decorator
+
+
+# ✅ Prometheus 텍스트 형식
+def render_prometheus() -> str:
+    lines = []
+    with _registry_lock:
+        metrics = list(_metrics.values())
+        collectors = list(_collectors)
+
+    for metric in metrics:
+        samples = metric.samples()
+        if not samples:
+            continue
+        lines.append("# HELP {0} {1}".format(metric.name, metric.help))
+        lines.append("# TYPE {0} {1}".format(metric.name, metric.kind))
+        for name, labels, value in samples:
+            lines.append("{0}{1} {2}".format(name, _label_text(labels), _number(value)))
+
+    described = set()
+    for collect in collectors:
+        try:
+            rows = collect()
+        except Exception as e:
+            print("⚠️ 지표 수집 실패: {}".format(e))
+            continue
+        for name, kind, help_text, labels, value in rows:
+            if name not in described:
+                described.add(name)
+                lines.append("# HELP {0} {1}".format(name, help_text))
+                lines.append("# TYPE {0} {1}".format(name, kind))
+            lines.append("{0}{1} {2}".format(name, _label_text(sorted(labels.items())), _number(value)))
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics_file(path):
+    """node_exporter textfile collector 등에서 읽을 수 있도록 임시 파일에 쓴 뒤 교체합니다."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+_started = False
+_start_lock = threading.Lock()
+
+
+def init_telemetry():
+    """
+    TELEMETRY=1 일 때 exporter 들을 한 번만 시작합니다.
+    - TELEMETRY_METRICS_PORT : /metrics HTTP 엔드포인트 (TELEMETRY_METRICS_HOST, 기본 127.0.0.1)
+    - TELEMETRY_METRICS_PATH : Prometheus 텍스트 파일 (TELEMETRY_EXPORT_INTERVAL 초마다, 종료 시에도 기록)
+    - TELEMETRY_SPANS_PATH   : span JSON lines 파일
+    - TELEMETRY_OTEL=1       : opentelemetry tracer 로도 전송 (설치되어 있을 때)
+    """
+    global _started, _spans_file, _tracer
+    if not ENABLED:
+        return False
+    with _start_lock:
+        if _started:
+            return True
+        _started = True
+
+        spans_path = os.getenv("TELEMETRY_SPANS_PATH")
+        if spans_path:
+            os.makedirs(os.path.dirname(spans_path) or ".", exist_ok=True)
+            _spans_file = open(spans_path, "a", encoding="utf-8", buffering=1)
+
+        if os.getenv("TELEMETRY_OTEL", "0") == "1":
+            try:
+                from opentelemetry import trace
+                _tracer = trace.get_tracer("card_rag")
+            except ImportError:
+                print("⚠️ 경고: opentelemetry 패키지가 없어 OTel 전송을 건너뜁니다.")
+
+        port = os.getenv("TELEMETRY_METRICS_PORT")
+        if port:
+            server = ThreadingHTTPServer((os.getenv("TELEMETRY_METRICS_HOST", "127.0.0.1"), int(port)), _MetricsHandler)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="telemetry-metrics", daemon=True).start()
+            print("✅ 지표 엔드포인트: http://{0}:{1}/metrics".format(*server.server_address))
+
+        metrics_path = os.getenv("TELEMETRY_METRICS_PATH")
+        if metrics_path:
+            interval = float(os.getenv("TELEMETRY_EXPORT_INTERVAL", "15"))
+
+            def export_loop():
+                while True:
+                    time.sleep(interval)
+                    try:
+                        write_metrics_file(metrics_path)
+                    except Exception as e:
+                        print("⚠️ 지표 파일 저장 실패: {}".format(e))
+
+            threading.Thread(target=export_loop, name="telemetry-export", daemon=True).start()
+            atexit.register(write_metrics_file, metrics_path)
+            print("✅ 지표 파일: {0} ({1:.0f}초마다)".format(metrics_path, interval))
+    return True
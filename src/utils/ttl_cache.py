@@ -0,0 +1,61 @@
+# 📁 utils/ttl_cache.py
+# 크기 제한(LRU) + 만료 시간(TTL) 이 있는 스레드 안전 메모리 캐시
+# LLM 답변 캐시(llm.response_cache)와 DB 조회 캐시(db.db_utils)가 함께 사용합니다.
+# 빈 목록이나 None 도 그대로 저장하므로, 결과가 없는 조회도 TTL 동안 다시 하지 않습니다.
+
+import threading
+import time
+from collections import OrderedDict
+
+# get() 의 기본 반환값: 저장된 None / [] 와 미적중을 구분할 때 사용
+MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, max_size=512, ttl=3600.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items = OrderedDict()  # key → (만료 시각, 값)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        """저장된 값. 없거나 만료되었으면 default (빈 결과도 캐시하려면 default=MISSING 으로 구분)"""
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item[0] < time.monotonic():
+                del self._items[key]
+                self.expirations += 1
+                item = None
+            if item is None:
+                self.misses += 1
+                return default
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, value)
+            self._items.move_to_end(key)
+            # 가장 오래 사용하지 않은 항목부터 제거 (LRU)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._items),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / total if total else 0.0
+            }
@@ -1,3 +1,176 @@
+# 📁 utils/user_summary.py
+# 사용자 소비 성향 요약
+# - summarize_user_info: 프로필 탭 표시용 마크다운
+# - compute_profile_features / format_profile_summary: 챗봇 프롬프트용 요약
+#   user_transactions 전체를 pandas/NumPy 로 한 번에 계산하여 user_profile_summaries 테이블에 미리 저장합니다.
+
+import json
+
+import numpy as np
+import pandas as pd
+
+# 요약 문구/계산 방식을 바꾸면 올려서 저장된 요약을 모두 다시 계산
+SUMMARY_VERSION = "1"
+
+# 챗봇 프롬프트용 소비 카테고리 매핑
+SPENDING_CATEGORY_NAMES = {
+    "CLOTH": "쇼핑/의류",
+    "RESTRNT": "외식",
+    "TRVL": "여행",
+    "INSU": "보험",
+    "HOS": "의료/병원",
+    "CULTURE": "문화생활",
+    "OFFEDU": "교육",
+    "LEISURE_P": "레저/취미",
+    "LEISURE_S": "스포츠",
+    "DIST": "유통",
+    "GROCERY": "식료품",
+    "AUTOSL": "자동차",
+    "FUNITR": "가구/인테리어",
+    "APPLNC": "가전제품"
+}
+LEISURE_CATEGORIES = ["TRVL", "CULTURE", "LEISURE_P", "LEISURE_S"]
+DAILY_CATEGORIES = ["RESTRNT", "GROCERY", "DIST"]
+TOP_N_CATEGORIES = 8
+
+# 월평균 소비 컬럼(spending_columns) 외에 요약 계산에 쓰는 컬럼
+PROFILE_INPUT_COLUMNS = [
+    "TOT_USE_AM_mean", "AGE_encoded", "SEX_CD_encoded", "DIGT_CHNL_USE_YN_encoded", "TOP_SPENDING_CATEGORY_encoded"
+]
+HASH_SIGNIFICANT_DIGITS = 6  # float32 로 저장된 값도 원래 값과 같아지는 자릿수
+
+
+def spending_columns(columns):
+    """총액(TOT_)을 제외한 월평균 소비 컬럼"""
+    return [col for col in columns if col.endswith('_mean') and not col.startswith('TOT_')]
+
+
+def compute_profile_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    user_transactions 행들(DataFrame)로 사용자별 요약 지표를 한 번에 계산합니다.
+    상위 소비 카테고리, 집중도(1위 / 총액), 소비 규모, 여가/일상 소비 합계를 반환합니다.
+    """
+    columns = spending_columns(df.columns)
+    categories = np.array([col.replace('_AM_mean', '') for col in columns])
+    amounts = df[columns].apply(pd.to_numeric, errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+    total = pd.to_numeric(df["TOT_USE_AM_mean"], errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+
+    # 금액 내림차순 상위 N 개 (같은 금액이면 컬럼 순서 유지)
+    k = min(TOP_N_CATEGORIES, len(columns))
+    order = np.argsort(-amounts, axis=1, kind="stable")[:, :k]
+    top_amounts = np.take_along_axis(amounts, order, axis=1)
+    top_categories = categories[order]
+
+    leisure = np.where(np.isin(top_categories, LEISURE_CATEGORIES), top_amounts, 0).sum(axis=1)
+    daily = np.where(np.isin(top_categories, DAILY_CATEGORIES), top_amounts, 0).sum(axis=1)
+    top1 = top_amounts[:, 0] if k else np.zeros(len(df))
+    concentration = np.divide(top1, total, out=np.zeros_like(total), where=total > 0)
+
+    spend_tier = np.select([total > 2.0, total > 1.0], ["high", "mid"], default="low")  # 200만원 / 100만원 기준
+    lifestyle = np.select([leisure > daily * 1.5, daily > leisure * 1.5], ["leisure", "daily"], default="balanced")
+
+    top_code = pd.to_numeric(df["TOP_SPENDING_CATEGORY_encoded"], errors="coerce") \
+        if "TOP_SPENDING_CATEGORY_encoded" in df else pd.Series(np.nan, index=df.index)
+
+    return pd.DataFrame({
+        "SEQ": df["SEQ"].astype(str).to_numpy(),
+        "age_group": pd.to_numeric(df["AGE_encoded"], errors="coerce").fillna(0).astype(int).to_numpy(),
+        "sex": pd.to_numeric(df["SEX_CD_encoded"], errors="coerce").fillna(0).astype(int).to_numpy(),
+        "digital": pd.to_numeric(df["DIGT_CHNL_USE_YN_encoded"], errors="coerce").fillna(0).astype(int).to_numpy(),
+        "total_spending": total,
+        "top_category_code": top_code.astype("Int64").to_numpy(),
+        "top_categories": [
+            json.dumps([[cat, round(float(amount), 6)] for cat, amount in zip(cats, amts) if amount > 0])
+            for cats, amts in zip(top_categories, top_amounts)
+        ],
+        "concentration": concentration,
+        "spend_tier": spend_tier,
+        "leisure_spending": leisure,
+        "daily_spending": daily,
+        "lifestyle": lifestyle,
+    })
+
+
+def profile_input_columns(columns) -> list:
+    """요약 계산(compute_profile_features)에 쓰이는 입력 컬럼. 행 해시도 이 컬럼만 사용합니다."""
+    return sorted(spending_columns(columns) + [col for col in PROFILE_INPUT_COLUMNS if col in columns])
+
+
+def _hash_values(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    해시용 입력 값: 요약 입력 컬럼만 float64 로 바꾸고 유효 숫자 HASH_SIGNIFICANT_DIGITS 자리로 반올림합니다.
+    MySQL 행(Decimal, VARCHAR 컬럼 포함, 한 행/청크마다 다른 dtype)과 피처 저장소 행(숫자 컬럼만, 이전 버전은 float32)이
+    같은 사용자라면 같은 해시가 되도록 두 원본이 공통으로 가진 값과 정밀도만 사용합니다.
+    """
+    columns = profile_input_columns(df.columns)
+    values = df[columns].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        magnitude = np.floor(np.log10(np.abs(values)))
+    scale = 10.0 ** (HASH_SIGNIFICANT_DIGITS - 1 - np.where(np.isfinite(magnitude), magnitude, 0))
+    # + 0.0 : -0.0 을 0.0 으로 통일
+    return pd.DataFrame(np.round(values * scale) / scale + 0.0, columns=columns, index=df.index)
+
+
+def row_hashes(df: pd.DataFrame) -> pd.Series:
+    """원본 행 내용 해시 (SUMMARY_VERSION 포함). 바뀐 사용자만 다시 계산할 때 비교합니다."""
+    hashes = pd.util.hash_pandas_object(_hash_values(df), index=False)
+    return hashes.map(lambda value: "{0}:{1:016x}".format(SUMMARY_VERSION, value))
+
+
+def format_profile_summary(features) -> str:
+    """compute_profile_features 의 한 행(dict/Series) → 챗봇 프롬프트용 요약 문장"""
+    top_spending = json.loads(features["top_categories"]) if isinstance(features["top_categories"], str) \
+        else features["top_categories"]
+
+    summary_lines = [
+        "[사용자 정보 요약]",
+        f"- 연령대: {features['age_group']}0대",
+        f"- 성별: {'여성' if features['sex'] == 1 else '남성'}",
+        f"- 디지털 채널 이용: {'예' if features['digital'] == 1 else '아니오'}",
+        "- 최근 소비 항목 분석 (월평균 지출):"
+    ]
+
+    # 상위 소비 항목 추가
+    for category, amount in top_spending:
+        if amount > 0:
+            category_name = SPENDING_CATEGORY_NAMES.get(category, category)
+            summary_lines.append(f"  • {category_name}: {amount*1000:,.0f}원")
+
+    # 주요 소비 패턴 분석
+    top_code = features["top_category_code"]
+    if top_code is not None and not pd.isna(top_code) and top_code != 0:
+        summary_lines.append("")
+        summary_lines.append("[주요 소비 패턴]")
+        summary_lines.append(f"- 최대 지출 카테고리: {int(top_code)}")
+
+        total_spending = features["total_spending"]
+        if total_spending > 0:
+            # 소비 집중도 분석
+            if features["concentration"] > 0.3:
+                top_name = SPENDING_CATEGORY_NAMES.get(top_spending[0][0], top_spending[0][0])
+                summary_lines.append(f"- 소비 성향: 특정 카테고리({top_name})에 집중된 소비 패턴")
+            else:
+                summary_lines.append(f"- 소비 성향: 다양한 카테고리에 분산된 소비 패턴")
+
+            # 소비 규모 분석
+            tier_label = {"high": "고액 소비자", "mid": "중간 소비자"}.get(features["spend_tier"], "소액 소비자")
+            summary_lines.append(f"- 소비 규모: {tier_label} (월평균 {total_spending*1000:,.0f}원)")
+
+            # 소비 패턴 분석
+            lifestyle_label = {
+                "leisure": "여가/문화 활동 중심 소비자",
+                "daily": "일상/생활 중심 소비자"
+            }.get(features["lifestyle"], "균형 있는 소비자")
+            summary_lines.append(f"- 소비 특성: {lifestyle_label}")
+
+    return "\n".join(summary_lines)
+
+
+def summarize_user_row(user: dict) -> str:
+    """user_transactions 한 행(dict)으로 바로 요약 (미리 계산된 요약이 없을 때 사용)"""
+    return format_profile_summary(compute_profile_features(pd.DataFrame([user])).iloc[0])
+
+
 def summarize_user_info(user: dict) -> str:
     # 카테고리 코드 매핑 테이블 추가
     category_mapping = {
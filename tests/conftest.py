@@ -0,0 +1,7 @@
+# 📁 tests/conftest.py
+# src 패키지(db, llm, utils ...) 를 import 할 수 있도록 경로 추가
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
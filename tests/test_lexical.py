@@ -0,0 +1,46 @@
+# 📁 tests/test_lexical.py
+# BM25 where 필터: 벡터화한 마스크(MetadataFilter)가 matches_where 와 같은 결과인지 확인
+
+import pytest
+
+from models.lexical import BM25Index
+from models.retriever import MetadataFilter, matches_where
+
+METADATAS = [
+    {"card_id": 1, "card_type": "체크카드", "company": "신한카드"},
+    {"card_id": 2, "card_type": "신용카드", "company": "현대카드", "cluster_3": 0.2},
+    {"card_id": 3, "card_type": "신용카드", "company": "신한카드"},
+    {"card_id": 4, "company": "KB국민카드"},
+]
+DOCUMENTS = ["- 스타벅스 50% 할인", "- 스타벅스 10% 적립", "- 주유 할인", "- 스타벅스 배달 할인"]
+
+WHERE_CASES = [
+    {"card_type": "신용카드"},
+    {"card_type": {"$eq": "체크카드"}},
+    {"card_type": {"$ne": "신용카드"}},
+    {"company": {"$in": ["신한카드", "KB국민카드"]}},
+    {"company": {"$nin": ["신한카드", "없는카드"]}},
+    {"company": {"$in": ["없는카드"]}},
+    {"card_type": None},
+    {"$and": [{"card_type": "신용카드"}, {"company": {"$in": ["신한카드"]}}]},
+    {"$or": [{"card_type": "체크카드"}, {"company": "KB국민카드"}]},
+    {"card_type": "신용카드", "company": "현대카드"},
+]
+
+
+@pytest.mark.parametrize("where", WHERE_CASES)
+def test_mask_matches_where(where):
+    expected = [matches_where(meta, where) for meta in METADATAS]
+    assert MetadataFilter(METADATAS).mask(where).tolist() == expected
+
+
+def test_mask_is_cached():
+    where_filter = MetadataFilter(METADATAS)
+    assert where_filter.mask({"card_type": "신용카드"}) is where_filter.mask({"card_type": "신용카드"})
+
+
+def test_bm25_search_with_where():
+    index = BM25Index(["a", "b", "c", "d"], DOCUMENTS, METADATAS)
+    rows = [row for row, _ in index.search("스타벅스 할인", top_k=10, where={"company": {"$in": ["신한카드", "KB국민카드"]}})]
+    assert sorted(rows) == [0, 2, 3]
+    assert {row for row, _ in index.search("스타벅스", top_k=10)} == {0, 1, 3}
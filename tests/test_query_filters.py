@@ -0,0 +1,58 @@
+# 📁 tests/test_query_filters.py
+# 질문 → 카드사/카드 유형 필터: 일상 단어가 카드사 별칭으로 잡히지 않는지 확인
+
+import pytest
+
+from llm.query_filters import build_where, company_aliases, detect_card_type, detect_companies
+
+COMPANIES = ["하나카드", "우리카드", "현대카드", "롯데카드", "KB국민카드", "신한카드", "삼성카드", "NH농협카드"]
+
+# ✅ (질문, 기대 카드사 목록)
+COMPANY_CASES = [
+    # 카드사 이름과 겹치는 일상 단어 → 필터 없음
+    ("카페 할인 카드 하나만 추천해줘", []),
+    ("우리 가족 외식 혜택 좋은 카드", []),
+    ("현대백화점 할인되는 카드", []),
+    ("롯데마트 장볼 때 좋은 카드", []),
+    ("하나의 카드로 다 되는 거 있어?", []),
+    # 카드사를 지정한 질문
+    ("하나카드 중에 커피 할인", ["하나카드"]),
+    ("하나 카드 중에 커피 할인", ["하나카드"]),
+    ("우리 체크카드 추천", ["우리카드"]),
+    ("신한 체크카드 추천", ["신한카드"]),
+    ("국민 신용카드 주유 혜택", ["KB국민카드"]),
+    ("KB 주유 할인", ["KB국민카드"]),
+    ("농협카드 추천", ["NH농협카드"]),
+    ("삼성카드랑 현대카드 비교", ["현대카드", "삼성카드"]),
+]
+
+
+class _Catalog:
+    version = None
+
+    def companies(self):
+        return sorted(COMPANIES)
+
+
+@pytest.mark.parametrize("question, expected", COMPANY_CASES)
+def test_detect_companies(question, expected):
+    assert sorted(detect_companies(question, company_aliases(COMPANIES))) == sorted(expected)
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("체크카드 추천", "체크카드"),
+    ("신용카드 중에 주유", "신용카드"),
+    ("체크랑 신용 비교", None),
+    ("커피 할인 카드", None),
+])
+def test_detect_card_type(question, expected):
+    assert detect_card_type(question) == expected
+
+
+def test_build_where():
+    catalog = _Catalog()
+    assert build_where("커피 할인 카드", catalog) is None
+    assert build_where("우리 가족 외식 혜택 좋은 카드", catalog) is None
+    assert build_where("신한 체크카드 추천", catalog) == {
+        "$and": [{"card_type": "체크카드"}, {"company": {"$in": ["신한카드"]}}]
+    }
@@ -0,0 +1,25 @@
+# 📁 tests/test_rag_answer.py
+# 검색 결과가 없을 때의 ask_card_rag 반환 형식 (stream=True 면 항상 청크 스트림)
+
+import pytest
+
+from llm import rag_answer
+
+
+@pytest.fixture
+def no_results(monkeypatch):
+    # 인덱스가 없거나 검색 결과가 비어 있는 경우
+    monkeypatch.setattr(rag_answer, "encode_question", lambda question: [])
+    monkeypatch.setattr(rag_answer, "retrieve_benefits", lambda *args, **kwargs: ([], [], []))
+
+
+def test_no_result_stream_yields_chunks(no_results):
+    stream, image_info, card_ids = rag_answer.ask_card_rag("커피 할인 카드", stream=True)
+    text = "".join(chunk.choices[0].delta.content for chunk in stream)
+    assert text == rag_answer.NO_RESULT_MESSAGE
+    assert (image_info, card_ids) == ([], [])
+
+
+def test_no_result_without_stream_is_text(no_results):
+    answer, _, _ = rag_answer.ask_card_rag("커피 할인 카드")
+    assert answer == rag_answer.NO_RESULT_MESSAGE
@@ -0,0 +1,33 @@
+# 📁 tests/test_resources.py
+# 지연 로딩 리소스: 로드 결과는 한 번만 만들고, 아직 준비되지 않은 리소스(None)는 캐시하지 않는지 확인
+
+from utils.resources import lazy_resource, reset_resource
+
+
+def test_lazy_resource_loads_once():
+    calls = []
+
+    @lazy_resource("test_once")
+    def get_value():
+        calls.append(1)
+        return object()
+
+    assert get_value() is get_value()
+    assert len(calls) == 1
+    assert get_value.is_loaded()
+    reset_resource("test_once")
+
+
+def test_lazy_resource_retries_none():
+    results = [None, "index"]
+
+    @lazy_resource("test_missing_index")
+    def get_index():
+        return results.pop(0)
+
+    # 인덱스가 없을 때의 None 은 저장하지 않고, 인덱스가 생긴 뒤 다음 호출에서 로드
+    assert get_index() is None
+    assert not get_index.is_loaded()
+    assert get_index() == "index"
+    assert get_index() == "index"
+    reset_resource("test_missing_index")
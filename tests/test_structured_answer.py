@@ -0,0 +1,108 @@
+# 📁 tests/test_structured_answer.py
+# 구조화 답변 스트리밍 파서(CardStreamParser)와 카드 블록 변환 확인
+
+import json
+
+from llm.structured_answer import CardAnswer, CardRecommendation, CardStreamParser, parse_answer
+from utils.answer_render import render_structured, render_structured_card
+
+CARDS = [
+    {"card_id": "101", "benefits": ["스타벅스 50% 할인", "배달앱 10% 적립"], "reason": "커피를 자주 마시는 분께 적합"},
+    {"card_id": "202", "benefits": ["주유 리터당 60원 할인"], "reason": "출퇴근 운전이 많은 분께 적합"},
+]
+
+IMAGE_INFO = [
+    {"card_id": 101, "card_name": "커피 카드", "image_url": "https://example.com/101.png", "company": "신한카드", "card_type": "신용카드"},
+    {"card_id": 202, "card_name": "주유 카드", "image_url": "https://example.com/202.png", "company": "현대카드", "card_type": "체크카드"},
+]
+
+
+def _answer_json(intro="커피와 주유 혜택 카드를 추천드려요.", cards=CARDS, cards_first=False):
+    payload = {"cards": cards, "intro": intro} if cards_first else {"intro": intro, "cards": cards}
+    return json.dumps(payload, ensure_ascii=False)
+
+
+def _feed_chars(parser, text):
+    # 한 글자씩 넣으면서 카드가 완성된 위치를 기록
+    completed = []
+    for pos, ch in enumerate(text):
+        for card in parser.feed(ch):
+            completed.append((pos, card))
+    return completed
+
+
+def test_one_character_chunks():
+    text = _answer_json()
+    parser = CardStreamParser()
+    completed = _feed_chars(parser, text)
+
+    assert [card.card_id for _, card in completed] == ["101", "202"]
+    # 첫 카드는 두 번째 카드가 시작되기 전에 나와야 함
+    assert completed[0][0] < text.index('"202"')
+    assert parser.intro == "커피와 주유 혜택 카드를 추천드려요."
+    assert parser.result() == CardAnswer.model_validate_json(text)
+
+
+def test_escapes_and_brackets_inside_strings():
+    cards = [{
+        "card_id": "101",
+        "benefits": ['"프리미엄" 라운지 {무료} [연 2회]', "경로 C:\\카드\\혜택 \\\" 끝"],
+        "reason": "괄호 } ] 와 따옴표 \" 가 있어도 카드 하나",
+    }]
+    text = _answer_json(intro='소개 {"cards": [1]} 문장 \\', cards=cards)
+    parser = CardStreamParser()
+    completed = [card for _, card in _feed_chars(parser, text)]
+
+    assert completed == [CardRecommendation(**cards[0])]
+    assert parser.intro == '소개 {"cards": [1]} 문장 \\'
+    assert parser.result().cards == completed
+
+
+def test_cards_before_intro():
+    text = _answer_json(cards_first=True)
+    parser = CardStreamParser()
+    completed = parser.feed(text[:text.index('"intro"')])
+
+    assert [card.card_id for card in completed] == ["101", "202"]
+    assert parser.intro is None
+    parser.feed(text[text.index('"intro"'):])
+    assert parser.intro == "커피와 주유 혜택 카드를 추천드려요."
+    assert parse_answer(text).intro == parser.intro
+
+
+def test_truncated_stream_keeps_completed_cards():
+    text = _answer_json()
+    parser = CardStreamParser()
+    # 두 번째 카드 도중에 스트림이 끊긴 경우
+    parser.feed(text[:text.index('"202"') + 10])
+    result = parser.result()
+
+    assert result.intro == "커피와 주유 혜택 카드를 추천드려요."
+    assert [card.card_id for card in result.cards] == ["101"]
+
+
+def test_invalid_card_is_skipped():
+    cards = [{"card_id": "101", "benefits": "문자열 하나", "reason": "형식 오류"}, CARDS[1]]
+    parser = CardStreamParser()
+    assert [card.card_id for card in parser.feed(_answer_json(cards=cards))] == ["202"]
+
+
+def test_render_structured_card_unknown_id():
+    unknown = CardRecommendation(card_id="999", benefits=["없는 카드"], reason="검색되지 않은 카드")
+    assert render_structured_card(unknown, 1, IMAGE_INFO) is None
+
+    block = render_structured_card(CardRecommendation(**CARDS[1]), 1, IMAGE_INFO)
+    assert block["card_name"] == "주유 카드"
+    assert block["image_url"] == "https://example.com/202.png"
+    assert "현대카드, 체크카드" in block["html"]
+
+
+def test_render_structured_renumbers_after_skipping():
+    answer = CardAnswer(intro=" 추천 ", cards=[
+        CardRecommendation(card_id="999", benefits=[], reason="검색되지 않은 카드"),
+        CardRecommendation(**CARDS[0]),
+    ])
+    rendered = render_structured(answer, IMAGE_INFO)
+
+    assert rendered["intro"] == "추천"
+    assert [(card["card_num"], card["card_name"]) for card in rendered["cards"]] == [(1, "커피 카드")]
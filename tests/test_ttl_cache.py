@@ -0,0 +1,44 @@
+# 📁 tests/test_ttl_cache.py
+# LRU + TTL 캐시: 빈 결과 캐시, 만료, 크기 제한 확인
+
+from llm.response_cache import ResponseCache
+from utils.ttl_cache import MISSING, TTLCache
+
+
+def test_caches_empty_results():
+    cache = TTLCache(max_size=4, ttl=60)
+    assert cache.get("user", MISSING) is MISSING
+    cache.put("user", [])
+    cache.put("no_cluster", None)
+    assert cache.get("user", MISSING) == []
+    assert cache.get("no_cluster", MISSING) is None
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_expires_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("utils.ttl_cache.time.monotonic", lambda: now[0])
+    cache = TTLCache(max_size=4, ttl=10)
+    cache.put("user", [1])
+    now[0] += 11
+    assert cache.get("user") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_evicts_least_recently_used():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.evictions == 1
+
+
+def test_response_cache_skips_empty_answer():
+    cache = ResponseCache(max_size=4, ttl=60)
+    cache.put("key", "")
+    assert cache.get("key") is None
+    cache.put("key", "답변")
+    assert cache.get("key") == "답변"
@@ -0,0 +1,57 @@
+# 📁 tests/test_user_summary.py
+# 원본 행 해시: 같은 사용자라면 읽어 온 경로(MySQL 청크 / 한 행 / 피처 저장소)와 무관하게 해시가 같은지 확인
+
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from db.feature_store import FeatureStore
+from utils.user_summary import row_hashes
+
+# MySQL(user_transactions) 에서 읽은 형태: DECIMAL → Decimal, VARCHAR 컬럼 포함, NULL → None
+ROWS = [
+    {"SEQ": "1001", "BAS_YH": "2023H2", "AGE_encoded": 3, "SEX_CD_encoded": 1, "DIGT_CHNL_USE_YN_encoded": 1,
+     "TOT_USE_AM_mean": Decimal("152.5"), "CLOTH_AM_mean": None, "RESTRNT_AM_mean": Decimal("1.37")},
+    {"SEQ": "1002", "BAS_YH": "2023H2", "AGE_encoded": 4, "SEX_CD_encoded": 2, "DIGT_CHNL_USE_YN_encoded": 0,
+     "TOT_USE_AM_mean": Decimal("98"), "CLOTH_AM_mean": 12.0, "RESTRNT_AM_mean": Decimal("30.1234")},
+]
+NUMERIC_COLUMNS = [col for col in ROWS[0] if col not in ("SEQ", "BAS_YH")]
+
+
+def _feature_store_frame(rows, dtype):
+    # export_feature_store 와 같이 숫자 컬럼만 (컬럼 × 사용자) 배열로 저장한 뒤 frame() 으로 읽음
+    df = pd.DataFrame(rows)
+    features = df[NUMERIC_COLUMNS].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=dtype).T
+    seqs = df["SEQ"].to_numpy(dtype=str)
+    order = np.argsort(seqs, kind="stable")
+    store = FeatureStore(None, features, seqs, seqs[order], order, NUMERIC_COLUMNS)
+    return store.frame()
+
+
+def test_row_hash_matches_single_row_frame():
+    # 청크에서는 CLOTH_AM_mean 이 float64(NaN), 한 행에서는 object(None) 로 추론됨
+    batch = row_hashes(pd.DataFrame(ROWS)).tolist()
+    single = [row_hashes(pd.DataFrame([row])).iloc[0] for row in ROWS]
+    assert batch == single
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_row_hash_matches_feature_store_frame(dtype):
+    # 피처 저장소에는 VARCHAR 컬럼이 없고, 이전 버전은 1.37 이 1.3700000047683716 인 float32
+    mysql = row_hashes(pd.DataFrame(ROWS)).tolist()
+    feature_store = row_hashes(_feature_store_frame(ROWS, dtype)).tolist()
+    assert mysql == feature_store
+
+
+def test_row_hash_ignores_numeric_dtype_and_column_order():
+    df = pd.DataFrame(ROWS)
+    converted = df.assign(AGE_encoded=df["AGE_encoded"].astype("float64"),
+                          TOT_USE_AM_mean=df["TOT_USE_AM_mean"].astype(float))
+    assert row_hashes(df).tolist() == row_hashes(converted[list(reversed(df.columns))]).tolist()
+
+
+def test_row_hash_changes_with_values():
+    changed = dict(ROWS[0], TOT_USE_AM_mean=Decimal("152.6"))
+    assert row_hashes(pd.DataFrame([changed])).iloc[0] != row_hashes(pd.DataFrame([ROWS[0]])).iloc[0]